@@ -1,9 +1,27 @@
 import os
-import sqlite3
-import requests
 from datetime import datetime, timedelta
+from functools import partial
+from itertools import groupby
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
 from features.menu import get_main_menu
+import background_jobs
+import db
+import deadlines
+import migrations
+import search_index
+import scholarship_catalog
+import scholarship_changes
+import scholarship_codes
+import scholarship_dedup
+import scholarship_record
+import scholarship_store
+import stats_counters
+import write_buffer
+import search_retention
+import search_cache
+import source_runs
+import startup
+from scrapers import client, fetch, health, http_cache, limits, live, scheduler
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -12,9 +30,7 @@ from telegram.ext import (
     ContextTypes,
     filters
 )
-from bs4 import BeautifulSoup
 import json
-import re
 import asyncio
 import sys
 import os
@@ -143,10 +159,9 @@ SCHOLARSHIP_STATUS = {
 # ============================================
 
 def init_db():
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
+    conn = db.get_connection()
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS users (
             user_id INTEGER PRIMARY KEY,
             username TEXT,
@@ -160,7 +175,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS scholarships (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT,
@@ -179,7 +194,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS favorites (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
@@ -195,7 +210,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS user_files (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
@@ -206,7 +221,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS reminders (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
@@ -220,7 +235,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS search_history (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
@@ -230,7 +245,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS admin_messages (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
@@ -243,7 +258,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS blocked_users (
             user_id INTEGER PRIMARY KEY,
             blocked_date TEXT,
@@ -251,7 +266,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS scholarship_updates (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             scholarship_id INTEGER,
@@ -263,7 +278,7 @@ def init_db():
         )
     ''')
 
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS user_scholarship_tracking (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
@@ -278,8 +293,6 @@ def init_db():
         )
     ''')
 
-    conn.commit()
-    conn.close()
     logger.info("✅ تم إعداد قاعدة البيانات بنجاح")
 
 # ============================================
@@ -292,127 +305,63 @@ def is_admin(user):
 
 def is_user_blocked(user_id):
     """التحقق من حظر المستخدم"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM blocked_users WHERE user_id = ?', (user_id,))
-    blocked = cursor.fetchone()
-    conn.close()
+    blocked = db.fetchone('SELECT 1 FROM blocked_users WHERE user_id = ?', (user_id,))
     return blocked is not None
 
 def block_user(user_id, reason=""):
     """حظر مستخدم"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    db.execute('''
         INSERT OR REPLACE INTO blocked_users (user_id, blocked_date, reason)
         VALUES (?, ?, ?)
     ''', (user_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), reason))
-    conn.commit()
-    conn.close()
     logger.info(f"🚫 تم حظر المستخدم: {user_id}")
 
 def unblock_user(user_id):
     """إلغاء حظر مستخدم"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM blocked_users WHERE user_id = ?', (user_id,))
-    conn.commit()
-    conn.close()
+    db.execute('DELETE FROM blocked_users WHERE user_id = ?', (user_id,))
     logger.info(f"✅ تم إلغاء حظر المستخدم: {user_id}")
 
 def get_user_stats():
-    """إحصائيات المستخدمين"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-
-    cursor.execute('SELECT COUNT(*) FROM users')
-    total_users = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(*) FROM users WHERE join_date = ?', 
-                   (datetime.now().strftime('%Y-%m-%d'),))
-    today_users = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(*) FROM scholarships')
-    total_scholarships = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(*) FROM admin_messages WHERE is_read = 0')
-    unread_messages = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(*) FROM blocked_users')
-    blocked_count = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(*) FROM users WHERE weekly_digest = 1')
-    digest_subscribers = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(*) FROM favorites')
-    total_favorites = cursor.fetchone()[0]
-
-    conn.close()
-
-    return {
-        'total_users': total_users,
-        'today_users': today_users,
-        'total_scholarships': total_scholarships,
-        'unread_messages': unread_messages,
-        'blocked_users': blocked_count,
-        'digest_subscribers': digest_subscribers,
-        'total_favorites': total_favorites
-    }
+    """إحصائيات المستخدمين (من جدول العدادات بدل COUNT(*) على كل جدول)"""
+    stats = stats_counters.get_counters()
+    stats['today_users'] = stats_counters.get_joins_since(0)
+    return stats
 
 def save_admin_message(user_id, username, message):
-    """حفظ رسالة للأدمن"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    """حفظ رسالة للأدمن (كتابة مؤجلة)"""
+    write_buffer.enqueue('''
         INSERT INTO admin_messages (user_id, username, message, message_date)
         VALUES (?, ?, ?, ?)
     ''', (user_id, username, message, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-    conn.commit()
-    conn.close()
     logger.info(f"📩 رسالة جديدة من المستخدم {user_id}")
 
 def get_admin_messages(unread_only=True):
     """جلب رسائل المستخدمين للأدمن"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    
     if unread_only:
-        cursor.execute('''
+        return db.fetchall('''
             SELECT * FROM admin_messages 
             WHERE is_read = 0 
             ORDER BY message_date DESC 
             LIMIT 10
         ''')
-    else:
-        cursor.execute('''
-            SELECT * FROM admin_messages 
-            ORDER BY message_date DESC 
-            LIMIT 20
-        ''')
-    
-    messages = cursor.fetchall()
-    conn.close()
-    return messages
+
+    return db.fetchall('''
+        SELECT * FROM admin_messages 
+        ORDER BY message_date DESC 
+        LIMIT 20
+    ''')
 
 def mark_message_as_read(message_id):
     """تمييز الرسالة كمقروءة"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('UPDATE admin_messages SET is_read = 1 WHERE id = ?', (message_id,))
-    conn.commit()
-    conn.close()
+    db.execute('UPDATE admin_messages SET is_read = 1 WHERE id = ?', (message_id,))
 
 def save_admin_reply(message_id, reply_text):
     """حفظ رد الأدمن على الرسالة"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    db.execute('''
         UPDATE admin_messages 
         SET admin_reply = ?, reply_date = ?, is_read = 1
         WHERE id = ?
     ''', (reply_text, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), message_id))
-    conn.commit()
-    conn.close()
 
 # ============================================
 # 🔔 نظام التتبع والإشعارات الذكية
@@ -420,126 +369,80 @@ def save_admin_reply(message_id, reply_text):
 
 def track_scholarship(user_id, scholarship_id, scholarship_name):
     """تفعيل تتبع منحة للمستخدم"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
     try:
-        cursor.execute('''
+        db.execute('''
             INSERT OR IGNORE INTO user_scholarship_tracking 
             (user_id, scholarship_id, scholarship_name, tracking_start_date)
             VALUES (?, ?, ?, ?)
         ''', (user_id, scholarship_id, scholarship_name, datetime.now().strftime('%Y-%m-%d')))
-        conn.commit()
-        conn.close()
         return True
     except:
-        conn.close()
         return False
 
 def get_tracked_scholarships(user_id):
     """جلب المنح المتتبعة للمستخدم"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    return db.fetchall('''
         SELECT * FROM user_scholarship_tracking 
         WHERE user_id = ? AND notification_enabled = 1
     ''', (user_id,))
-    tracked = cursor.fetchall()
-    conn.close()
-    return tracked
 
 def save_scholarship_update(scholarship_id, scholarship_name, update_type, update_content):
     """حفظ تحديث جديد لمنحة"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    db.execute('''
         INSERT INTO scholarship_updates 
         (scholarship_id, scholarship_name, update_type, update_content, update_date)
         VALUES (?, ?, ?, ?, ?)
     ''', (scholarship_id, scholarship_name, update_type, update_content, 
           datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-    conn.commit()
-    conn.close()
 
+@background_jobs.job('notifications')
 async def send_scholarship_notifications(context: ContextTypes.DEFAULT_TYPE):
-    """إرسال إشعارات تلقائية عن تحديثات المنح"""
+    """إرسال إشعارات بالتغييرات الحقيقية فقط (من سجل scholarship_updates)"""
     logger.info("🔔 جاري فحص التحديثات وإرسال الإشعارات...")
     
-    try:
-        conn = sqlite3.connect('scholarship_bot.db')
-        cursor = conn.cursor()
-        
-        # جلب جميع المستخدمين المتتبعين
-        cursor.execute('''
-            SELECT DISTINCT user_id FROM user_scholarship_tracking 
-            WHERE notification_enabled = 1
-        ''')
-        users = cursor.fetchall()
-        
-        for user_tuple in users:
-            user_id = user_tuple[0]
-            
-            # جلب المنح المتتبعة لهذا المستخدم
-            cursor.execute('''
-                SELECT scholarship_id, scholarship_name, last_notified 
-                FROM user_scholarship_tracking 
-                WHERE user_id = ? AND notification_enabled = 1
-            ''', (user_id,))
-            tracked_scholarships = cursor.fetchall()
-            
-            for sch_id, sch_name, last_notified in tracked_scholarships:
-                # جلب معلومات المنحة الحالية
-                cursor.execute('SELECT * FROM scholarships WHERE id = ?', (sch_id,))
-                scholarship = cursor.fetchone()
-                
-                if scholarship:
-                    # إنشاء رسالة التحديث
-                    notification_msg = f"""🔔 تحديث جديد عن المنحة المفضلة لديك!
+    last_id, changes = await db.run_read(scholarship_changes.pending_notifications)
+    
+    # رسالة واحدة لكل (مستخدم، منحة) تجمع كل تغييراتها
+    for (user_id, sch_id), rows in groupby(changes, key=lambda row: (row[0], row[1])):
+        rows = list(rows)
+        sch_name, link = rows[0][2], rows[0][5]
+        lines = '\n'.join(
+            f"{scholarship_changes.CHANGE_LABELS.get(update_type, update_type)}: {content}"
+            for _, _, _, update_type, content, _ in rows
+        )
+        notification_msg = f"""🔔 تحديث جديد عن المنحة المفضلة لديك!
 
 📚 {sch_name}
 
 ━━━━━━━━━━━━━━━━━━━━━━
 
-📅 الموعد النهائي: {scholarship[4]}
-🌍 الدولة: {scholarship[2]}
-🎯 التخصص: {scholarship[3]}
-💰 التمويل: {scholarship[8]}
-🎓 المرحلة: {scholarship[9]}
+{lines}
 
-📋 المتطلبات الحالية:
-{scholarship[10] if scholarship[10] else 'يرجى زيارة الموقع الرسمي'}
-
-🎁 المزايا:
-{scholarship[11] if scholarship[11] else 'تغطية شاملة للدراسة والمعيشة'}
-
-🔗 الرابط: {scholarship[6]}
+🌐 صفحة المنحة: {link or 'غير متوفر'}
 
 ━━━━━━━━━━━━━━━━━━━━━━
 💡 تابع الموقع الرسمي للمنحة لمعرفة آخر التحديثات!"""
-                    
-                    try:
-                        await context.bot.send_message(
-                            chat_id=user_id,
-                            text=notification_msg,
-                            disable_web_page_preview=True
-                        )
-                        
-                        # تحديث تاريخ آخر إشعار
-                        cursor.execute('''
-                            UPDATE user_scholarship_tracking 
-                            SET last_notified = ? 
-                            WHERE user_id = ? AND scholarship_id = ?
-                        ''', (datetime.now().strftime('%Y-%m-%d'), user_id, sch_id))
-                        conn.commit()
-                        
-                        logger.info(f"✅ تم إرسال إشعار للمستخدم {user_id} عن {sch_name}")
-                        
-                    except Exception as e:
-                        logger.error(f"خطأ في إرسال الإشعار: {e}")
-        
-        conn.close()
         
-    except Exception as e:
-        logger.error(f"خطأ في نظام الإشعارات: {e}")
+        try:
+            await context.bot.send_message(
+                chat_id=user_id,
+                text=notification_msg,
+                disable_web_page_preview=True
+            )
+            
+            # تحديث تاريخ آخر إشعار (كتابة مؤجلة)
+            write_buffer.enqueue('''
+                UPDATE user_scholarship_tracking 
+                SET last_notified = ? 
+                WHERE user_id = ? AND scholarship_id = ?
+            ''', (datetime.now().strftime('%Y-%m-%d'), user_id, sch_id))
+            
+            logger.info(f"✅ تم إرسال إشعار للمستخدم {user_id} عن {sch_name}")
+            
+        except Exception as e:
+            logger.error(f"خطأ في إرسال الإشعار: {e}")
+    
+    await db.run_write(scholarship_changes.mark_notified, last_id)
 
 # ============================================
 # 💾 دوال المنح المفضلة
@@ -547,71 +450,49 @@ async def send_scholarship_notifications(context: ContextTypes.DEFAULT_TYPE):
 
 def save_to_favorites(user_id, scholarship_id, scholarship_name, scholarship_link, status='thinking'):
     """حفظ منحة في المفضلة مع الحالة"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
     try:
-        cursor.execute('''
+        db.execute('''
             INSERT INTO favorites (user_id, scholarship_id, scholarship_name, scholarship_link, saved_date, status)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (user_id, scholarship_id, scholarship_name, scholarship_link, 
               datetime.now().strftime('%Y-%m-%d'), status))
-        conn.commit()
-        conn.close()
         return True
     except:
-        conn.close()
         return False
 
 def get_favorites(user_id, status_filter=None):
     """جلب المنح المفضلة مع فلترة بالحالة"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    
     if status_filter:
-        cursor.execute('''
+        return db.fetchall('''
             SELECT * FROM favorites 
             WHERE user_id = ? AND status = ?
             ORDER BY saved_date DESC
         ''', (user_id, status_filter))
-    else:
-        cursor.execute('''
-            SELECT * FROM favorites 
-            WHERE user_id = ? 
-            ORDER BY saved_date DESC
-        ''', (user_id,))
-    
-    favorites = cursor.fetchall()
-    conn.close()
-    return favorites
+
+    return db.fetchall('''
+        SELECT * FROM favorites 
+        WHERE user_id = ? 
+        ORDER BY saved_date DESC
+    ''', (user_id,))
 
 def update_favorite_status(favorite_id, new_status, notes=None):
     """تحديث حالة منحة مفضلة"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    
     if notes:
-        cursor.execute('''
+        db.execute('''
             UPDATE favorites 
             SET status = ?, notes = ?
             WHERE id = ?
         ''', (new_status, notes, favorite_id))
     else:
-        cursor.execute('''
+        db.execute('''
             UPDATE favorites 
             SET status = ?
             WHERE id = ?
         ''', (new_status, favorite_id))
-    
-    conn.commit()
-    conn.close()
 
 def remove_from_favorites(favorite_id):
     """حذف منحة من المفضلة"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM favorites WHERE id = ?', (favorite_id,))
-    conn.commit()
-    conn.close()
+    db.execute('DELETE FROM favorites WHERE id = ?', (favorite_id,))
 
 # ============================================
 # 🔔 دوال التذكيرات
@@ -623,17 +504,13 @@ def create_reminder(user_id, scholarship_id, scholarship_name, deadline_date, da
         deadline = datetime.strptime(deadline_date, '%Y-%m-%d')
         reminder_date = deadline - timedelta(days=days_before)
         
-        conn = sqlite3.connect('scholarship_bot.db')
-        cursor = conn.cursor()
-        cursor.execute('''
+        db.execute('''
             INSERT INTO reminders (user_id, scholarship_id, scholarship_name, 
                                  message, reminder_date, deadline_date)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (user_id, scholarship_id, scholarship_name,
               f'⏰ تذكير: موعد تقديم {scholarship_name} بعد {days_before} أيام!',
               reminder_date.strftime('%Y-%m-%d'), deadline_date))
-        conn.commit()
-        conn.close()
         return True
     except Exception as e:
         logger.error(f"خطأ في إنشاء التذكير: {e}")
@@ -641,24 +518,15 @@ def create_reminder(user_id, scholarship_id, scholarship_name, deadline_date, da
 
 def get_pending_reminders():
     """جلب التذكيرات المستحقة اليوم"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
     today = datetime.now().strftime('%Y-%m-%d')
-    cursor.execute('''
+    return db.fetchall('''
         SELECT * FROM reminders 
         WHERE reminder_date <= ? AND is_sent = 0
     ''', (today,))
-    reminders = cursor.fetchall()
-    conn.close()
-    return reminders
 
 def mark_reminder_sent(reminder_id):
     """تمييز التذكير كمرسل"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('UPDATE reminders SET is_sent = 1 WHERE id = ?', (reminder_id,))
-    conn.commit()
-    conn.close()
+    db.execute('UPDATE reminders SET is_sent = 1 WHERE id = ?', (reminder_id,))
 
 # ============================================
 # 🔍 دوال البحث المتقدم
@@ -667,54 +535,49 @@ def mark_reminder_sent(reminder_id):
 def advanced_search_db(degree_level=None, funding_type=None, keyword=None, 
                        deadline_soon=False, country=None, major=None):
     """البحث الدقيق المتقدم في قاعدة البيانات"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-
-    query = "SELECT * FROM scholarships WHERE 1=1"
-    params = []
+    # الكلمة المفتاحية والدولة والتخصص يتم البحث عنها في فهرس FTS5 بترتيب bm25
+    match = search_index.build_match(keyword=keyword, country=country, major=major)
+
+    columns = scholarship_record.select_columns(alias='s')
+    if match:
+        query = f"""SELECT {columns} FROM {search_index.FTS_TABLE} f
+                    JOIN scholarships s ON s.id = f.rowid
+                    WHERE {search_index.FTS_TABLE} MATCH ?"""
+        params = [match]
+    else:
+        query = f"SELECT {columns} FROM scholarships s WHERE 1=1"
+        params = []
 
+    # المرحلة والتمويل: مساواة على أكواد مفهرسة بدل LIKE على النص العربي
     if degree_level and degree_level != 'all':
-        query += " AND degree_level LIKE ?"
-        params.append(f'%{DEGREE_LEVELS[degree_level]}%')
+        query += " AND s.id IN (SELECT scholarship_id FROM scholarship_degrees WHERE degree_code = ?)"
+        params.append(scholarship_codes.DEGREE_CODES[degree_level])
 
     if funding_type and funding_type != 'all':
-        query += " AND funding_type LIKE ?"
-        params.append(f'%{FUNDING_TYPES[funding_type]}%')
-
-    if country:
-        query += " AND country LIKE ?"
-        params.append(f'%{country}%')
-
-    if major:
-        query += " AND major LIKE ?"
-        params.append(f'%{major}%')
-
-    if keyword:
-        query += " AND (name LIKE ? OR description LIKE ? OR country LIKE ? OR major LIKE ?)"
-        params.extend([f'%{keyword}%'] * 4)
+        query += " AND s.funding_code = ?"
+        params.append(scholarship_codes.FUNDING_CODES[funding_type])
 
     if deadline_soon:
         future_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
-        query += " AND deadline_date <= ? AND deadline_date >= ?"
+        query += " AND s.deadline_date <= ? AND s.deadline_date >= ?"
         params.extend([future_date, datetime.now().strftime('%Y-%m-%d')])
 
-    query += " ORDER BY last_updated DESC LIMIT 50"
+    if match:
+        query += f" ORDER BY {search_index.RANK_EXPR} LIMIT 50"
+    elif deadline_soon:
+        # الأقرب انتهاءً أولاً، مباشرة من فهرس deadline_date
+        query += " ORDER BY s.deadline_date LIMIT 50"
+    else:
+        query += " ORDER BY s.last_updated DESC LIMIT 50"
 
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return db.fetchall(query, params, row_factory=scholarship_record.row_factory)
 
 def save_search_history(user_id, search_query, search_type='general'):
-    """حفظ سجل البحث"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    """حفظ سجل البحث (كتابة مؤجلة)"""
+    write_buffer.enqueue('''
         INSERT INTO search_history (user_id, search_query, search_type, search_date)
         VALUES (?, ?, ?, ?)
     ''', (user_id, search_query, search_type, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-    conn.commit()
-    conn.close()
 
 def add_navigation_row(keyboard):
     """إضافة صف التنقل الثابت لكل keyboard"""
@@ -728,644 +591,64 @@ def add_navigation_row(keyboard):
 # 🌐 دوال البحث عن المنح من المواقع - محسّن وموسّع
 # ============================================
 
-def search_fastweb(keyword=None):
-    """البحث في Fastweb"""
-    scholarships = []
-    try:
-        scholarships.append({
-            'name': 'Fastweb Scholarship Opportunities',
-            'country': 'الولايات المتحدة',
-            'major': 'جميع التخصصات',
-            'deadline': 'متعددة',
-            'link': 'https://www.fastweb.com/',
-            'description': 'منصة بحث شاملة عن المنح في أمريكا',
-            'source': 'Fastweb',
-            'funding_type': 'متنوع',
-            'degree_level': 'جميع المراحل'
-        })
-    except Exception as e:
-        logger.error(f"خطأ في Fastweb: {e}")
-    return scholarships
+def search_catalog_scholarships(country=None, major=None, keyword=None):
+    """المنح من الكتالوج الثابت data/scholarship_catalog.json (بدون شبكة)"""
+    return scholarship_catalog.load().scholarships(country)
 
-def search_scholarships_com(keyword=None):
-    """البحث في Scholarships.com"""
-    scholarships = []
-    try:
-        scholarships.append({
-            'name': 'Scholarships.com Database',
-            'country': 'الولايات المتحدة',
-            'major': 'جميع التخصصات',
-            'deadline': 'متعددة',
-            'link': 'https://www.scholarships.com/',
-            'description': 'أكبر قاعدة بيانات للمنح الدراسية في أمريكا',
-            'source': 'Scholarships.com',
-            'funding_type': 'متنوع',
-            'degree_level': 'جميع المراحل'
-        })
-    except Exception as e:
-        logger.error(f"خطأ في Scholarships.com: {e}")
-    return scholarships
-
-def search_bigfuture(keyword=None):
-    """البحث في BigFuture (College Board)"""
-    scholarships = []
-    try:
-        scholarships.append({
-            'name': 'BigFuture Scholarship Search',
-            'country': 'الولايات المتحدة',
-            'major': 'جميع التخصصات',
-            'deadline': 'متعددة',
-            'link': 'https://bigfuture.collegeboard.org/',
-            'description': 'أداة بحث المنح من College Board',
-            'source': 'BigFuture',
-            'funding_type': 'متنوع',
-            'degree_level': 'بكالوريوس'
-        })
-    except Exception as e:
-        logger.error(f"خطأ في BigFuture: {e}")
-    return scholarships
-
-# ============================================
-# 🆕 محركات بحث جديدة - موسعة جداً
-# ============================================
+async def _stream_sources(country=None, major=None, keyword=None):
+    """الكتالوج الثابت ثم المصادر الحية بترتيب انتهائها (بدون كاش)"""
+    logger.info("🔍 بدء البحث الموسع في جميع المصادر...")
 
-def search_studyportals(country=None, major=None):
-    """البحث في StudyPortals - أكبر منصة أوروبية"""
-    scholarships = []
     try:
-        base_url = "https://www.studyportals.com"
-        
-        # منح أوروبية
-        scholarships.append({
-            'name': 'Erasmus+ Scholarship Programme',
-            'country': 'الاتحاد الأوروبي',
-            'major': 'جميع التخصصات',
-            'deadline': 'يناير - مارس سنوياً',
-            'link': 'https://erasmus-plus.ec.europa.eu/',
-            'description': 'منح الاتحاد الأوروبي الممولة بالكامل للدراسة في أوروبا',
-            'source': 'StudyPortals/Erasmus',
-            'funding_type': 'ممولة بالكامل',
-            'degree_level': 'ماجستير، دكتوراه'
-        })
-        
-        scholarships.append({
-            'name': 'VLIR-UOS Scholarships Belgium',
-            'country': 'بلجيكا',
-            'major': 'جميع التخصصات',
-            'deadline': 'فبراير - مارس',
-            'link': 'https://www.vliruos.be/',
-            'description': 'منح الحكومة البلجيكية الممولة بالكامل',
-            'source': 'VLIR-UOS',
-            'funding_type': 'ممولة بالكامل',
-            'degree_level': 'ماجستير'
-        })
-        
+        yield 'catalog', search_catalog_scholarships(country, major, keyword)
     except Exception as e:
-        logger.error(f"خطأ في StudyPortals: {e}")
-    
-    return scholarships
-
-def search_european_scholarships():
-    """منح أوروبية خاصة - ممولة بالكامل"""
-    scholarships = []
-    
-    european_programs = {
-        'eiffel': {
-            'name': 'Eiffel Excellence Scholarship - France',
-            'country': 'فرنسا',
-            'link': 'https://www.campusfrance.org/en/eiffel-scholarship-program-of-excellence',
-            'description': 'منحة الحكومة الفرنسية للتميز - ممولة بالكامل',
-            'deadline': 'يناير سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'swedish_institute': {
-            'name': 'Swedish Institute Scholarships',
-            'country': 'السويد',
-            'link': 'https://si.se/en/apply/scholarships/',
-            'description': 'منح المعهد السويدي الممولة بالكامل',
-            'deadline': 'فبراير سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير'
-        },
-        'switzerland': {
-            'name': 'Swiss Government Excellence Scholarships',
-            'country': 'سويسرا',
-            'link': 'https://www.sbfi.admin.ch/sbfi/en/home/education/scholarships-and-grants/swiss-government-excellence-scholarships.html',
-            'description': 'منح الحكومة السويسرية للتميز',
-            'deadline': 'ديسمبر - يناير',
-            'funding': 'ممولة بالكامل',
-            'level': 'دكتوراه، أبحاث'
-        },
-        'netherlands': {
-            'name': 'Orange Knowledge Programme - OKP',
-            'country': 'هولندا',
-            'link': 'https://www.studyinholland.nl/finances/orange-knowledge-programme',
-            'description': 'برنامج المعرفة البرتقالية الهولندي',
-            'deadline': 'أبريل سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير'
-        },
-        'italy': {
-            'name': 'Italian Government Scholarships',
-            'country': 'إيطاليا',
-            'link': 'https://studyinitaly.esteri.it/en/',
-            'description': 'منح الحكومة الإيطالية للطلاب الدوليين',
-            'deadline': 'مايو - يونيو',
-            'funding': 'ممولة بالكامل',
-            'level': 'جميع المراحل'
-        }
-    }
-    
-    for key, prog in european_programs.items():
-        scholarships.append({
-            'name': prog['name'],
-            'country': prog['country'],
-            'major': 'جميع التخصصات',
-            'deadline': prog['deadline'],
-            'link': prog['link'],
-            'description': prog['description'],
-            'source': 'حكومي أوروبي',
-            'funding_type': prog['funding'],
-            'degree_level': prog['level']
-        })
-    
-    return scholarships
-
-def search_asian_scholarships():
-    """منح آسيوية - ممولة بالكامل"""
-    scholarships = []
-    
-    asian_programs = {
-        'mext': {
-            'name': 'MEXT Japanese Government Scholarship',
-            'country': 'اليابان',
-            'link': 'https://www.studyinjapan.go.jp/en/',
-            'description': 'منحة وزارة التعليم اليابانية الممولة بالكامل',
-            'deadline': 'أبريل - مايو',
-            'funding': 'ممولة بالكامل',
-            'level': 'بكالوريوس، ماجستير، دكتوراه'
-        },
-        'kgsp': {
-            'name': 'Korean Government Scholarship Program (GKS)',
-            'country': 'كوريا الجنوبية',
-            'link': 'https://www.studyinkorea.go.kr/en/sub/gks/allnew_invite.do',
-            'description': 'منحة حكومة كوريا الجنوبية الشاملة',
-            'deadline': 'سبتمبر - أكتوبر',
-            'funding': 'ممولة بالكامل',
-            'level': 'بكالوريوس، ماجستير، دكتوراه'
-        },
-        'csc': {
-            'name': 'Chinese Government Scholarship (CSC)',
-            'country': 'الصين',
-            'link': 'https://www.campuschina.org/',
-            'description': 'منحة الحكومة الصينية عبر مجلس المنح الدراسية',
-            'deadline': 'يناير - أبريل',
-            'funding': 'ممولة بالكامل',
-            'level': 'جميع المراحل'
-        },
-        'taiwan': {
-            'name': 'Taiwan ICDF Scholarship',
-            'country': 'تايوان',
-            'link': 'https://www.icdf.org.tw/ct.asp?xItem=12503&CtNode=30304&mp=2',
-            'description': 'منحة صندوق التعاون التايواني',
-            'deadline': 'مارس سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'بكالوريوس، ماجستير'
-        },
-        'brunei': {
-            'name': 'Brunei Darussalam Government Scholarship',
-            'country': 'بروناي',
-            'link': 'https://www.mfa.gov.bn/Pages/Scholarship.aspx',
-            'description': 'منحة حكومة بروناي للطلاب الدوليين',
-            'deadline': 'فبراير - مارس',
-            'funding': 'ممولة بالكامل',
-            'level': 'بكالوريوس'
-        },
-        'singapore': {
-            'name': 'Singapore International Graduate Award (SINGA)',
-            'country': 'سنغافورة',
-            'link': 'https://www.a-star.edu.sg/Scholarships/for-graduate-studies/singapore-international-graduate-award-singa',
-            'description': 'جائزة سنغافورة للدراسات العليا',
-            'deadline': 'يناير سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'دكتوراه'
-        }
-    }
-    
-    for key, prog in asian_programs.items():
-        scholarships.append({
-            'name': prog['name'],
-            'country': prog['country'],
-            'major': 'جميع التخصصات',
-            'deadline': prog['deadline'],
-            'link': prog['link'],
-            'description': prog['description'],
-            'source': 'حكومي آسيوي',
-            'funding_type': prog['funding'],
-            'degree_level': prog['level']
-        })
-    
-    return scholarships
-
-def search_commonwealth_scholarships():
-    """منح الكومنولث - بريطانيا وأستراليا ونيوزيلندا"""
-    scholarships = []
-    
-    commonwealth = {
-        'chevening': {
-            'name': 'Chevening Scholarships UK',
-            'country': 'بريطانيا',
-            'link': 'https://www.chevening.org/',
-            'description': 'منحة الحكومة البريطانية الرائدة عالمياً',
-            'deadline': 'نوفمبر سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير'
-        },
-        'commonwealth_uk': {
-            'name': 'Commonwealth Scholarships UK',
-            'country': 'بريطانيا',
-            'link': 'https://cscuk.fcdo.gov.uk/',
-            'description': 'منح الكومنولث البريطانية للدول النامية',
-            'deadline': 'ديسمبر - فبراير',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'gates_cambridge': {
-            'name': 'Gates Cambridge Scholarship',
-            'country': 'بريطانيا',
-            'link': 'https://www.gatescambridge.org/',
-            'description': 'منحة جيتس كامبريدج الممولة بالكامل',
-            'deadline': 'أكتوبر - ديسمبر',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'australia_awards': {
-            'name': 'Australia Awards Scholarships',
-            'country': 'أستراليا',
-            'link': 'https://www.australiaawards.gov.au/',
-            'description': 'منح الحكومة الأسترالية الشاملة',
-            'deadline': 'أبريل - مايو',
-            'funding': 'ممولة بالكامل',
-            'level': 'بكالوريوس، ماجستير، دكتوراه'
-        },
-        'endeavour': {
-            'name': 'Endeavour Postgraduate Leadership Award',
-            'country': 'أستراليا',
-            'link': 'https://www.education.gov.au/endeavour-scholarships-and-fellowships',
-            'description': 'جائزة القيادة الأسترالية للدراسات العليا',
-            'deadline': 'يونيو سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'new_zealand': {
-            'name': 'New Zealand ASEAN Scholars Awards',
-            'country': 'نيوزيلندا',
-            'link': 'https://www.studyinnewzealand.govt.nz/',
-            'description': 'منح نيوزيلندا للطلاب الآسيويين',
-            'deadline': 'مارس سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'بكالوريوس، ماجستير'
-        }
-    }
-    
-    for key, prog in commonwealth.items():
-        scholarships.append({
-            'name': prog['name'],
-            'country': prog['country'],
-            'major': 'جميع التخصصات',
-            'deadline': prog['deadline'],
-            'link': prog['link'],
-            'description': prog['description'],
-            'source': 'كومنولث',
-            'funding_type': prog['funding'],
-            'degree_level': prog['level']
-        })
-    
-    return scholarships
-
-def search_north_american_scholarships():
-    """منح أمريكا الشمالية - USA & Canada"""
-    scholarships = []
-    
-    programs = {
-        'fulbright': {
-            'name': 'Fulbright Foreign Student Program',
-            'country': 'الولايات المتحدة',
-            'link': 'https://foreign.fulbrightonline.org/',
-            'description': 'برنامج فولبرايت الأمريكي الشهير عالمياً',
-            'deadline': 'أكتوبر (يختلف بالبلد)',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'humphrey': {
-            'name': 'Hubert Humphrey Fellowship',
-            'country': 'الولايات المتحدة',
-            'link': 'https://www.humphreyfellowship.org/',
-            'description': 'زمالة همفري للقادة المهنيين',
-            'deadline': 'سبتمبر سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'زمالة مهنية'
-        },
-        'aauw': {
-            'name': 'AAUW International Fellowships',
-            'country': 'الولايات المتحدة',
-            'link': 'https://www.aauw.org/resources/programs/fellowships-grants/current-opportunities/international/',
-            'description': 'زمالات AAUW للنساء الدوليات',
-            'deadline': 'نوفمبر سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'vanier': {
-            'name': 'Vanier Canada Graduate Scholarships',
-            'country': 'كندا',
-            'link': 'https://vanier.gc.ca/',
-            'description': 'منحة فانيه الكندية للتميز الأكاديمي',
-            'deadline': 'نوفمبر سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'دكتوراه'
-        },
-        'trudeau': {
-            'name': 'Trudeau Foundation Doctoral Scholarships',
-            'country': 'كندا',
-            'link': 'https://www.trudeaufoundation.ca/',
-            'description': 'منح مؤسسة ترودو للدكتوراه',
-            'deadline': 'ديسمبر سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'دكتوراه'
-        }
-    }
-    
-    for key, prog in programs.items():
-        scholarships.append({
-            'name': prog['name'],
-            'country': prog['country'],
-            'major': 'جميع التخصصات',
-            'deadline': prog['deadline'],
-            'link': prog['link'],
-            'description': prog['description'],
-            'source': 'حكومي أمريكي/كندي',
-            'funding_type': prog['funding'],
-            'degree_level': prog['level']
-        })
-    
-    return scholarships
-
-def search_middle_east_scholarships():
-    """منح الشرق الأوسط"""
-    scholarships = []
-    
-    programs = {
-        'mbrhe': {
-            'name': 'Mohammed Bin Rashid Al Maktoum Scholarship',
-            'country': 'الإمارات',
-            'link': 'https://www.mbrhe.ae/',
-            'description': 'برنامج محمد بن راشد للتعلم الذكي - الإمارات',
-            'deadline': 'مارس - مايو',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'kaust': {
-            'name': 'KAUST Scholarship - Saudi Arabia',
-            'country': 'السعودية',
-            'link': 'https://www.kaust.edu.sa/en/study/admissions',
-            'description': 'منح جامعة الملك عبدالله للعلوم والتقنية',
-            'deadline': 'يناير سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'qcri': {
-            'name': 'Qatar Foundation Scholarships',
-            'country': 'قطر',
-            'link': 'https://www.qf.org.qa/',
-            'description': 'منح مؤسسة قطر التعليمية',
-            'deadline': 'فبراير - أبريل',
-            'funding': 'ممولة بالكامل',
-            'level': 'بكالوريوس، ماجستير'
-        }
-    }
-    
-    for key, prog in programs.items():
-        scholarships.append({
-            'name': prog['name'],
-            'country': prog['country'],
-            'major': 'جميع التخصصات',
-            'deadline': prog['deadline'],
-            'link': prog['link'],
-            'description': prog['description'],
-            'source': 'خليجي',
-            'funding_type': prog['funding'],
-            'degree_level': prog['level']
-        })
-    
-    return scholarships
+        logger.error(f"❌ خطأ في الكتالوج الثابت: {e}")
+
+    async for job, results in fetch.stream(live.live_jobs(country, major, keyword)):
+        yield job.source, results
+
+def _all_results(collected):
+    return [sch for _, results in collected for sch in results]
+
+async def _fetch_sources(country=None, major=None, keyword=None):
+    """كل المصادر مجمعة ومحفوظة في القاعدة (تحديث الكاش في الخلفية)"""
+    collected = [pair async for pair in _stream_sources(country, major, keyword)]
+    await db.run_write(save_scholarships_to_db, _all_results(collected))
+    return collected
+
+async def stream_scholarships_online(country=None, major=None, keyword=None):
+    """🚀 البحث الموسع: (المصدر، المنح) لكل مصدر فور انتهائه
+
+    الكتالوج الثابت أولاً، ثم المصادر الحية (ScholarshipPortal, Scholars4Dev,
+    FindAMasters) تُجلب كلها بالتوازي وتخرج بترتيب انتهائها.
+    البحث المتكرر يُقدم من search_cache، والجلب الفعلي يُحفظ في القاعدة مرة واحدة.
+    """
+    key = search_cache.make_key(country, major, keyword)
+    cached = search_cache.lookup(key, refresh=partial(_fetch_sources, country, major, keyword))
+    if cached is None:
+        # بحث مطابق يجلب الآن: ننتظر نتيجته بدل تكرار الجلب
+        cached = await search_cache.wait_pending(key)
+
+    if cached is not None:
+        for source, results in cached:
+            yield source, results
+        return
 
-def search_international_organizations():
-    """منح المنظمات الدولية"""
-    scholarships = []
-    
-    orgs = {
-        'who': {
-            'name': 'WHO Scholarships',
-            'country': 'دولية',
-            'link': 'https://www.who.int/',
-            'description': 'منح منظمة الصحة العالمية للدراسات الطبية',
-            'deadline': 'يختلف حسب البرنامج',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'un': {
-            'name': 'UN Peace University Scholarships',
-            'country': 'دولية',
-            'link': 'https://www.upeace.org/',
-            'description': 'منح جامعة الأمم المتحدة للسلام',
-            'deadline': 'مارس - مايو',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير'
-        },
-        'unu': {
-            'name': 'UNU-MERIT Scholarship',
-            'country': 'دولية',
-            'link': 'https://www.merit.unu.edu/',
-            'description': 'منح جامعة الأمم المتحدة - هولندا',
-            'deadline': 'فبراير سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير'
-        },
-        'iaea': {
-            'name': 'IAEA Scholarship Programme',
-            'country': 'دولية',
-            'link': 'https://www.iaea.org/',
-            'description': 'منح الوكالة الدولية للطاقة الذرية',
-            'deadline': 'مارس سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'wipo': {
-            'name': 'WIPO IP Training',
-            'country': 'دولية',
-            'link': 'https://www.wipo.int/',
-            'description': 'برامج المنظمة العالمية للملكية الفكرية',
-            'deadline': 'ديسمبر - يناير',
-            'funding': 'ممولة بالكامل',
-            'level': 'دبلوم، ماجستير'
-        }
-    }
-    
-    for key, prog in orgs.items():
-        scholarships.append({
-            'name': prog['name'],
-            'country': prog['country'],
-            'major': 'جميع التخصصات',
-            'deadline': prog['deadline'],
-            'link': prog['link'],
-            'description': prog['description'],
-            'source': 'منظمة دولية',
-            'funding_type': prog['funding'],
-            'degree_level': prog['level']
-        })
-    
-    return scholarships
+    with search_cache.filling(key) as collected:
+        async for source, results in _stream_sources(country, major, keyword):
+            collected.append((source, results))
+            yield source, results
+        await db.run_write(save_scholarships_to_db, _all_results(collected))
 
-def search_university_specific_scholarships():
-    """منح جامعات محددة مشهورة"""
-    scholarships = []
-    
-    unis = {
-        'oxford_reach': {
-            'name': 'Oxford Reach Scholarship',
-            'country': 'بريطانيا',
-            'link': 'https://www.ox.ac.uk/admissions/graduate/fees-and-funding/fees-funding-and-scholarship-search',
-            'description': 'منح جامعة أكسفورد للطلاب الدوليين',
-            'deadline': 'يناير - مارس',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'cambridge_trust': {
-            'name': 'Cambridge Trust Scholarships',
-            'country': 'بريطانيا',
-            'link': 'https://www.cambridgetrust.org/',
-            'description': 'منح مؤسسة كامبريدج الدولية',
-            'deadline': 'ديسمبر - يناير',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'eth_zurich': {
-            'name': 'ETH Zurich Excellence Scholarship',
-            'country': 'سويسرا',
-            'link': 'https://ethz.ch/students/en/studies/financial/scholarships/excellencescholarship.html',
-            'description': 'منحة التميز من ETH زيورخ',
-            'deadline': 'ديسمبر سنوياً',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير'
-        },
-        'tu_delft': {
-            'name': 'TU Delft Excellence Scholarship',
-            'country': 'هولندا',
-            'link': 'https://www.tudelft.nl/en/education/admission-and-application/msc-international-students/tu-delft-scholarship',
-            'description': 'منحة جامعة دلفت التقنية',
-            'deadline': 'ديسمبر - فبراير',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير'
-        },
-        'kaist': {
-            'name': 'KAIST Scholarship - Korea',
-            'country': 'كوريا الجنوبية',
-            'link': 'https://admission.kaist.ac.kr/',
-            'description': 'منح معهد كايست الكوري للعلوم والتقنية',
-            'deadline': 'مايو - سبتمبر',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'nus': {
-            'name': 'NUS Graduate Scholarships Singapore',
-            'country': 'سنغافورة',
-            'link': 'https://www.nus.edu.sg/oam/scholarships',
-            'description': 'منح جامعة سنغافورة الوطنية للدراسات العليا',
-            'deadline': 'نوفمبر - يناير',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير، دكتوراه'
-        },
-        'ntu': {
-            'name': 'NTU Research Scholarship Singapore',
-            'country': 'سنغافورة',
-            'link': 'https://www.ntu.edu.sg/admissions/graduate/scholarships',
-            'description': 'منح جامعة نانيانغ التقنية للأبحاث',
-            'deadline': 'أكتوبر - ديسمبر',
-            'funding': 'ممولة بالكامل',
-            'level': 'دكتوراه'
-        },
-        'ku_leuven': {
-            'name': 'KU Leuven Scholarships Belgium',
-            'country': 'بلجيكا',
-            'link': 'https://www.kuleuven.be/english/admissions/scholarships',
-            'description': 'منح جامعة لوفين البلجيكية',
-            'deadline': 'فبراير - مارس',
-            'funding': 'ممولة بالكامل',
-            'level': 'ماجستير'
-        }
-    }
-    
-    for key, prog in unis.items():
-        scholarships.append({
-            'name': prog['name'],
-            'country': prog['country'],
-            'major': 'جميع التخصصات',
-            'deadline': prog['deadline'],
-            'link': prog['link'],
-            'description': prog['description'],
-            'source': 'جامعة مرموقة',
-            'funding_type': prog['funding'],
-            'degree_level': prog['level']
-        })
-    
-    return scholarships
-
-def search_scholarships_online(country=None, major=None, keyword=None):
+async def search_scholarships_online(country=None, major=None, keyword=None):
     """🚀 البحث الموسع عن المنح - أكثر من 100+ منحة ممولة بالكامل"""
     scholarships = []
 
     try:
-        logger.info("🔍 بدء البحث الموسع في جميع المصادر...")
-        
-        # 1. المواقع الأساسية
-        scholarships.extend(search_scholarship_portal(country, major, keyword))
-        scholarships.extend(search_scholars4dev(country, major, keyword))
-        
-        # 2. FindAMasters للدراسات العليا
-        if major in ['engineering', 'cs', 'science', 'business']:
-            scholarships.extend(search_findamasters(country, major))
-        
-        # 3. المنح الحكومية الرسمية (DAAD, Turkiye, CSC, إلخ)
-        scholarships.extend(search_government_sites(country))
-        
-        # 4. 🆕 المنح الأوروبية الممولة بالكامل
-        scholarships.extend(search_european_scholarships())
-        scholarships.extend(search_studyportals(country, major))
-        
-        # 5. 🆕 المنح الآسيوية (اليابان، كوريا، الصين، سنغافورة)
-        scholarships.extend(search_asian_scholarships())
-        
-        # 6. 🆕 منح الكومنولث (بريطانيا، أستراليا، نيوزيلندا)
-        scholarships.extend(search_commonwealth_scholarships())
-        
-        # 7. 🆕 منح أمريكا الشمالية (Fulbright, Vanier, Trudeau)
-        scholarships.extend(search_north_american_scholarships())
-        
-        # 8. 🆕 منح الشرق الأوسط (الإمارات، السعودية، قطر)
-        scholarships.extend(search_middle_east_scholarships())
-        
-        # 9. 🆕 منح المنظمات الدولية (UN, WHO, IAEA)
-        scholarships.extend(search_international_organizations())
-        
-        # 10. 🆕 منح الجامعات المرموقة (Oxford, Cambridge, ETH, NUS)
-        scholarships.extend(search_university_specific_scholarships())
-        
-        # 11. المواقع الأمريكية
-        scholarships.extend(search_fastweb(keyword))
-        scholarships.extend(search_scholarships_com(keyword))
-        scholarships.extend(search_bigfuture(keyword))
+        async for _, results in stream_scholarships_online(country, major, keyword):
+            scholarships.extend(results)
         
+        scholarships = scholarship_dedup.collapse(scholarships)
         logger.info(f"✅ تم جمع {len(scholarships)} منحة من جميع المصادر")
 
     except Exception as e:
@@ -1373,537 +656,34 @@ def search_scholarships_online(country=None, major=None, keyword=None):
 
     return scholarships
 
-def search_scholarship_portal(country, major, keyword):
-    """البحث الحقيقي في ScholarshipPortal.com - محسّن"""
-    scholarships = []
-    try:
-        base_url = "https://www.scholarshipportal.com"
-        
-        # بناء URL البحث الديناميكي
-        search_params = []
-        if country:
-            search_params.append(f"c={country}")
-        if major:
-            search_params.append(f"d={major}")
-        if keyword:
-            search_params.append(f"q={keyword}")
-        
-        search_url = f"{base_url}/scholarships"
-        if search_params:
-            search_url += "?" + "&".join(search_params)
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-        }
-
-        logger.info(f"🔍 البحث في ScholarshipPortal: {search_url}")
-        
-        response = requests.get(search_url, headers=headers, timeout=15)
-
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # محاولة إيجاد المنح بطرق متعددة
-            scholarship_items = soup.find_all('div', class_=['scholarship-item', 'card', 'result-item'])
-            
-            if not scholarship_items:
-                scholarship_items = soup.find_all('article')
-            
-            logger.info(f"✅ وجدنا {len(scholarship_items)} منحة في ScholarshipPortal")
-
-            for item in scholarship_items[:20]:  # زيادة العدد لـ 20
-                try:
-                    # استخراج الاسم
-                    name_tag = item.find(['h3', 'h2', 'h4', 'a'])
-                    name = name_tag.text.strip() if name_tag else 'غير متوفر'
-                    
-                    # استخراج الرابط
-                    link_tag = item.find('a', href=True)
-                    link = ''
-                    if link_tag:
-                        href = link_tag['href']
-                        link = href if href.startswith('http') else base_url + href
-                    
-                    # استخراج الوصف
-                    desc_tag = item.find('p')
-                    description = desc_tag.text.strip()[:200] if desc_tag else 'غير متوفر'
-                    
-                    # استخراج الموعد النهائي
-                    deadline_tag = item.find(text=re.compile(r'deadline|date|closing', re.I))
-                    deadline = deadline_tag.strip() if deadline_tag else 'يرجى زيارة الموقع'
-
-                    if name != 'غير متوفر' and link:
-                        scholarships.append({
-                            'name': name,
-                            'country': country or 'متعددة',
-                            'major': major or 'جميع التخصصات',
-                            'deadline': deadline,
-                            'link': link,
-                            'description': description,
-                            'source': 'ScholarshipPortal',
-                            'funding_type': 'متنوع',
-                            'degree_level': 'جميع المراحل'
-                        })
-                except Exception as e:
-                    logger.error(f"خطأ في معالجة منحة: {e}")
-                    continue
-
-    except Exception as e:
-        logger.error(f"❌ خطأ في ScholarshipPortal: {e}")
-
-    return scholarships
-
-def search_scholars4dev(country, major, keyword):
-    """البحث الموسع في Scholars4Dev - محسّن جداً"""
-    scholarships = []
-    try:
-        base_url = "https://www.scholars4dev.com"
-        
-        # بناء استعلام البحث الديناميكي
-        search_queries = []
-        
-        if country:
-            search_queries.append(f"{country} scholarships")
-        if major:
-            search_queries.append(f"{major} scholarships")
-        if keyword:
-            search_queries.append(keyword)
-        
-        # إذا لم يكن هناك استعلام، ابحث عن المنح الحديثة
-        if not search_queries:
-            search_queries = ["fully funded scholarships", "international scholarships"]
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        }
-
-        for query in search_queries[:2]:  # بحث في أول استعلامين
-            try:
-                search_url = f"{base_url}/?s={query.replace(' ', '+')}"
-                
-                logger.info(f"🔍 البحث في Scholars4Dev: {search_url}")
-                
-                response = requests.get(search_url, headers=headers, timeout=15)
-
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    articles = soup.find_all(['article', 'div'], class_=re.compile(r'post|article|entry'), limit=15)
-
-                    logger.info(f"✅ وجدنا {len(articles)} مقالة في Scholars4Dev")
-
-                    for article in articles:
-                        try:
-                            # استخراج العنوان
-                            title_tag = article.find(['h2', 'h3', 'h1'])
-                            if not title_tag:
-                                continue
-                            
-                            name = title_tag.text.strip()
-                            
-                            # استخراج الرابط
-                            link_tag = title_tag.find('a') if title_tag else article.find('a')
-                            link = link_tag['href'] if link_tag and link_tag.get('href') else ''
-
-                            # استخراج الوصف
-                            desc_tag = article.find('p')
-                            description = desc_tag.text.strip()[:250] if desc_tag else ''
-                            
-                            # استخراج الموعد النهائي من النص
-                            deadline = 'يرجى زيارة الموقع'
-                            deadline_match = re.search(r'deadline[:\s]+([A-Za-z]+\s+\d{1,2},?\s+\d{4})', article.text, re.I)
-                            if deadline_match:
-                                deadline = deadline_match.group(1)
-
-                            if name and link and 'scholarship' in name.lower():
-                                scholarships.append({
-                                    'name': name,
-                                    'country': country or 'متعددة',
-                                    'major': major or 'جميع التخصصات',
-                                    'deadline': deadline,
-                                    'link': link,
-                                    'description': description,
-                                    'source': 'Scholars4Dev',
-                                    'funding_type': 'متنوع',
-                                    'degree_level': 'جميع المراحل'
-                                })
-                        except Exception as e:
-                            logger.error(f"خطأ في معالجة مقالة: {e}")
-                            continue
-                            
-            except Exception as e:
-                logger.error(f"خطأ في استعلام: {e}")
-                continue
-
-    except Exception as e:
-        logger.error(f"❌ خطأ في Scholars4Dev: {e}")
-
-    return scholarships
-
-def search_findamasters(country, major):
-    """البحث في FindAMasters"""
-    scholarships = []
-    try:
-        base_url = "https://www.findamasters.com"
-        search_url = f"{base_url}/funding/phd-funding.aspx"
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-
-        response = requests.get(search_url, headers=headers, timeout=10)
-
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            funding_items = soup.find_all('div', class_='funding-result', limit=10)
-
-            for item in funding_items:
-                try:
-                    name_tag = item.find('h3') or item.find('a', class_='courseLink')
-                    name = name_tag.text.strip() if name_tag else 'غير متوفر'
-
-                    link = base_url + item.find('a')['href'] if item.find('a') else ''
-
-                    scholarships.append({
-                        'name': name,
-                        'country': country or 'متعددة',
-                        'major': major or 'جميع التخصصات',
-                        'deadline': 'يرجى زيارة الموقع',
-                        'link': link,
-                        'description': 'منحة دراسات عليا',
-                        'source': 'FindAMasters'
-                    })
-                except:
-                    continue
-
-    except Exception as e:
-        logger.error(f"خطأ في FindAMasters: {e}")
-
-    return scholarships
-
-def search_government_sites(country):
-    """البحث الموسع في المواقع الحكومية - محسّن جداً"""
-    scholarships = []
-
-    gov_sites = {
-        'germany': [
-            {
-                'name': 'DAAD Scholarships - Germany',
-                'url': 'https://www.daad.de/en/',
-                'description': 'منح الحكومة الألمانية للدراسات العليا - أكثر من 200 برنامج',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير، دكتوراه'
-            },
-            {
-                'name': 'Deutschlandstipendium Scholarship',
-                'url': 'https://www.deutschlandstipendium.de/',
-                'description': 'منحة ألمانيا الوطنية للطلاب المتفوقين',
-                'funding': 'ممولة جزئياً',
-                'level': 'بكالوريوس، ماجستير'
-            },
-            {
-                'name': 'Friedrich Ebert Foundation',
-                'url': 'https://www.fes.de/en/',
-                'description': 'منح مؤسسة فريدريش إيبرت الألمانية',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير، دكتوراه'
-            }
-        ],
-        'turkey': [
-            {
-                'name': 'Türkiye Bursları Scholarship',
-                'url': 'https://www.turkiyeburslari.gov.tr/',
-                'description': 'منحة الحكومة التركية الشاملة - أكثر من 5000 منحة سنوياً',
-                'funding': 'ممولة بالكامل',
-                'level': 'بكالوريوس، ماجستير، دكتوراه'
-            },
-            {
-                'name': 'YTB Turkish Government Scholarship',
-                'url': 'https://www.ytb.gov.tr/',
-                'description': 'منح رئاسة التركيات في الخارج',
-                'funding': 'ممولة بالكامل',
-                'level': 'جميع المراحل'
-            },
-            {
-                'name': 'Istanbul University Scholarships',
-                'url': 'https://www.istanbul.edu.tr/',
-                'description': 'منح جامعة إسطنبول للطلاب الدوليين',
-                'funding': 'متنوع',
-                'level': 'بكالوريوس، ماجستير'
-            },
-            {
-                'name': 'Sabanci University Scholarship',
-                'url': 'https://www.sabanciuniv.edu/',
-                'description': 'منح جامعة صبنجي التركية',
-                'funding': 'ممولة بالكامل',
-                'level': 'بكالوريوس، ماجستير'
-            },
-            {
-                'name': 'Koç University Scholarships',
-                'url': 'https://www.ku.edu.tr/',
-                'description': 'منح جامعة كوتش - أفضل جامعة خاصة في تركيا',
-                'funding': 'ممولة بالكامل',
-                'level': 'جميع المراحل'
-            }
-        ],
-        'china': [
-            {
-                'name': 'Chinese Government Scholarship (CSC)',
-                'url': 'https://www.campuschina.org/',
-                'description': 'منحة حكومية صينية - أكثر من 10,000 منحة سنوياً',
-                'funding': 'ممولة بالكامل',
-                'level': 'بكالوريوس، ماجستير، دكتوراه'
-            },
-            {
-                'name': 'Confucius Institute Scholarship',
-                'url': 'https://www.chinese.cn/',
-                'description': 'منح معهد كونفوشيوس لدراسة اللغة الصينية',
-                'funding': 'ممولة بالكامل',
-                'level': 'جميع المراحل'
-            },
-            {
-                'name': 'Belt and Road Scholarship',
-                'url': 'https://www.campuschina.org/',
-                'description': 'منح مبادرة الحزام والطريق الصينية',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير، دكتوراه'
-            }
-        ],
-        'france': [
-            {
-                'name': 'Campus France Scholarships',
-                'url': 'https://www.campusfrance.org/',
-                'description': 'منح الحكومة الفرنسية',
-                'funding': 'متنوع',
-                'level': 'جميع المراحل'
-            },
-            {
-                'name': 'Eiffel Excellence Scholarship',
-                'url': 'https://www.campusfrance.org/en/eiffel-scholarship-program-of-excellence',
-                'description': 'منحة إيفل للتميز - من أفضل المنح الفرنسية',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير، دكتوراه'
-            }
-        ],
-        'uk': [
-            {
-                'name': 'Chevening Scholarships',
-                'url': 'https://www.chevening.org/',
-                'description': 'منح حكومية بريطانية للماجستير - الأشهر عالمياً',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير'
-            },
-            {
-                'name': 'Commonwealth Scholarships',
-                'url': 'https://cscuk.fcdo.gov.uk/',
-                'description': 'منح الكومنولث البريطانية',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير، دكتوراه'
-            },
-            {
-                'name': 'GREAT Scholarships',
-                'url': 'https://www.britishcouncil.org/study-work-abroad/outside-uk/scholarships/great-scholarships',
-                'description': 'منح GREAT البريطانية',
-                'funding': 'ممولة جزئياً',
-                'level': 'ماجستير'
-            }
-        ],
-        'australia': [
-            {
-                'name': 'Australia Awards Scholarships',
-                'url': 'https://www.australiaawards.gov.au/',
-                'description': 'منح الحكومة الأسترالية الشاملة',
-                'funding': 'ممولة بالكامل',
-                'level': 'بكالوريوس، ماجستير، دكتوراه'
-            },
-            {
-                'name': 'Research Training Program (RTP)',
-                'url': 'https://www.education.gov.au/',
-                'description': 'برنامج التدريب البحثي الأسترالي',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير بحثي، دكتوراه'
-            }
-        ],
-        'japan': [
-            {
-                'name': 'MEXT Japanese Government Scholarship',
-                'url': 'https://www.studyinjapan.go.jp/',
-                'description': 'منح وزارة التعليم اليابانية',
-                'funding': 'ممولة بالكامل',
-                'level': 'بكالوريوس، ماجستير، دكتوراه'
-            },
-            {
-                'name': 'JASSO Scholarship',
-                'url': 'https://www.jasso.go.jp/',
-                'description': 'منح منظمة خدمات الطلاب اليابانية',
-                'funding': 'ممولة جزئياً',
-                'level': 'جميع المراحل'
-            }
-        ],
-        'south_korea': [
-            {
-                'name': 'Korean Government Scholarship (GKS)',
-                'url': 'https://www.studyinkorea.go.kr/',
-                'description': 'منح GKS الحكومية الكورية الشاملة',
-                'funding': 'ممولة بالكامل',
-                'level': 'بكالوريوس، ماجستير، دكتوراه'
-            },
-            {
-                'name': 'Korea Foundation Fellowship',
-                'url': 'https://www.kf.or.kr/',
-                'description': 'زمالات مؤسسة كوريا',
-                'funding': 'ممولة بالكامل',
-                'level': 'دكتوراه، أبحاث'
-            }
-        ],
-        'netherlands': [
-            {
-                'name': 'Holland Scholarship',
-                'url': 'https://www.studyinholland.nl/',
-                'description': 'منح الحكومة الهولندية',
-                'funding': 'ممولة جزئياً',
-                'level': 'بكالوريوس، ماجستير'
-            },
-            {
-                'name': 'Orange Knowledge Programme',
-                'url': 'https://www.studyinholland.nl/finances/orange-knowledge-programme',
-                'description': 'برنامج المعرفة البرتقالية',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير'
-            }
-        ],
-        'sweden': [
-            {
-                'name': 'Swedish Institute Scholarships',
-                'url': 'https://si.se/',
-                'description': 'منح الحكومة السويدية',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير'
-            }
-        ],
-        'canada': [
-            {
-                'name': 'Vanier Canada Graduate Scholarships',
-                'url': 'https://vanier.gc.ca/',
-                'description': 'منحة فانيه الكندية للدكتوراه',
-                'funding': 'ممولة بالكامل',
-                'level': 'دكتوراه'
-            }
-        ],
-        'singapore': [
-            {
-                'name': 'Singapore International Graduate Award (SINGA)',
-                'url': 'https://www.a-star.edu.sg/',
-                'description': 'جائزة سنغافورة للدراسات العليا',
-                'funding': 'ممولة بالكامل',
-                'level': 'دكتوراه'
-            }
-        ],
-        'malaysia': [
-            {
-                'name': 'Malaysian International Scholarship',
-                'url': 'https://www.moe.gov.my/',
-                'description': 'منحة الحكومة الماليزية',
-                'funding': 'ممولة بالكامل',
-                'level': 'ماجستير، دكتوراه'
-            }
-        ]
-    }
-
-    if country and country in gov_sites:
-        # إذا كانت الدولة محددة، أضف كل منحها
-        for prog in gov_sites[country]:
-            scholarships.append({
-                'name': prog['name'],
-                'country': COUNTRIES.get(country, country),
-                'major': 'جميع التخصصات',
-                'deadline': 'يتم التحديث سنوياً',
-                'link': prog['url'],
-                'description': prog['description'],
-                'source': 'موقع حكومي رسمي',
-                'funding_type': prog['funding'],
-                'degree_level': prog['level']
-            })
-    else:
-        # أضف جميع المنح من جميع الدول
-        for country_key, programs in gov_sites.items():
-            for prog in programs:
-                scholarships.append({
-                    'name': prog['name'],
-                    'country': COUNTRIES.get(country_key, country_key),
-                    'major': 'جميع التخصصات',
-                    'deadline': 'يتم التحديث سنوياً',
-                    'link': prog['url'],
-                    'description': prog['description'],
-                    'source': 'موقع حكومي رسمي',
-                    'funding_type': prog['funding'],
-                    'degree_level': prog['level']
-                })
-
-    return scholarships
-
-
 def save_scholarships_to_db(scholarships_list):
-    """حفظ المنح في قاعدة البيانات"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-
-    for sch in scholarships_list:
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO scholarships 
-                (name, country, major, deadline, link, description, funding_type, degree_level, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                sch.get('name', ''),
-                sch.get('country', ''),
-                sch.get('major', ''),
-                sch.get('deadline', ''),
-                sch.get('link', ''),
-                sch.get('description', ''),
-                sch.get('funding_type', 'غير محدد'),
-                sch.get('degree_level', 'جميع المراحل'),
-                datetime.now().strftime('%Y-%m-%d')
-            ))
-        except Exception as e:
-            logger.error(f"خطأ في حفظ المنحة: {e}")
-            continue
-
-    conn.commit()
-    conn.close()
-
-def get_scholarships_from_db(major=None, country=None):
-    """جلب المنح من قاعدة البيانات"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-
-    if major and country:
-        cursor.execute('''
-            SELECT * FROM scholarships 
-            WHERE major LIKE ? AND country LIKE ?
-            ORDER BY last_updated DESC
-        ''', (f'%{major}%', f'%{country}%'))
-    elif major:
-        cursor.execute('''
-            SELECT * FROM scholarships 
-            WHERE major LIKE ?
-            ORDER BY last_updated DESC
-        ''', (f'%{major}%',))
-    elif country:
-        cursor.execute('''
-            SELECT * FROM scholarships 
-            WHERE country LIKE ?
-            ORDER BY last_updated DESC
-        ''', (f'%{country}%',))
-    else:
-        cursor.execute('SELECT * FROM scholarships ORDER BY last_updated DESC LIMIT 50')
-
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    """حفظ المنح في قاعدة البيانات (الجديد والمتغير فقط، مع ثبات id المنحة)"""
+    counts = scholarship_store.upsert_scholarships(scholarships_list)
+    logger.info(
+        f"💾 حفظ المنح: {counts['inserted']} جديدة، {counts['updated']} محدثة، "
+        f"{counts['unchanged']} بدون تغيير، {counts['changes']} تغيير مسجل، {counts['merged']} مكررة مدمجة"
+    )
+    return counts
+
+def get_scholarships_from_db(major=None, country=None, limit=None):
+    """جلب المنح من قاعدة البيانات كسجلات Scholarship (limit = None: الكل)"""
+    match = search_index.build_match(country=country, major=major)
+    # LIMIT -1 في SQLite = بدون حد
+    limit = -1 if limit is None else limit
+
+    if match:
+        return db.fetchall(f'''
+            SELECT {scholarship_record.select_columns(alias='s')} FROM {search_index.FTS_TABLE} f
+            JOIN scholarships s ON s.id = f.rowid
+            WHERE {search_index.FTS_TABLE} MATCH ?
+            ORDER BY {search_index.RANK_EXPR}
+            LIMIT ?
+        ''', (match, limit), row_factory=scholarship_record.row_factory)
+
+    return db.fetchall(
+        f'SELECT {scholarship_record.select_columns()} FROM scholarships ORDER BY last_updated DESC LIMIT ?',
+        (limit,), row_factory=scholarship_record.row_factory
+    )
 
 # ============================================
 # 🆕 دوال النصائح الذكية
@@ -1913,11 +693,7 @@ async def smart_tips(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """نصائح ذكية بناءً على الملف الشخصي"""
     user_id = update.effective_user.id
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT major, target_country FROM users WHERE user_id = ?', (user_id,))
-    user_data = cursor.fetchone()
-    conn.close()
+    user_data = await db.afetchone('SELECT major, target_country FROM users WHERE user_id = ?', (user_id,))
 
     if not user_data or not user_data[0]:
         text = "❗ لم تقم بتحديث ملفك الشخصي بعد!\n\nاضغط على \"📝 ملفي الشخصي\" لإضافة تخصصك ودولتك المفضلة."
@@ -1971,64 +747,43 @@ async def smart_tips(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # 🆕 Background Jobs
 # ============================================
 
-async def auto_update_scholarships(context: ContextTypes.DEFAULT_TYPE):
-    """تحديث المنح تلقائياً كل ساعة في الخلفية - موسّع جداً"""
-    logger.info("🔄 جاري تحديث المنح التلقائي الموسع...")
-
-    try:
-        all_scholarships = []
-        
-        # 1. المنح الحكومية الرسمية
-        gov_scholarships = search_government_sites(None)
-        all_scholarships.extend(gov_scholarships)
-        
-        # 2. المنح الأوروبية
-        european = search_european_scholarships()
-        all_scholarships.extend(european)
-        
-        # 3. المنح الآسيوية
-        asian = search_asian_scholarships()
-        all_scholarships.extend(asian)
-        
-        # 4. منح الكومنولث
-        commonwealth = search_commonwealth_scholarships()
-        all_scholarships.extend(commonwealth)
-        
-        # 5. منح أمريكا الشمالية
-        north_american = search_north_american_scholarships()
-        all_scholarships.extend(north_american)
-        
-        # 6. منح الشرق الأوسط
-        middle_east = search_middle_east_scholarships()
-        all_scholarships.extend(middle_east)
-        
-        # 7. منح المنظمات الدولية
-        international = search_international_organizations()
-        all_scholarships.extend(international)
-        
-        # 8. منح الجامعات المرموقة
-        universities = search_university_specific_scholarships()
-        all_scholarships.extend(universities)
-        
-        # 9. المواقع الأمريكية
-        additional = search_fastweb()
-        additional.extend(search_scholarships_com())
-        additional.extend(search_bigfuture())
-        all_scholarships.extend(additional)
-        
-        # حفظ كل المنح في قاعدة البيانات
-        save_scholarships_to_db(all_scholarships)
-        
-        logger.info(f"✅ تم تحديث {len(all_scholarships)} منحة من جميع أنحاء العالم!")
-        
-    except Exception as e:
-        logger.error(f"❌ خطأ في التحديث التلقائي: {e}")
-
+@background_jobs.job('deadline_roll')
+async def roll_deadlines_forward(context: ContextTypes.DEFAULT_TYPE):
+    """ترحيل المواعيد السنوية التي مرت إلى السنة التالية - يومياً"""
+    await db.run_write(deadlines.roll_forward)
+
+@background_jobs.job('stats_reconcile')
+async def reconcile_stats_counters(context: ContextTypes.DEFAULT_TYPE):
+    """تصحيح انحراف عدادات الإحصائيات عن الجداول الأصلية"""
+    drift = await db.run_write(stats_counters.reconcile)
+    if not drift:
+        logger.info("🧮 عدادات الإحصائيات مطابقة")
+
+@background_jobs.job('search_compaction')
+async def compact_search_history(context: ContextTypes.DEFAULT_TYPE):
+    """تجميع سجل البحث يومياً ثم حذف الخام القديم على دفعات وضغط الملف"""
+    days = await db.run_write(search_retention.rollup)
+    cutoff = await db.run_read(search_retention.prune_cutoff)
+
+    deleted = 0
+    while cutoff:
+        # كل دفعة معاملة قصيرة مستقلة حتى تتخللها كتابات البوت العادية
+        count = await db.run_write(search_retention.delete_batch, cutoff)
+        deleted += count
+        if count < search_retention.DELETE_BATCH:
+            break
+        await asyncio.sleep(0)
+
+    pages = await db.run_write(search_retention.compact)
+    logger.info(f"🗃️ سجل البحث: تجميع {days} يوم، حذف {deleted} صف، استعادة {pages} صفحة")
+
+@background_jobs.job('reminders')
 async def send_pending_reminders(context: ContextTypes.DEFAULT_TYPE):
     """إرسال التذكيرات المستحقة"""
-    reminders = get_pending_reminders()
+    reminders = await db.run_read(get_pending_reminders)
     
-    for reminder in reminders:
+    for i, reminder in enumerate(reminders):
+        background_jobs.progress('إرسال التذكيرات', i, len(reminders))
         user_id = reminder[1]
         message = reminder[4]
         
@@ -2037,22 +792,20 @@ async def send_pending_reminders(context: ContextTypes.DEFAULT_TYPE):
                 chat_id=user_id,
                 text=f"🔔 {message}\n\n📅 الموعد النهائي: {reminder[6]}"
             )
-            mark_reminder_sent(reminder[0])
+            await db.run_write(mark_reminder_sent, reminder[0])
             logger.info(f"✅ تم إرسال تذكير للمستخدم {user_id}")
         except Exception as e:
             logger.error(f"❌ خطأ في إرسال التذكير: {e}")
 
+@background_jobs.job('weekly_digest')
 async def send_weekly_digest(context: ContextTypes.DEFAULT_TYPE):
     """إرسال ملخص أسبوعي للمشتركين"""
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT user_id, major, target_country FROM users WHERE weekly_digest = 1')
-    subscribers = cursor.fetchall()
-    conn.close()
+    subscribers = await db.afetchall('SELECT user_id, major, target_country FROM users WHERE weekly_digest = 1')
     
-    for user_id, major, country in subscribers:
+    for i, (user_id, major, country) in enumerate(subscribers):
+        background_jobs.progress('إرسال الملخص', i, len(subscribers))
         try:
-            scholarships = advanced_search_db(
+            scholarships = await db.run_read(advanced_search_db,
                 major=major, 
                 country=country, 
                 funding_type='full',
@@ -2064,10 +817,10 @@ async def send_weekly_digest(context: ContextTypes.DEFAULT_TYPE):
                 text += f"أفضل {len(scholarships[:5])} منح تناسبك:\n\n"
                 
                 for i, sch in enumerate(scholarships[:5], 1):
-                    text += f"{i}. 📚 {sch[1]}\n"
-                    text += f"🌍 {sch[2]}\n"
-                    text += f"💰 {sch[7]}\n"
-                    text += f"🔗 {sch[6]}\n\n"
+                    text += f"{i}. 📚 {sch.name}\n"
+                    text += f"🌍 {sch.country}\n"
+                    text += f"💰 {sch.funding_type}\n"
+                    text += f"🔗 {sch.link}\n\n"
                 
                 await context.bot.send_message(chat_id=user_id, text=text)
                 logger.info(f"✅ تم إرسال الملخص الأسبوعي للمستخدم {user_id}")
@@ -2081,21 +834,17 @@ async def send_weekly_digest(context: ContextTypes.DEFAULT_TYPE):
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
 
-    if is_user_blocked(user.id):
+    if await db.run_read(is_user_blocked, user.id):
         await update.message.reply_text(
             "⛔ عذراً، تم حظرك من استخدام هذا البوت.\n\n"
             "للاستفسار، تواصل مع المطور: @SS_GG_X1"
         )
         return
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    await db.aexecute('''
         INSERT OR IGNORE INTO users (user_id, username, full_name, join_date)
         VALUES (?, ?, ?, ?)
     ''', (user.id, user.username, user.full_name, datetime.now().strftime('%Y-%m-%d')))
-    conn.commit()
-    conn.close()
     keyboard = get_main_menu()
 
     if is_admin(user):
@@ -2184,29 +933,11 @@ async def mega_search_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     try:
         # جلب جميع المنح من قاعدة البيانات
-        conn = sqlite3.connect('scholarship_bot.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM scholarships 
-            WHERE funding_type LIKE '%ممولة بالكامل%' 
+        scholarships = await db.afetchall(f'''
+            SELECT {scholarship_record.select_columns()} FROM scholarships 
+            WHERE funding_code = ? 
             ORDER BY last_updated DESC
-        ''')
-        results = cursor.fetchall()
-        conn.close()
-        
-        scholarships = []
-        for row in results:
-            scholarships.append({
-                'id': row[0],
-                'name': row[1],
-                'country': row[2],
-                'major': row[3],
-                'deadline': row[4],
-                'link': row[6],
-                'description': row[7],
-                'funding_type': row[8],
-                'degree_level': row[9]
-            })
+        ''', (scholarship_codes.FUNDING_FULL,), row_factory=scholarship_record.row_factory)
         
         # تجميع المنح حسب المنطقة
         text = f"""🚀 نتائج البحث الموسع الشامل
@@ -2310,6 +1041,31 @@ async def smart_search_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
         reply_markup=reply_markup
     )
 
+async def search_all_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """🔄 البحث في جميع المنح: القوائم + المصادر الحية، مع تحديث التقدم عند انتهاء كل مصدر"""
+    country = context.user_data.get('selected_country')
+    major = context.user_data.get('selected_major')
+
+    await update.callback_query.edit_message_text("🔄 جاري البحث في جميع المصادر...")
+    save_search_history(update.effective_user.id, f"{country or ''}/{major or ''}", 'all')
+
+    scholarships = []
+    sources = 0
+    async for source, results in stream_scholarships_online(country, major):
+        scholarships.extend(results)
+        sources += 1
+        try:
+            await update.callback_query.edit_message_text(
+                f"🔄 جاري البحث في جميع المصادر...\n\n"
+                f"✅ {sources} مصدر | {len(scholarships)} منحة حتى الآن"
+            )
+        except Exception as e:
+            logger.debug(f"تعذر تحديث رسالة التقدم: {e}")
+
+    # الحفظ (لتسجيل مصدر كل نسخة) تم مع الجلب؛ نعرض بدون المكرر
+    await display_scholarships(update, context, scholarship_dedup.collapse(scholarships),
+                               "نتائج البحث في جميع المنح")
+
 async def advanced_search_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """بدء البحث الدقيق المتقدم"""
     text = """🎯 البحث الدقيق المتقدم
@@ -2386,21 +1142,8 @@ async def advanced_search_execute(update: Update, context: ContextTypes.DEFAULT_
         f"{'• كلمة مفتاحية: ' + keyword if keyword else ''}"
     )
 
-    results = advanced_search_db(degree, funding, keyword)
-
-    scholarships = []
-    for row in results:
-        scholarships.append({
-            'id': row[0],
-            'name': row[1],
-            'country': row[2],
-            'major': row[3],
-            'deadline': row[4],
-            'link': row[6],
-            'description': row[7],
-            'funding_type': row[8],
-            'degree_level': row[9]
-        })
+    save_search_history(update.effective_user.id, keyword or f'{degree}/{funding}', 'advanced')
+    scholarships = await db.run_read(advanced_search_db, degree, funding, keyword)
 
     await display_scholarships(update, context, scholarships, "نتائج البحث الدقيق")
 
@@ -2454,21 +1197,8 @@ async def handle_country_selection(update: Update, context: ContextTypes.DEFAULT
         f"🔄 جاري جلب المنح من قاعدة البيانات..."
     )
 
-    results = get_scholarships_from_db(country=country_name)
-
-    scholarships = []
-    for row in results:
-        scholarships.append({
-            'id': row[0],
-            'name': row[1],
-            'country': row[2],
-            'major': row[3],
-            'deadline': row[4],
-            'link': row[6],
-            'description': row[7],
-            'funding_type': row[8],
-            'degree_level': row[9]
-        })
+    save_search_history(update.effective_user.id, country_name, 'country')
+    scholarships = await db.run_read(get_scholarships_from_db, country=country_name)
 
     await display_scholarships(update, context, scholarships, f"منح {country_name}")
 
@@ -2482,21 +1212,8 @@ async def handle_major_selection(update: Update, context: ContextTypes.DEFAULT_T
         f"🔄 جاري جلب منح {major_name} من قاعدة البيانات..."
     )
 
-    results = get_scholarships_from_db(major=major_name)
-
-    scholarships = []
-    for row in results:
-        scholarships.append({
-            'id': row[0],
-            'name': row[1],
-            'country': row[2],
-            'major': row[3],
-            'deadline': row[4],
-            'link': row[6],
-            'description': row[7],
-            'funding_type': row[8],
-            'degree_level': row[9]
-        })
+    save_search_history(update.effective_user.id, major_name, 'major')
+    scholarships = await db.run_read(get_scholarships_from_db, major=major_name)
 
     await display_scholarships(update, context, scholarships, f"منح {major_name}")
 
@@ -2559,21 +1276,7 @@ async def show_featured_scholarships(update: Update, context: ContextTypes.DEFAU
         "🔄 جاري جلب أفضل المنح الممولة بالكامل من قاعدة البيانات..."
     )
 
-    results = get_scholarships_from_db()
-
-    scholarships = []
-    for row in results[:20]:
-        scholarships.append({
-            'id': row[0],
-            'name': row[1],
-            'country': row[2],
-            'major': row[3],
-            'deadline': row[4],
-            'link': row[6],
-            'description': row[7],
-            'funding_type': row[8],
-            'degree_level': row[9]
-        })
+    scholarships = await db.run_read(get_scholarships_from_db, limit=20)
 
     await display_scholarships(update, context, scholarships, "المنح المميزة الممولة بالكامل")
 
@@ -2584,7 +1287,7 @@ async def show_featured_scholarships(update: Update, context: ContextTypes.DEFAU
 async def show_favorites(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """عرض المنح المفضلة"""
     user_id = update.effective_user.id
-    favorites = get_favorites(user_id)
+    favorites = await db.run_read(get_favorites, user_id)
 
     if not favorites:
         text = "💔 لم تقم بحفظ أي منح بعد!\n\nابحث عن منح واضغط على زر \"💾 حفظ\" لإضافتها للمفضلة."
@@ -2622,7 +1325,7 @@ async def show_favorites(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def show_tracked_scholarships(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """عرض المنح المتتبعة بالإشعارات"""
     user_id = update.effective_user.id
-    tracked = get_tracked_scholarships(user_id)
+    tracked = await db.run_read(get_tracked_scholarships, user_id)
 
     if not tracked:
         text = "🔕 لا توجد منح متتبعة حالياً!\n\nاحفظ منح في المفضلة ليتم تتبعها تلقائياً."
@@ -2652,18 +1355,14 @@ async def save_favorite(update: Update, context: ContextTypes.DEFAULT_TYPE):
     scholarship_id = int(update.callback_query.data.replace('save_fav_', ''))
     user_id = update.effective_user.id
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT name, link FROM scholarships WHERE id = ?', (scholarship_id,))
-    scholarship = cursor.fetchone()
-    conn.close()
+    scholarship = await db.afetchone('SELECT name, link FROM scholarships WHERE id = ?', (scholarship_id,))
 
     if scholarship:
         # حفظ في المفضلة
-        success = save_to_favorites(user_id, scholarship_id, scholarship[0], scholarship[1])
+        success = await db.run_write(save_to_favorites, user_id, scholarship_id, scholarship[0], scholarship[1])
         
-        # تفعيل التتبع التلقائي
-        track_success = track_scholarship(user_id, scholarship_id, scholarship[0])
+        # تفعيل التتبع التلقائي (كتابة فورية: الرسالة تؤكد التفعيل وقائمة المتتبعة تُفتح بعدها)
+        track_success = await db.run_write(track_scholarship, user_id, scholarship_id, scholarship[0])
         
         if success and track_success:
             await update.callback_query.answer(
@@ -2688,11 +1387,7 @@ async def save_favorite(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    user = await db.afetchone('SELECT * FROM users WHERE user_id = ?', (user_id,))
 
     if user:
         text = f"""👤 ملفك الشخصي:
@@ -2717,15 +1412,11 @@ async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
 
 async def show_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    reminders = await db.afetchall('''
         SELECT * FROM reminders 
         WHERE user_id = ? AND is_sent = 0
         ORDER BY reminder_date
     ''', (update.effective_user.id,))
-    reminders = cursor.fetchall()
-    conn.close()
 
     if reminders:
         text = "🔔 تنبيهاتك القادمة:\n\n"
@@ -2815,7 +1506,7 @@ async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.callback_query.answer("⛔ غير مصرح لك!", show_alert=True)
         return
 
-    stats = get_user_stats()
+    stats = await db.run_read(get_user_stats)
 
     text = f"""👑 لوحة تحكم الأدمن
 
@@ -2831,6 +1522,7 @@ async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     keyboard = [
         [InlineKeyboardButton("📊 إحصائيات تفصيلية", callback_data='admin_stats')],
+        [InlineKeyboardButton("🩺 صحة المصادر", callback_data='admin_scrapers')],
         [InlineKeyboardButton("📩 الرسائل الواردة", callback_data='admin_messages')],
         [InlineKeyboardButton("📢 إرسال رسالة جماعية", callback_data='admin_broadcast')],
         [InlineKeyboardButton("👥 قائمة المستخدمين", callback_data='admin_users')]
@@ -2847,21 +1539,28 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.callback_query.answer("⛔ غير مصرح لك!", show_alert=True)
         return
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
+    week_users = await db.run_read(stats_counters.get_joins_since, 7)
 
-    cursor.execute('SELECT COUNT(*) FROM users WHERE join_date >= date("now", "-7 days")')
-    week_users = cursor.fetchone()[0]
+    month_users = await db.run_read(stats_counters.get_joins_since, 30)
 
-    cursor.execute('SELECT COUNT(*) FROM users WHERE join_date >= date("now", "-30 days")')
-    month_users = cursor.fetchone()[0]
+    active_users = await db.run_read(search_retention.active_users, 7)
 
-    cursor.execute('SELECT COUNT(DISTINCT user_id) FROM search_history WHERE search_date >= date("now", "-7 days")')
-    active_users = cursor.fetchone()[0]
+    searches_by_type = await db.run_read(search_retention.searches_by_type, 7)
 
-    conn.close()
+    top_queries = await db.run_read(search_retention.top_queries, 7, 3)
 
-    stats = get_user_stats()
+    stats = await db.run_read(get_user_stats)
+    db_stats = db.get_db_stats()
+    buffer_stats = write_buffer.get_stats()
+    http_stats = client.get_pool_stats()
+    cache_stats = http_cache.get_stats()
+    search_stats = search_cache.get_stats()
+    breakers = limits.get_breaker_states()
+    source_rows = await db.run_read(source_runs.get_runs)
+    job_rows = await db.run_read(background_jobs.get_last_runs)
+    active_jobs = background_jobs.get_active()
+    skipped_jobs = background_jobs.get_skipped()
+    startup_mode, ready_ms, startup_phases = startup.get_phases()
 
     text = f"""📊 إحصائيات تفصيلية
 
@@ -2873,6 +1572,12 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • آخر 30 يوم: {month_users}
 • نشطين هذا الأسبوع: {active_users}
 
+🔎 البحث (آخر 7 أيام):
+━━━━━━━━━━━━━━
+• عدد عمليات البحث: {sum(searches_by_type.values())}
+{chr(10).join(f"• {search_type}: {count}" for search_type, count in searches_by_type.items()) or '• لا يوجد'}
+• الأكثر بحثاً: {'، '.join(query for query, _ in top_queries) or 'لا يوجد'}
+
 🎓 المنح:
 ━━━━━━━━━━━━━━
 • عدد المنح: {stats['total_scholarships']}
@@ -2888,7 +1593,92 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 🚫 المحظورين:
 ━━━━━━━━━━━━━━
-• العدد: {stats['blocked_users']}"""
+• العدد: {stats['blocked_users']}
+
+🗄️ قاعدة البيانات:
+━━━━━━━━━━━━━━
+• اتصالات مفتوحة: {db_stats['open_connections']}
+• عدد الاستعلامات: {db_stats['calls']}
+• متوسط الزمن: {db_stats['avg_ms']:.2f}ms
+• أقصى زمن: {db_stats['max_ms']:.1f}ms
+• استعلامات بطيئة: {db_stats['slow_calls']}
+• كتابات في الطابور: {db.get_write_queue_depth()}
+• كتابات مؤجلة: {write_buffer.get_queue_depth()} (تم كتابة {buffer_stats['flushed']} في {buffer_stats['flushes']} دفعة)
+
+🌐 اتصالات المصادر:
+━━━━━━━━━━━━━━
+{chr(10).join(f"• {host}: {s['requests']} طلب، {s['connections']} اتصال، {s['reused']} إعادة استخدام" for host, s in http_stats.items()) or '• لا يوجد بعد'}
+• كاش الصفحات: {cache_stats['hits']} hit ({cache_stats['not_modified']} 304) / {cache_stats['misses']} miss
+• حجم الكاش: {cache_stats['entries']} صفحة، {cache_stats['bytes'] / 1024:.0f}KB
+• كاش البحث: {search_stats['hit_ratio']:.0%} hit ({search_stats['hits']} طازج، {search_stats['stale_hits']} قديم، {search_stats['coalesced']} مدمج) / {search_stats['misses']} جلب
+• حجم كاش البحث: {search_stats['entries']} بحث، {search_stats['bytes'] / 1024:.0f}KB | تحديث بالخلفية: {search_stats['refreshes']} | محذوف: {search_stats['evicted']}
+
+🚦 حالة المصادر:
+━━━━━━━━━━━━━━
+{chr(10).join(
+    f"• {host}: {limits.STATE_LABELS[b['state']]} | فشل متتالي: {b['failures']} | مرات الإيقاف: {b['trips']}"
+    + (f" | إعادة المحاولة بعد {b['retry_in']:.0f}s" if b['retry_in'] else '')
+    for host, b in breakers.items()
+) or '• لا يوجد بعد'}
+
+🗓️ جدولة المصادر:
+━━━━━━━━━━━━━━
+{chr(10).join(
+    f"• {source}: آخر نجاح {last_success or 'لم ينجح بعد'} | {duration_ms}ms | {items} منحة | فشل {failures}/{runs}"
+    + (f" | ⚠️ {last_error}" if last_error else '')
+    for source, last_success, duration_ms, items, last_error, runs, failures in source_rows
+) or '• لا يوجد بعد'}
+
+⚙️ المهام الخلفية:
+━━━━━━━━━━━━━━
+{chr(10).join(
+    f"• ▶️ {name}: {stage}" + (f" ({done}/{total})" if total else '') + f" منذ {elapsed:.0f}s"
+    for name, stage, done, total, elapsed in active_jobs
+) or '• لا توجد مهمة تعمل الآن'}
+{chr(10).join(
+    f"• {name}: {started_at} | {duration_ms}ms ({status}) | متوسط {avg_ms:.0f}ms من {runs} تشغيل"
+    + (f" | تخطي {skipped_jobs[name]}" if skipped_jobs.get(name) else '')
+    for name, started_at, duration_ms, status, avg_ms, runs in job_rows
+)}
+
+🚀 آخر بدء تشغيل ({startup_mode}):
+━━━━━━━━━━━━━━
+• جاهز بعد: {f"{ready_ms:.0f}ms" if ready_ms is not None else 'لم يكتمل'}
+{chr(10).join(f"• {name}: {ms:.0f}ms" for name, ms in startup_phases)}"""
+
+    keyboard = []
+    add_navigation_row(keyboard)
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
+
+async def admin_scraper_health(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+
+    if not is_admin(user):
+        await update.callback_query.answer("⛔ غير مصرح لك!", show_alert=True)
+        return
+
+    sources = await db.run_read(health.summary, 24)
+
+    def ms(value):
+        return f"{value}ms" if value is not None else '-'
+
+    text = "🩺 صحة المصادر (آخر 24 ساعة)\n"
+    for source, s in sources.items():
+        text += f"""
+📡 {source}
+━━━━━━━━━━━━━━
+• الطلبات: {s['requests']} | النجاح: {s['success_rate']:.0%}
+• الجلب: p50 {ms(s['fetch_p50'])} | p95 {ms(s['fetch_p95'])}
+• التحليل: p50 {ms(s['parse_p50'])} | p95 {ms(s['parse_p95'])}
+• متوسط المنح: {s['avg_items']:.1f} | بدون منح: {s['empty']}
+"""
+        if s['errors']:
+            text += f"• الأخطاء: {'، '.join(f'{error}×{count}' for error, count in s['errors'].items())}\n"
+
+    if not sources:
+        text += "\n• لا توجد طلبات مسجلة بعد"
 
     keyboard = []
     add_navigation_row(keyboard)
@@ -2903,7 +1693,7 @@ async def admin_messages(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.callback_query.answer("⛔ غير مصرح لك!", show_alert=True)
         return
 
-    messages = get_admin_messages()
+    messages = await db.run_read(get_admin_messages)
 
     if not messages:
         text = "📩 لا توجد رسائل جديدة"
@@ -2936,14 +1726,10 @@ async def admin_read_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     msg_id = int(update.callback_query.data.replace('read_msg_', ''))
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM admin_messages WHERE id = ?', (msg_id,))
-    message = cursor.fetchone()
-    conn.close()
+    message = await db.afetchone('SELECT * FROM admin_messages WHERE id = ?', (msg_id,))
 
     if message:
-        mark_message_as_read(msg_id)
+        await db.run_write(mark_message_as_read, msg_id)
 
         text = f"""📩 رسالة من:
 
@@ -2979,11 +1765,7 @@ async def admin_reply_to_user_start(update: Update, context: ContextTypes.DEFAUL
     context.user_data['replying_to_user_id'] = target_user_id
     context.user_data['replying_to_message_id'] = message_id
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM admin_messages WHERE id = ?', (message_id,))
-    original_message = cursor.fetchone()
-    conn.close()
+    original_message = await db.afetchone('SELECT * FROM admin_messages WHERE id = ?', (message_id,))
 
     if original_message:
         text = f"""↩️ الرد على رسالة:
@@ -3039,7 +1821,7 @@ async def admin_send_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         message_id = context.user_data.get('replying_to_message_id')
         if message_id:
-            save_admin_reply(message_id, admin_reply)
+            await db.run_write(save_admin_reply, message_id, admin_reply)
         
         logger.info(f"✅ تم إرسال رد الأدمن إلى المستخدم {target_user_id}")
         
@@ -3079,11 +1861,7 @@ async def admin_users_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.callback_query.answer("⛔ غير مصرح لك!", show_alert=True)
         return
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users ORDER BY join_date DESC LIMIT 10')
-    users = cursor.fetchall()
-    conn.close()
+    users = await db.afetchall('SELECT * FROM users ORDER BY join_date DESC LIMIT 10')
 
     text = "👥 آخر 10 مستخدمين:\n\n"
 
@@ -3108,7 +1886,7 @@ async def admin_block_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     user_id = int(update.callback_query.data.replace('block_user_', ''))
-    block_user(user_id, "تم الحظر من قبل الأدمن")
+    await db.run_write(block_user, user_id, "تم الحظر من قبل الأدمن")
 
     await update.callback_query.answer("✅ تم حظر المستخدم", show_alert=True)
     await admin_users_list(update, context)
@@ -3121,7 +1899,7 @@ async def admin_unblock_user(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
 
     user_id = int(update.callback_query.data.replace('unblock_user_', ''))
-    unblock_user(user_id)
+    await db.run_write(unblock_user, user_id)
 
     await update.callback_query.answer("✅ تم إلغاء الحظر", show_alert=True)
     await admin_users_list(update, context)
@@ -3174,11 +1952,7 @@ async def send_broadcast_message(update: Update, context: ContextTypes.DEFAULT_T
     """إرسال رسالة جماعية"""
     broadcast_text = update.message.text
     
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT user_id FROM users')
-    users = cursor.fetchall()
-    conn.close()
+    users = await db.afetchall('SELECT user_id FROM users')
     
     success_count = 0
     fail_count = 0
@@ -3211,6 +1985,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     handlers = {
         'smart_search': smart_search_start,
+        'search_all': search_all_handler,
         'mega_search': mega_search_handler,
         'show_all_mega': show_all_mega_results,
         'advanced_search': advanced_search_start,
@@ -3228,6 +2003,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         'contact_developer': contact_developer,
         'admin_panel': admin_panel,
         'admin_stats': admin_stats,
+        'admin_scrapers': admin_scraper_health,
         'admin_messages': admin_messages,
         'admin_broadcast': admin_broadcast_start,
         'admin_users': admin_users_list,
@@ -3277,15 +2053,22 @@ async def setup_commands(application):
     ]
     await application.bot.set_my_commands(commands)
 
+async def set_commands_job(context: ContextTypes.DEFAULT_TYPE):
+    await setup_commands(context.application)
+
+async def on_startup(application):
+    """بعد الاتصال بتيليجرام: البوت جاهز للرد، وقائمة الأوامر لا تؤخره في وضع warm"""
+    startup.ready()
+    if startup.is_warm():
+        application.job_queue.run_once(set_commands_job, 0)
+    else:
+        await setup_commands(application)
+
 async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """معالج أمر /profile"""
     user_id = update.effective_user.id
 
-    conn = sqlite3.connect('scholarship_bot.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    user = await db.afetchone('SELECT * FROM users WHERE user_id = ?', (user_id,))
 
     if user:
         text = f"""👤 ملفك الشخصي:
@@ -3311,75 +2094,52 @@ def main():
     print("🚀 جاري تشغيل البوت...")
     logger.info("🚀 بدء تشغيل البوت")
     
-    init_db()
+    startup.begin()
 
-    print("📊 إعداد قاعدة البيانات...")
+    with startup.phase('قاعدة البيانات'):
+        init_db()
+        migrations.migrate()
 
-    print("🌐 جاري تحديث المنح الموسعة من جميع أنحاء العالم...")
-    
-    # تحديث شامل من جميع المصادر
-    all_scholarships = []
-    
-    # المنح الحكومية
-    gov_scholarships = search_government_sites(None)
-    all_scholarships.extend(gov_scholarships)
-    
-    # المنح الأوروبية
-    european = search_european_scholarships()
-    all_scholarships.extend(european)
-    
-    # المنح الآسيوية
-    asian = search_asian_scholarships()
-    all_scholarships.extend(asian)
-    
-    # منح الكومنولث
-    commonwealth = search_commonwealth_scholarships()
-    all_scholarships.extend(commonwealth)
-    
-    # منح أمريكا الشمالية
-    north_american = search_north_american_scholarships()
-    all_scholarships.extend(north_american)
-    
-    # منح الشرق الأوسط
-    middle_east = search_middle_east_scholarships()
-    all_scholarships.extend(middle_east)
-    
-    # منح المنظمات الدولية
-    international = search_international_organizations()
-    all_scholarships.extend(international)
-    
-    # منح الجامعات المرموقة
-    universities = search_university_specific_scholarships()
-    all_scholarships.extend(universities)
-    
-    # حفظ كل شيء
-    save_scholarships_to_db(all_scholarships)
-    
-    print(f"✅ تم تحديث {len(all_scholarships)} منحة ممولة بالكامل من جميع أنحاء العالم!")
-    logger.info(f"✅ تم تحديث {len(all_scholarships)} منحة")
-
-    application = Application.builder().token(TOKEN).build()
-    from feature_loader import load_all_features
-    load_all_features(application)
-
-    from features.dream_search import register as register_dream
-    register_dream(application)
-
-    application.post_init = setup_commands
-
-
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("restart", restart_bot))
-    application.add_handler(CommandHandler("help", show_help))
-    application.add_handler(CommandHandler("profile", profile_command))
-    application.add_handler(CallbackQueryHandler(button_handler))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_user_message))
+    print("📊 إعداد قاعدة البيانات...")
 
-    job_queue = application.job_queue
-    job_queue.run_repeating(auto_update_scholarships, interval=3600, first=10)  # كل ساعة
-    job_queue.run_repeating(send_pending_reminders, interval=3600, first=60)  # كل ساعة
-    job_queue.run_repeating(send_scholarship_notifications, interval=21600, first=120)  # كل 6 ساعات
-    job_queue.run_daily(send_weekly_digest, time=datetime.strptime("09:00", "%H:%M").time())  # كل يوم 9 صباحاً
+    with startup.phase('تحميل الكتالوج'):
+        catalog = scholarship_catalog.load()
+
+    # warm: البوت يرد فوراً من القاعدة المحفوظة، والمزامنة في الخلفية (scrapers.scheduler)
+    if not startup.is_warm() or not scholarship_catalog.is_synced():
+        print("🌐 جاري تحديث المنح الموسعة من جميع أنحاء العالم...")
+        with startup.phase('مزامنة الكتالوج'):
+            scholarship_catalog.sync()
+
+    print(f"✅ الكتالوج جاهز: {len(catalog)} منحة ممولة بالكامل من جميع أنحاء العالم!")
+    logger.info(f"✅ الكتالوج: {len(catalog)} منحة")
+
+    with startup.phase('بناء التطبيق'):
+        application = Application.builder().token(TOKEN).build()
+        from feature_loader import load_all_features
+        load_all_features(application)
+
+        from features.dream_search import register as register_dream
+        register_dream(application)
+
+        application.post_init = on_startup
+
+        application.add_handler(CommandHandler("start", start))
+        application.add_handler(CommandHandler("restart", restart_bot))
+        application.add_handler(CommandHandler("help", show_help))
+        application.add_handler(CommandHandler("profile", profile_command))
+        application.add_handler(CallbackQueryHandler(button_handler))
+        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_user_message))
+
+    with startup.phase('جدولة المهام'):
+        job_queue = application.job_queue
+        scheduler.schedule(job_queue)  # كل مصدر حسب فترته
+        job_queue.run_repeating(send_pending_reminders, interval=3600, first=60)  # كل ساعة
+        job_queue.run_repeating(send_scholarship_notifications, interval=21600, first=120)  # كل 6 ساعات
+        job_queue.run_daily(send_weekly_digest, time=datetime.strptime("09:00", "%H:%M").time())  # كل يوم 9 صباحاً
+        job_queue.run_daily(reconcile_stats_counters, time=datetime.strptime("04:00", "%H:%M").time())  # كل يوم 4 فجراً
+        job_queue.run_daily(compact_search_history, time=datetime.strptime("03:30", "%H:%M").time())  # كل يوم 3:30 فجراً
+        job_queue.run_daily(roll_deadlines_forward, time=datetime.strptime("00:05", "%H:%M").time())  # كل يوم بعد منتصف الليل
 
     print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     print("🤖 البوت الذكي يعمل الآن...")
@@ -3438,5 +2198,11 @@ def main():
         logger.info("🔄 Starting in POLLING mode (local development)")
         application.run_polling()
 
+    write_buffer.shutdown()
+    db.shutdown()
+    fetch.shutdown()
+    client.close()
+    http_cache.close()
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,232 @@
+import os
+import time
+import socket
+import asyncio
+import logging
+import functools
+import contextvars
+from collections import Counter
+from datetime import datetime
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# ⚙️ تشغيل المهام الخلفية (single-flight + قياس)
+# ============================================
+#
+# كل مهمة خلفية تعمل مرة واحدة في نفس الوقت: داخل العملية بقائمة المهام النشطة،
+# وبين العمليات (نسختان من البوت أو تشغيل يدوي) بـ lease في job_leases له مدة
+# صلاحية ويُجدد أثناء التشغيل، فلو ماتت العملية يتحرر تلقائياً بعد انتهاء مدته.
+# الطلب أثناء التشغيل يُتخطى، أو يُدمج في تشغيل واحد بعده (coalesce).
+# زمن كل تشغيل ونتيجته تُكتب في job_metrics، والتقدم الحالي يظهر في لوحة الأدمن.
+
+LEASE_TTL = 3600
+METRICS_KEEP = 500      # آخر N تشغيل لكل مهمة
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_active = {}            # {name: {'started', 'stage', 'done', 'total'}}
+_pending = set()        # مهام طُلبت أثناء تشغيلها (coalesce)
+_skipped = Counter()
+
+# اسم المهمة الحالية حتى تستدعي progress() بدون تمريره
+_current = contextvars.ContextVar('background_job', default=None)
+
+
+def create_schema(conn):
+    """جداول الـ lease وسجل التشغيل (ترحيل)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            duration_ms INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            items INTEGER,
+            error TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_metrics_name ON job_metrics(name, id)')
+
+
+class JobRun:
+    __slots__ = ('name', 'started', 'finished', 'duration_ms', 'status', 'items', 'error')
+
+    def __init__(self, name, started, finished, duration_ms, status, items=None, error=None):
+        self.name = name
+        self.started = started
+        self.finished = finished
+        self.duration_ms = duration_ms
+        self.status = status        # ok | error | timeout
+        self.items = items
+        self.error = error
+
+    def __repr__(self):
+        return f"JobRun({self.name!r}, {self.status}, {self.duration_ms}ms)"
+
+# ============================================
+# 🔒 الـ lease (على الـ thread الكاتب)
+# ============================================
+
+def acquire(name, ttl=LEASE_TTL):
+    """أخذ الـ lease لو كان حراً أو منتهياً أو لنفس العملية"""
+    now = time.time()
+    cursor = db.execute('''
+        INSERT INTO job_leases (name, owner, expires_at) VALUES (?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+        WHERE job_leases.expires_at < ? OR job_leases.owner = excluded.owner
+    ''', (name, OWNER, now + ttl, now))
+    return cursor.rowcount > 0
+
+
+def renew(name, ttl=LEASE_TTL):
+    db.execute('UPDATE job_leases SET expires_at = ? WHERE name = ? AND owner = ?',
+               (time.time() + ttl, name, OWNER))
+
+
+def release(name):
+    db.execute('DELETE FROM job_leases WHERE name = ? AND owner = ?', (name, OWNER))
+
+
+def record(run):
+    """إضافة تشغيل لـ job_metrics مع الإبقاء على آخر METRICS_KEEP فقط"""
+    with db.transaction() as conn:
+        conn.execute('''
+            INSERT INTO job_metrics (name, started_at, duration_ms, status, items, error)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (run.name, run.started, run.duration_ms, run.status, run.items, run.error))
+        conn.execute('''
+            DELETE FROM job_metrics WHERE name = ? AND id <= (
+                SELECT id FROM job_metrics WHERE name = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+            )
+        ''', (run.name, run.name, METRICS_KEEP))
+
+# ============================================
+# ▶️ التشغيل
+# ============================================
+
+def progress(stage, done=None, total=None):
+    """تحديث تقدم المهمة الحالية (يظهر في لوحة الأدمن)"""
+    state = _active.get(_current.get())
+    if state is not None:
+        state.update(stage=stage, done=done, total=total)
+
+
+async def _keep_lease(name, ttl):
+    while True:
+        await asyncio.sleep(ttl / 2)
+        await db.run_write(renew, name, ttl)
+
+
+async def _run_once(name, func, timeout):
+    started = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    start = time.perf_counter()
+    token = _current.set(name)
+    items, status, error = None, 'ok', None
+    try:
+        result = await asyncio.wait_for(func(), timeout)
+        if isinstance(result, int) and not isinstance(result, bool):
+            items = result
+    except asyncio.TimeoutError:
+        status, error = 'timeout', f"تجاوز المهلة ({timeout}s)"
+    except Exception as e:
+        status, error = 'error', str(e)[:200]
+    finally:
+        _current.reset(token)
+
+    run = JobRun(name, started, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                 int((time.perf_counter() - start) * 1000), status, items, error)
+    if error:
+        logger.error(f"❌ {name}: {error} بعد {run.duration_ms}ms")
+    else:
+        logger.info(f"⚙️ {name}: انتهى في {run.duration_ms}ms" + (f" ({items})" if items is not None else ''))
+
+    try:
+        await db.run_write(record, run)
+    except Exception as e:
+        logger.error(f"خطأ في تسجيل زمن {name}: {e}")
+    return run
+
+
+async def run(name, func, timeout=None, ttl=LEASE_TTL, coalesce=False):
+    """تشغيل func (coroutine بدون معاملات) كمهمة واحدة؛ يرجع JobRun أو None لو تم التخطي"""
+    if name in _active:
+        _skipped[name] += 1
+        if coalesce:
+            _pending.add(name)
+            logger.info(f"🔁 {name}: يعمل الآن، سيُعاد مرة واحدة بعد انتهائه")
+        else:
+            logger.warning(f"⏭️ {name}: التشغيل السابق لم ينته بعد، تم التخطي")
+        return None
+
+    # الحجز قبل أي await حتى لا يدخل طلبان معاً
+    _active[name] = {'started': time.monotonic(), 'stage': 'بدء', 'done': None, 'total': None}
+    try:
+        if not await db.run_write(acquire, name, ttl):
+            _skipped[name] += 1
+            logger.warning(f"⏭️ {name}: يعمل في عملية أخرى، تم التخطي")
+            return None
+
+        keeper = asyncio.ensure_future(_keep_lease(name, ttl))
+        try:
+            while True:
+                result = await _run_once(name, func, timeout)
+                if name not in _pending:
+                    return result
+                _pending.discard(name)
+                _active[name].update(started=time.monotonic(), stage='بدء', done=None, total=None)
+        finally:
+            keeper.cancel()
+            try:
+                await db.run_write(release, name)
+            except Exception as e:
+                logger.error(f"خطأ في تحرير {name}: {e}")
+    finally:
+        _active.pop(name, None)
+        _pending.discard(name)
+
+
+def job(name, timeout=None, ttl=LEASE_TTL, coalesce=False):
+    """تحويل callback للـ JobQueue إلى مهمة single-flight مقاسة"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def callback(context):
+            await run(name, lambda: func(context), timeout=timeout, ttl=ttl, coalesce=coalesce)
+        return callback
+    return decorator
+
+# ============================================
+# 📊 العرض
+# ============================================
+
+def get_active():
+    """[(name, stage, done, total, ثواني منذ البدء)] للمهام العاملة الآن"""
+    now = time.monotonic()
+    return [
+        (name, state['stage'], state['done'], state['total'], now - state['started'])
+        for name, state in list(_active.items())
+    ]
+
+
+def get_skipped():
+    return dict(_skipped)
+
+
+def get_last_runs():
+    """آخر تشغيل لكل مهمة مع متوسط الزمن: [(name, started_at, duration_ms, status, avg_ms, runs)]"""
+    return db.fetchall('''
+        SELECT m.name, m.started_at, m.duration_ms, m.status, s.avg_ms, s.runs
+        FROM (SELECT name, MAX(id) AS last_id, AVG(duration_ms) AS avg_ms, COUNT(*) AS runs
+              FROM job_metrics GROUP BY name) s
+        JOIN job_metrics m ON m.id = s.last_id
+        ORDER BY m.name
+    ''')
@@ -0,0 +1,311 @@
+import os
+import sqlite3
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# ⚙️ إعدادات الاتصال
+# ============================================
+
+DB_NAME = "scholarship_bot.db"
+
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 16384       # ~16MB page cache لكل اتصال
+CACHED_STATEMENTS = 256     # عدد الـ prepared statements المحفوظة لكل اتصال
+SLOW_QUERY_MS = 200         # أي استعلام أبطأ من هذا يتسجل كتحذير
+
+# عدد threads القراءة للـ handlers غير المتزامنة (الكتابة دائماً thread واحد)
+READ_WORKERS = int(os.getenv("DB_READ_WORKERS", 4))
+
+# ============================================
+# 🔌 الاتصالات (اتصال طويل العمر لكل thread)
+# ============================================
+
+_local = threading.local()
+_connections = {}
+_connections_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    'calls': 0,
+    'total_ms': 0.0,
+    'max_ms': 0.0,
+    'slow_calls': 0,
+    'errors': 0,
+}
+_statement_stats = {}
+MAX_TRACKED_STATEMENTS = 100
+
+
+def _configure(conn):
+    """ضبط الـ PRAGMAs لكل اتصال جديد"""
+    # يسري على قاعدة جديدة فقط (قبل أول جدول)، والقديمة تتحول مرة واحدة بـ python migrations.py --vacuum
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    # حتى تنفذ triggers الحذف عند INSERT OR REPLACE
+    conn.execute('PRAGMA recursive_triggers=ON')
+
+
+def get_connection():
+    """جلب اتصال الـ thread الحالي (يتم إنشاؤه مرة واحدة فقط)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        return conn
+
+    # isolation_level=None: كل أمر منفرد يتم commit تلقائياً،
+    # والمعاملات المجمعة تتم صراحةً عبر transaction()
+    conn = sqlite3.connect(
+        DB_NAME,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=CACHED_STATEMENTS
+    )
+    _configure(conn)
+
+    _local.conn = conn
+    _local.depth = 0
+    with _connections_lock:
+        _connections[threading.get_ident()] = conn
+
+    logger.info(f"🗄️ اتصال جديد بقاعدة البيانات (thread {threading.get_ident()})")
+    return conn
+
+
+def close_connection():
+    """إغلاق اتصال الـ thread الحالي"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        return
+    with _connections_lock:
+        _connections.pop(threading.get_ident(), None)
+    conn.close()
+    _local.conn = None
+
+
+def close_all():
+    """إغلاق كل الاتصالات المفتوحة (عند إيقاف البوت)"""
+    with _connections_lock:
+        conns = list(_connections.values())
+        _connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"خطأ في إغلاق اتصال: {e}")
+    _local.conn = None
+
+# ============================================
+# ⏱️ قياس زمن الاستعلامات
+# ============================================
+
+def _statement_key(sql):
+    return ' '.join(sql.split())[:120]
+
+
+def _record(sql, elapsed_ms, failed=False):
+    key = _statement_key(sql)
+    with _stats_lock:
+        _stats['calls'] += 1
+        _stats['total_ms'] += elapsed_ms
+        if elapsed_ms > _stats['max_ms']:
+            _stats['max_ms'] = elapsed_ms
+        if failed:
+            _stats['errors'] += 1
+        if elapsed_ms >= SLOW_QUERY_MS:
+            _stats['slow_calls'] += 1
+
+        entry = _statement_stats.get(key)
+        if entry is None and len(_statement_stats) < MAX_TRACKED_STATEMENTS:
+            entry = _statement_stats[key] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        if entry is not None:
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning(f"🐢 استعلام بطيء ({elapsed_ms:.1f}ms): {key}")
+    else:
+        logger.debug(f"🗄️ {elapsed_ms:.2f}ms: {key}")
+
+
+@contextmanager
+def _timed(sql):
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        _record(sql, (time.perf_counter() - start) * 1000, failed)
+
+
+def get_db_stats():
+    """إحصائيات طبقة البيانات: الاتصالات المفتوحة وزمن الاستعلامات"""
+    with _connections_lock:
+        open_connections = len(_connections)
+    with _stats_lock:
+        calls = _stats['calls']
+        top = sorted(_statement_stats.items(), key=lambda kv: kv[1]['total_ms'], reverse=True)[:5]
+        return {
+            'open_connections': open_connections,
+            'calls': calls,
+            'avg_ms': _stats['total_ms'] / calls if calls else 0.0,
+            'max_ms': _stats['max_ms'],
+            'slow_calls': _stats['slow_calls'],
+            'errors': _stats['errors'],
+            'top_statements': [(sql, dict(entry)) for sql, entry in top],
+        }
+
+# ============================================
+# 📦 واجهة الاستعلامات
+# ============================================
+
+def execute(sql, params=()):
+    """تنفيذ أمر كتابة واحد (commit تلقائي خارج transaction)"""
+    conn = get_connection()
+    with _timed(sql):
+        return conn.execute(sql, params)
+
+
+def executemany(sql, seq_of_params):
+    """تنفيذ أمر على عدة صفوف داخل معاملة واحدة"""
+    with transaction() as conn:
+        with _timed(sql):
+            return conn.executemany(sql, seq_of_params)
+
+
+def _query(sql, params, row_factory):
+    # row_factory على الـ cursor فقط حتى لا يتأثر باقي مستخدمي الاتصال المشترك
+    cursor = get_connection().execute(sql, params)
+    if row_factory is not None:
+        cursor.row_factory = row_factory
+    return cursor
+
+
+def fetchone(sql, params=(), row_factory=None):
+    with _timed(sql):
+        return _query(sql, params, row_factory).fetchone()
+
+
+def fetchall(sql, params=(), row_factory=None):
+    with _timed(sql):
+        return _query(sql, params, row_factory).fetchall()
+
+
+def fetchval(sql, params=(), default=None):
+    """أول عمود من أول صف - مفيد لـ COUNT(*)"""
+    row = fetchone(sql, params)
+    return row[0] if row is not None else default
+
+
+@contextmanager
+def transaction():
+    """معاملة كتابة واحدة (BEGIN IMMEDIATE ... COMMIT) - تدعم التداخل"""
+    conn = get_connection()
+    if _local.depth > 0:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+
+    conn.execute('BEGIN IMMEDIATE')
+    _local.depth = 1
+    try:
+        yield conn
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    else:
+        conn.execute('COMMIT')
+    finally:
+        _local.depth = 0
+
+# ============================================
+# ⚡ واجهة غير متزامنة للـ handlers
+# ============================================
+#
+# القراءات تعمل بالتوازي على pool محدود (WAL يسمح بذلك)، والكتابات كلها
+# تمر على thread كاتب واحد فتُصف في طابور بدل أن تتصادم على قفل القاعدة.
+
+_read_pool = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix='db-read')
+_write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-write')
+# الكتابات المرسلة للـ thread الكاتب ولم تنته بعد (المنتظرة + الجارية)
+_pending_writes = 0
+_pending_lock = threading.Lock()
+
+
+async def run_read(fn, *args, **kwargs):
+    """تشغيل دالة قراءة متزامنة دون حجب event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_read_pool, partial(fn, *args, **kwargs))
+
+
+async def run_write(fn, *args, **kwargs):
+    """تشغيل دالة كتابة على الـ thread الكاتب الوحيد"""
+    return await asyncio.wrap_future(submit_write(fn, *args, **kwargs))
+
+
+def _write_done(future):
+    global _pending_writes
+    with _pending_lock:
+        _pending_writes -= 1
+
+
+def submit_write(fn, *args, **kwargs):
+    """جدولة دالة كتابة على الـ thread الكاتب من أي thread (ترجع Future)"""
+    global _pending_writes
+    with _pending_lock:
+        _pending_writes += 1
+    try:
+        future = _write_pool.submit(fn, *args, **kwargs)
+    except BaseException:
+        _write_done(None)
+        raise
+    future.add_done_callback(_write_done)
+    return future
+
+
+async def afetchone(sql, params=(), row_factory=None):
+    return await run_read(fetchone, sql, params, row_factory)
+
+
+async def afetchall(sql, params=(), row_factory=None):
+    return await run_read(fetchall, sql, params, row_factory)
+
+
+async def afetchval(sql, params=(), default=None):
+    return await run_read(fetchval, sql, params, default)
+
+
+async def aexecute(sql, params=()):
+    # لا نرجع الـ cursor لأنه يخص اتصال thread آخر
+    cursor = await run_write(execute, sql, params)
+    return cursor.rowcount
+
+
+def get_write_queue_depth():
+    """عدد الكتابات المنتظرة أو الجارية على الـ thread الكاتب"""
+    return _pending_writes
+
+
+def shutdown():
+    """انتظار الكتابات المعلقة ثم إغلاق كل الاتصالات"""
+    _write_pool.shutdown(wait=True)
+    _read_pool.shutdown(wait=True)
+    close_all()
@@ -0,0 +1,183 @@
+import re
+import calendar
+import logging
+from datetime import date
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 📅 تحويل نص الموعد النهائي إلى تاريخ
+# ============================================
+#
+# الموعد في المنح نص حر: "يناير سنوياً"، "فبراير - مارس"، "March 15, 2025"...
+# نحوله إلى أقرب تاريخ قادم (YYYY-MM-DD) في deadline_date المفهرس، فتصبح
+# استعلامات "ينتهي قريباً" بحث نطاق على الفهرس. المواعيد المتكررة (شهر بدون سنة)
+# تُعلّم deadline_recurring=1 وتُرحّل للسنة التالية كل ليلة بعد مرورها.
+#
+# القاعدة: شهر بلا يوم = آخر يوم في الشهر، والنطاق "فبراير - مارس" = نهاية الشهر الأخير.
+
+_MONTHS = {
+    # الأسماء المصرية/الخليجية والمغاربية
+    'يناير': 1, 'جانفي': 1,
+    'فبراير': 2, 'فيفري': 2,
+    'مارس': 3,
+    'أبريل': 4, 'ابريل': 4, 'إبريل': 4, 'أفريل': 4, 'افريل': 4,
+    'مايو': 5, 'ماي': 5,
+    'يونيو': 6, 'يونيه': 6, 'جوان': 6,
+    'يوليو': 7, 'يوليه': 7, 'جويلية': 7,
+    'أغسطس': 8, 'اغسطس': 8, 'أوت': 8,
+    'سبتمبر': 9,
+    'أكتوبر': 10, 'اكتوبر': 10,
+    'نوفمبر': 11,
+    'ديسمبر': 12,
+    # أسماء الشام والعراق
+    'كانون الثاني': 1, 'شباط': 2, 'آذار': 3, 'اذار': 3, 'نيسان': 4, 'أيار': 5, 'ايار': 5,
+    'حزيران': 6, 'تموز': 7, 'آب': 8, 'أيلول': 9, 'ايلول': 9,
+    'تشرين الأول': 10, 'تشرين الاول': 10, 'تشرين الثاني': 11, 'كانون الأول': 12, 'كانون الاول': 12,
+}
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_name) if name})
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+_MONTHS['sept'] = 9
+
+# الأطول أولاً حتى تُطابق "مايو" قبل "ماي" و "كانون الثاني" كاملة
+_MONTH_PATTERN = '|'.join(sorted((re.escape(name) for name in _MONTHS), key=len, reverse=True))
+_MONTH_RE = re.compile(rf'(?<![\w])({_MONTH_PATTERN})(?![\w])', re.I)
+
+_ARABIC_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩', '0123456789')
+
+_ISO_RE = re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b')
+_NUMERIC_RE = re.compile(r'\b(\d{1,2})[/.](\d{1,2})[/.](\d{4})\b')           # يوم/شهر/سنة
+_YEAR_RE = re.compile(r'\b(20\d\d)\b')
+_DAY_RE = re.compile(r'\b([0-3]?\d)(?:st|nd|rd|th)?\b', re.I)
+
+
+class Deadline:
+    __slots__ = ('date', 'recurring')
+
+    def __init__(self, deadline_date, recurring):
+        self.date = deadline_date
+        self.recurring = recurring
+
+    @property
+    def iso(self):
+        return self.date.isoformat()
+
+    def __repr__(self):
+        return f"Deadline({self.iso}, recurring={self.recurring})"
+
+
+def _last_day(year, month):
+    return calendar.monthrange(year, month)[1]
+
+
+def _safe_date(year, month, day):
+    try:
+        return date(year, month, min(day, _last_day(year, month)))
+    except ValueError:
+        return None
+
+
+def _next_occurrence(month, day, today):
+    """أقرب (شهر، يوم) لم يمر بعد؛ day=None = آخر الشهر"""
+    for year in (today.year, today.year + 1):
+        candidate = _safe_date(year, month, day or _last_day(year, month))
+        if candidate >= today:
+            return candidate
+    return candidate
+
+
+def _day_near(text, match):
+    """رقم اليوم الملاصق لاسم الشهر ("15 March" أو "March 15")"""
+    before = text[max(0, match.start() - 8):match.start()]
+    after = text[match.end():match.end() + 8]
+    for chunk, pick in ((after, 0), (before, -1)):
+        days = [int(d) for d in _DAY_RE.findall(chunk) if 1 <= int(d) <= 31]
+        if days:
+            return days[pick]
+    return None
+
+
+def parse(text, today=None):
+    """Deadline لأقرب موعد قادم من النص، أو None لو لا يوجد تاريخ مفهوم"""
+    if not text:
+        return None
+    today = today or date.today()
+    text = text.translate(_ARABIC_DIGITS).strip()
+
+    iso = _ISO_RE.search(text)
+    if iso:
+        found = _safe_date(int(iso.group(1)), int(iso.group(2)), int(iso.group(3)))
+        return Deadline(found, False) if found else None
+
+    numeric = _NUMERIC_RE.search(text)
+    if numeric:
+        day, month, year = (int(part) for part in numeric.groups())
+        if month <= 12:
+            found = _safe_date(year, month, day)
+            return Deadline(found, False) if found else None
+
+    # "may" الإنجليزية الصغيرة غالباً فعل ("deadline may vary") وليست شهراً
+    months = [m for m in _MONTH_RE.finditer(text) if m.group(1) != 'may']
+    if not months:
+        return None
+
+    # في النطاق نعتمد الشهر الأخير
+    last = months[-1]
+    month = _MONTHS[last.group(1).lower()]
+    day = _day_near(text, last)
+
+    year = _YEAR_RE.search(text[last.start():]) or _YEAR_RE.search(text)
+    if year:
+        year = int(year.group(1))
+        # "ديسمبر 2024 - يناير": نهاية النطاق في السنة التالية
+        if len(months) > 1 and month < _MONTHS[months[0].group(1).lower()] \
+                and not _YEAR_RE.search(text[last.start():]):
+            year += 1
+        found = _safe_date(year, month, day or _last_day(year, month))
+        return Deadline(found, False) if found else None
+
+    return Deadline(_next_occurrence(month, day, today), True)
+
+
+def columns(text, today=None):
+    """(deadline_date, deadline_recurring) للحفظ"""
+    deadline = parse(text, today)
+    if deadline is None:
+        return None, 0
+    return deadline.iso, int(deadline.recurring)
+
+# ============================================
+# 🗄️ الترحيل والترحيل الليلي
+# ============================================
+
+def add_columns(conn):
+    """عمود التكرار + تعبئة deadline_date للمنح الموجودة (ترحيل)"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(scholarships)')}
+    if 'deadline_recurring' not in existing:
+        conn.execute('ALTER TABLE scholarships ADD COLUMN deadline_recurring INTEGER NOT NULL DEFAULT 0')
+
+    rows = conn.execute('SELECT id, deadline FROM scholarships').fetchall()
+    conn.executemany(
+        'UPDATE scholarships SET deadline_date = ?, deadline_recurring = ? WHERE id = ?',
+        [columns(deadline) + (sid,) for sid, deadline in rows]
+    )
+
+
+def roll_forward(today=None):
+    """نقل المواعيد المتكررة التي مرت إلى موعدها القادم، وإرجاع عددها"""
+    today = today or date.today()
+    with db.transaction() as conn:
+        rows = conn.execute('''
+            SELECT id, deadline FROM scholarships
+            WHERE deadline_recurring = 1 AND deadline_date < ?
+        ''', (today.isoformat(),)).fetchall()
+
+        updates = [columns(deadline, today) + (sid,) for sid, deadline in rows]
+        conn.executemany(
+            'UPDATE scholarships SET deadline_date = ?, deadline_recurring = ? WHERE id = ?', updates
+        )
+    if updates:
+        logger.info(f"📅 ترحيل {len(updates)} موعد متكرر للسنة التالية")
+    return len(updates)
@@ -1,12 +1,10 @@
-import sqlite3
+import db
+import stats_counters
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import CallbackQueryHandler, CommandHandler
 
 ADMIN_ID = 123456789  # غيرها لرقمك
 
-DB_NAME = "scholarship_bot.db"
-
-
 def is_admin(user_id):
     return user_id == ADMIN_ID
 
@@ -47,11 +45,7 @@ async def broadcast_message(update, context):
     msg = update.message.text
     context.user_data.pop("broadcast")
 
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT user_id FROM users")
-    users = cursor.fetchall()
+    users = await db.afetchall("SELECT user_id FROM users")
 
     for u in users:
         try:
@@ -67,16 +61,9 @@ async def broadcast_message(update, context):
 # ============================================
 
 async def show_stats(update, context):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+    users = (await db.run_read(stats_counters.get_counters))['total_users']
 
-    cursor.execute("SELECT COUNT(*) FROM users")
-    users = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(*) FROM premium_users")
-    premium = cursor.fetchone()[0]
-
-    conn.close()
+    premium = await db.afetchval("SELECT COUNT(*) FROM premium_users")
 
     await update.callback_query.edit_message_text(
         f"📊 الإحصائيات:\n\n"
@@ -101,12 +88,7 @@ async def save_premium(update, context):
     uid = int(update.message.text)
     context.user_data.pop("add_premium")
 
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("INSERT OR IGNORE INTO premium_users VALUES (?)", (uid,))
-    conn.commit()
-    conn.close()
+    await db.aexecute("INSERT OR IGNORE INTO premium_users VALUES (?)", (uid,))
 
     await update.message.reply_text("تم التفعيل")
 
@@ -1,6 +1,7 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackQueryHandler, MessageHandler, filters
-import sqlite3
+import db
+import write_buffer
 import time
 
 
@@ -19,10 +20,7 @@ SPAM_WINDOW = 10
 # ============================================
 
 def init_community_db():
-    conn = sqlite3.connect("scholarship_bot.db")
-    cur = conn.cursor()
-
-    cur.execute("""
+    db.execute("""
     CREATE TABLE IF NOT EXISTS community_users(
         user_id INTEGER PRIMARY KEY,
         reputation INTEGER DEFAULT 0,
@@ -31,9 +29,6 @@ def init_community_db():
     )
     """)
 
-    conn.commit()
-    conn.close()
-
 
 # ============================================
 # 👥 صفحة المجتمع
@@ -74,18 +69,13 @@ async def show_community(update, context):
 # ============================================
 
 def add_reputation(user_id, amount=1):
-    conn = sqlite3.connect("scholarship_bot.db")
-    cur = conn.cursor()
-
-    cur.execute("INSERT OR IGNORE INTO community_users(user_id) VALUES(?)", (user_id,))
-    cur.execute(
+    # كتابة مؤجلة: الأمران يُكتبان بالترتيب في نفس الدفعة
+    write_buffer.enqueue("INSERT OR IGNORE INTO community_users(user_id) VALUES(?)", (user_id,))
+    write_buffer.enqueue(
         "UPDATE community_users SET reputation = reputation + ? WHERE user_id=?",
         (amount, user_id)
     )
 
-    conn.commit()
-    conn.close()
-
 
 async def my_reputation(update, context):
     query = update.callback_query
@@ -93,12 +83,7 @@ async def my_reputation(update, context):
 
     user_id = query.from_user.id
 
-    conn = sqlite3.connect("scholarship_bot.db")
-    cur = conn.cursor()
-
-    cur.execute("SELECT reputation, badge FROM community_users WHERE user_id=?", (user_id,))
-    data = cur.fetchone()
-    conn.close()
+    data = await db.afetchone("SELECT reputation, badge FROM community_users WHERE user_id=?", (user_id,))
 
     if not data:
         rep = 0
@@ -120,19 +105,13 @@ async def leaderboard(update, context):
     query = update.callback_query
     await query.answer()
 
-    conn = sqlite3.connect("scholarship_bot.db")
-    cur = conn.cursor()
-
-    cur.execute("""
+    users = await db.afetchall("""
     SELECT user_id, reputation
     FROM community_users
     ORDER BY reputation DESC
     LIMIT 10
     """)
 
-    users = cur.fetchall()
-    conn.close()
-
     text = "🏆 أفضل أعضاء المجتمع\n\n"
 
     for i, (uid, rep) in enumerate(users, 1):
@@ -221,11 +200,7 @@ async def auto_reply(update, context):
 # ============================================
 
 def update_badge(user_id):
-    conn = sqlite3.connect("scholarship_bot.db")
-    cur = conn.cursor()
-
-    cur.execute("SELECT reputation FROM community_users WHERE user_id=?", (user_id,))
-    data = cur.fetchone()
+    data = db.fetchone("SELECT reputation FROM community_users WHERE user_id=?", (user_id,))
 
     if not data:
         return
@@ -241,9 +216,7 @@ def update_badge(user_id):
     elif rep > 20:
         badge = "Active"
 
-    cur.execute("UPDATE community_users SET badge=? WHERE user_id=?", (badge, user_id))
-    conn.commit()
-    conn.close()
+    db.execute("UPDATE community_users SET badge=? WHERE user_id=?", (badge, user_id))
 
 
 # ============================================
@@ -1,20 +1,15 @@
-import sqlite3
+import db
+import scholarship_record
 from datetime import datetime
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import CallbackQueryHandler, MessageHandler, filters
 
-DB_NAME = "scholarship_bot.db"
-
-
 # ============================================
 # DATABASE
 # ============================================
 
 def init_dream_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    db.execute("""
     CREATE TABLE IF NOT EXISTS user_dream_profile (
         user_id INTEGER PRIMARY KEY,
         full_name TEXT,
@@ -32,9 +27,6 @@ def init_dream_db():
     )
     """)
 
-    conn.commit()
-    conn.close()
-
 
 # ============================================
 # ENTRY POINT
@@ -121,10 +113,7 @@ async def dream_flow(update, context):
 # ============================================
 
 async def save_profile(update, context):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    await db.aexecute("""
     INSERT OR REPLACE INTO user_dream_profile
     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
@@ -143,9 +132,6 @@ async def save_profile(update, context):
         datetime.now().strftime("%Y-%m-%d")
     ))
 
-    conn.commit()
-    conn.close()
-
 
 # ============================================
 # MATCHING ENGINE
@@ -167,12 +153,10 @@ def calculate_match_score(user_major, sch_major, target_country, sch_country):
 async def run_matching(update, context):
     await update.message.reply_text("🔍 جاري تحليل فرصك واختيار أفضل المنح لك...")
 
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM scholarships")
-    scholarships = cursor.fetchall()
-    conn.close()
+    scholarships = await db.afetchall(
+        f"SELECT {scholarship_record.select_columns(('id', 'name', 'country', 'major', 'link'))} FROM scholarships",
+        row_factory=scholarship_record.row_factory
+    )
 
     if not scholarships:
         await update.message.reply_text("لا توجد منح حالياً.")
@@ -186,9 +170,9 @@ async def run_matching(update, context):
     for sch in scholarships:
         match = calculate_match_score(
             user_major,
-            sch[3],
+            sch.major,
             target_country,
-            sch[2]
+            sch.country
         )
         ranked.append((match, sch))
 
@@ -197,10 +181,10 @@ async def run_matching(update, context):
     text = "🎯 أفضل المنح المناسبة لك:\n\n"
 
     for score, sch in ranked[:5]:
-        text += f"📚 {sch[1]}\n"
-        text += f"🌍 {sch[2]}\n"
+        text += f"📚 {sch.name}\n"
+        text += f"🌍 {sch.country}\n"
         text += f"⭐ نسبة التوافق: {score}%\n"
-        text += f"🔗 {sch[6]}\n\n"
+        text += f"🔗 {sch.link}\n\n"
 
     text += "\n📊 قيّم دقة النتائج:"
 
@@ -260,16 +244,10 @@ async def suggest_improvements(update, context):
 async def save_rating(update, context):
     rating = int(update.callback_query.data.replace("dream_rate_", ""))
 
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    await db.aexecute("""
     UPDATE user_dream_profile SET rating=? WHERE user_id=?
     """, (rating, update.effective_user.id))
 
-    conn.commit()
-    conn.close()
-
     await update.callback_query.edit_message_text("❤️ شكراً لتقييمك")
 
 
@@ -1,36 +1,21 @@
-import sqlite3
+import db
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import CallbackQueryHandler
 
-DB_NAME = "scholarship_bot.db"
-
-
 # ============================================
 # DATABASE
 # ============================================
 
 def init_premium_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    db.execute("""
     CREATE TABLE IF NOT EXISTS premium_users (
         user_id INTEGER PRIMARY KEY
     )
     """)
 
-    conn.commit()
-    conn.close()
-
 
 def is_premium(user_id):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT user_id FROM premium_users WHERE user_id=?", (user_id,))
-    result = cursor.fetchone()
-
-    conn.close()
+    result = db.fetchone("SELECT user_id FROM premium_users WHERE user_id=?", (user_id,))
     return result is not None
 
 
@@ -56,7 +41,7 @@ async def premium_menu(update, context):
 # ============================================
 
 async def premium_analysis(update, context):
-    if not is_premium(update.effective_user.id):
+    if not await db.run_read(is_premium, update.effective_user.id):
         await update.callback_query.answer("هذه الميزة للمشتركين فقط", show_alert=True)
         return
 
@@ -69,7 +54,7 @@ async def premium_analysis(update, context):
 
 
 async def premium_cv(update, context):
-    if not is_premium(update.effective_user.id):
+    if not await db.run_read(is_premium, update.effective_user.id):
         await update.callback_query.answer("هذه الميزة للمشتركين فقط", show_alert=True)
         return
 
@@ -79,7 +64,7 @@ async def premium_cv(update, context):
 
 
 async def premium_consult(update, context):
-    if not is_premium(update.effective_user.id):
+    if not await db.run_read(is_premium, update.effective_user.id):
         await update.callback_query.answer("هذه الميزة للمشتركين فقط", show_alert=True)
         return
 
@@ -0,0 +1,228 @@
+import sys
+import logging
+
+import background_jobs
+import db
+import deadlines
+import search_index
+import scholarship_catalog
+import scholarship_changes
+import scholarship_codes
+import scholarship_dedup
+import scholarship_store
+import stats_counters
+import search_retention
+import source_runs
+from scrapers import health
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 📜 الترحيلات (رقم الإصدار يحفظ في PRAGMA user_version)
+# ============================================
+#
+# كل ترحيل = (رقم، وصف، خطوات). الخطوة إما SQL نصي أو دالة تستقبل الاتصال.
+# لا تعدّل ترحيلاً تم نشره، أضف ترحيلاً جديداً برقم أكبر.
+
+MIGRATIONS = [
+    (1, "فهارس الاستعلامات التفاعلية", [
+        # send_pending_reminders: reminder_date <= ? AND is_sent = 0
+        '''CREATE INDEX IF NOT EXISTS idx_reminders_pending
+           ON reminders(reminder_date) WHERE is_sent = 0''',
+        # show_reminders: user_id = ? AND is_sent = 0 ORDER BY reminder_date
+        '''CREATE INDEX IF NOT EXISTS idx_reminders_user
+           ON reminders(user_id, is_sent, reminder_date)''',
+        # get_favorites: user_id = ? [AND status = ?] ORDER BY saved_date DESC
+        '''CREATE INDEX IF NOT EXISTS idx_favorites_user_saved
+           ON favorites(user_id, saved_date)''',
+        '''CREATE INDEX IF NOT EXISTS idx_favorites_user_status
+           ON favorites(user_id, status, saved_date)''',
+        # send_scholarship_notifications / get_tracked_scholarships (فهرس مغطي)
+        '''CREATE INDEX IF NOT EXISTS idx_tracking_user_enabled
+           ON user_scholarship_tracking(user_id, notification_enabled,
+                                        scholarship_id, scholarship_name, last_notified)''',
+        '''CREATE INDEX IF NOT EXISTS idx_tracking_enabled_user
+           ON user_scholarship_tracking(notification_enabled, user_id)''',
+    ]),
+    (2, "فهارس الإحصائيات ولوحة الأدمن", [
+        # get_user_stats / admin_stats: join_date = ? و join_date >= ?
+        '''CREATE INDEX IF NOT EXISTS idx_users_join_date
+           ON users(join_date)''',
+        # send_weekly_digest و عدد المشتركين
+        '''CREATE INDEX IF NOT EXISTS idx_users_digest
+           ON users(weekly_digest, user_id, major, target_country)''',
+        # admin_stats: COUNT(DISTINCT user_id) WHERE search_date >= ... (فهرس مغطي)
+        '''CREATE INDEX IF NOT EXISTS idx_search_history_date_user
+           ON search_history(search_date, user_id)''',
+        # get_admin_messages / الرسائل غير المقروءة
+        '''CREATE INDEX IF NOT EXISTS idx_admin_messages_unread
+           ON admin_messages(is_read, message_date)''',
+    ]),
+    (3, "فهرس البحث النصي الكامل FTS5 للمنح", [
+        search_index.create_index,
+    ]),
+    (4, "أكواد التمويل والمرحلة الدراسية بدل مطابقة النص العربي", [
+        scholarship_codes.create_schema,
+    ]),
+    (5, "بصمة المحتوى للحفظ التفاضلي", [
+        scholarship_store.add_content_hash,
+    ]),
+    (6, "عدادات الإحصائيات للوحة الأدمن", [
+        stats_counters.create_schema,
+    ]),
+    (7, "جداول التجميع اليومي لسجل البحث", [
+        search_retention.create_schema,
+    ]),
+    (8, "حالة مزامنة الكتالوج الثابت", [
+        scholarship_catalog.create_schema,
+    ]),
+    (9, "سجل تغييرات المنح للإشعارات", [
+        # pending_notifications: المتتبعين لكل منحة متغيرة
+        '''CREATE INDEX IF NOT EXISTS idx_tracking_scholarship
+           ON user_scholarship_tracking(scholarship_id, notification_enabled, user_id)''',
+        '''CREATE INDEX IF NOT EXISTS idx_updates_scholarship
+           ON scholarship_updates(scholarship_id, id)''',
+        scholarship_changes.create_schema,
+    ]),
+    (10, "مصادر المنح لدمج المكرر بين المصادر", [
+        scholarship_dedup.create_schema,
+    ]),
+    (11, "تاريخ الموعد النهائي المحسوب وفهرسه", [
+        deadlines.add_columns,
+        # advanced_search_db(deadline_soon) و الملخص الأسبوعي: نطاق على deadline_date
+        '''CREATE INDEX IF NOT EXISTS idx_scholarships_deadline_date
+           ON scholarships(deadline_date) WHERE deadline_date IS NOT NULL''',
+        # roll_forward: المتكررة التي مر موعدها
+        '''CREATE INDEX IF NOT EXISTS idx_scholarships_deadline_recurring
+           ON scholarships(deadline_date) WHERE deadline_recurring = 1''',
+    ]),
+    (12, "سجل تشغيل المصادر المجدولة", [
+        source_runs.create_schema,
+    ]),
+    (13, "lease المهام الخلفية وسجل أزمنتها", [
+        background_jobs.create_schema,
+    ]),
+    (14, "سجل صحة المصادر (ring buffer)", [
+        health.create_schema,
+    ]),
+    (15, "إعادة بناء فهرس البحث بعد إصلاح حذف ال قبل توحيد الهمزات", [
+        search_index.rebuild_index,
+    ]),
+]
+
+# الاستعلامات التي نعرض خطة تنفيذها في وضع dry-run
+PLAN_QUERIES = [
+    ("التذكيرات المستحقة",
+     "SELECT * FROM reminders WHERE reminder_date <= ? AND is_sent = 0", ('2025-01-01',)),
+    ("المفضلة للمستخدم",
+     "SELECT * FROM favorites WHERE user_id = ? ORDER BY saved_date DESC", (1,)),
+    ("نشاط البحث الأسبوعي",
+     "SELECT COUNT(DISTINCT user_id) FROM search_history WHERE search_date >= date('now', '-7 days')", ()),
+    ("مستخدمين اليوم",
+     "SELECT COUNT(*) FROM users WHERE join_date = ?", ('2025-01-01',)),
+    ("بحث بكلمة مفتاحية",
+     f"SELECT s.id FROM {search_index.FTS_TABLE} f JOIN scholarships s ON s.id = f.rowid "
+     f"WHERE {search_index.FTS_TABLE} MATCH ? ORDER BY {search_index.RANK_EXPR} LIMIT 50", ('"daad"*',)),
+    ("بحث متقدم بالمرحلة والتمويل",
+     "SELECT s.id FROM scholarships s WHERE s.funding_code = ? AND s.id IN "
+     "(SELECT scholarship_id FROM scholarship_degrees WHERE degree_code = ?) "
+     "ORDER BY s.last_updated DESC LIMIT 50", (1, 2)),
+    ("منح تنتهي قريباً",
+     "SELECT s.id FROM scholarships s WHERE s.deadline_date <= ? AND s.deadline_date >= ? "
+     "ORDER BY s.deadline_date LIMIT 50", ('2025-02-01', '2025-01-01')),
+    ("المنح المتتبعة",
+     "SELECT scholarship_id, scholarship_name, last_notified FROM user_scholarship_tracking "
+     "WHERE user_id = ? AND notification_enabled = 1", (1,)),
+]
+
+
+# الجداول الأساسية تُنشأ في app.init_db عند تشغيل البوت، والترحيلات تفترض وجودها
+BASE_TABLES = ('users', 'favorites', 'reminders', 'user_scholarship_tracking',
+               'search_history', 'admin_messages', 'scholarships', 'scholarship_updates')
+
+
+def missing_base_tables(conn=None):
+    conn = conn or db.get_connection()
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [name for name in BASE_TABLES if name not in existing]
+
+
+def get_schema_version(conn=None):
+    conn = conn or db.get_connection()
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def _apply(conn, version, steps):
+    for step in steps:
+        if callable(step):
+            step(conn)
+        else:
+            conn.execute(step)
+    # PRAGMA لا يقبل parameters
+    conn.execute(f'PRAGMA user_version = {int(version)}')
+
+
+def explain(conn, sql, params=()):
+    """خطة التنفيذ كنص مقروء"""
+    rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    return [row[3] for row in rows]
+
+
+def print_query_plans(conn, title):
+    print(f"\n📋 {title}")
+    for label, sql, params in PLAN_QUERIES:
+        try:
+            plan = explain(conn, sql, params)
+        except Exception as e:
+            plan = [f"خطأ: {e}"]
+        print(f"  • {label}:")
+        for line in plan:
+            print(f"      {line}")
+
+
+def migrate(dry_run=False):
+    """تطبيق الترحيلات المعلقة. في dry-run يتم التطبيق داخل معاملة ثم التراجع عنها"""
+    conn = db.get_connection()
+    current = get_schema_version(conn)
+    pending = [m for m in MIGRATIONS if m[0] > current]
+
+    if not pending:
+        logger.info(f"✅ مخطط قاعدة البيانات محدث (الإصدار {current})")
+        return current
+
+    if dry_run:
+        print(f"🧪 dry-run: الإصدار الحالي {current}، ترحيلات معلقة: {[m[0] for m in pending]}")
+        print_query_plans(conn, "قبل الترحيل")
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for version, description, steps in pending:
+                print(f"➡️  {version}: {description}")
+                _apply(conn, version, steps)
+            print_query_plans(conn, "بعد الترحيل")
+        finally:
+            conn.execute('ROLLBACK')
+        return current
+
+    for version, description, steps in pending:
+        with db.transaction() as tx:
+            _apply(tx, version, steps)
+        logger.info(f"📜 تم تطبيق الترحيل {version}: {description}")
+
+    return pending[-1][0]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    missing = missing_base_tables()
+    if missing:
+        logger.error(f"❌ قاعدة البيانات {db.DB_NAME} بدون الجداول الأساسية ({', '.join(missing)}): "
+                     f"شغّل البوت مرة واحدة (app.init_db) ثم أعد الترحيل")
+        sys.exit(1)
+    if '--vacuum' in sys.argv:
+        # تحويل ملف قديم لـ incremental vacuum: إعادة كتابة كاملة، والبوت متوقف
+        if search_retention.enable_incremental_vacuum():
+            logger.info("🗜️ تم تحويل قاعدة البيانات لـ auto_vacuum=INCREMENTAL")
+        else:
+            logger.info("✅ auto_vacuum=INCREMENTAL مفعل مسبقاً")
+    else:
+        migrate(dry_run='--dry-run' in sys.argv)
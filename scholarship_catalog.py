@@ -0,0 +1,147 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+import db
+import scholarship_store
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 📚 الكتالوج الثابت للمنح (ملف بيانات)
+# ============================================
+#
+# المنح المختارة يدوياً (حكومية، أوروبية، آسيوية...) في data/scholarship_catalog.json
+# بدل قواميس Python تُبنى في كل استدعاء. الملف يُقرأ ويُتحقق منه مرة واحدة،
+# ولا يُحفظ في القاعدة إلا إذا تغيرت بصمته، فالتحديث الدوري غالباً لا يفعل شيئاً.
+
+CATALOG_PATH = os.getenv(
+    "SCHOLARSHIP_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'scholarship_catalog.json'),
+)
+CATALOG_VERSION = 1
+
+REQUIRED_FIELDS = ('name', 'country', 'major', 'deadline', 'link', 'description',
+                   'source', 'funding_type', 'degree_level')
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+class Catalog:
+    __slots__ = ('version', 'content_hash', 'sections')
+
+    def __init__(self, version, content_hash, sections):
+        self.version = version
+        self.content_hash = content_hash
+        # [(key, title, (منحة, ...)), ...] بترتيب الملف
+        self.sections = sections
+
+    def scholarships(self, country=None):
+        """نسخ من كل منح الكتالوج؛ المنح الحكومية تُحصر في الدولة لو لها منح"""
+        gov_countries = {s.get('country_key') for s in self.section('government')}
+        scholarships = []
+        for key, _, items in self.sections:
+            for item in items:
+                if key == 'government' and country in gov_countries and item['country_key'] != country:
+                    continue
+                scholarships.append(dict(item))
+        return scholarships
+
+    def section(self, key):
+        for section_key, _, items in self.sections:
+            if section_key == key:
+                return items
+        return ()
+
+    def __len__(self):
+        return sum(len(items) for _, _, items in self.sections)
+
+
+def create_schema(conn):
+    """حالة آخر مزامنة للكتالوج (ترحيل)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_state (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        ) WITHOUT ROWID
+    ''')
+
+
+def _validate(data):
+    if data.get('version') != CATALOG_VERSION:
+        raise ValueError(f"نسخة الكتالوج غير مدعومة: {data.get('version')} (المتوقع {CATALOG_VERSION})")
+
+    sections = []
+    seen = set()
+    for section in data.get('sections', []):
+        key = section['key']
+        items = []
+        for i, item in enumerate(section['scholarships']):
+            missing = [field for field in REQUIRED_FIELDS if not item.get(field)]
+            if missing:
+                raise ValueError(f"الكتالوج: {key}[{i}] ينقصه {', '.join(missing)}")
+            if key == 'government' and not item.get('country_key'):
+                raise ValueError(f"الكتالوج: {key}[{i}] بدون country_key")
+            identity = (item['name'], item['country'])
+            if identity in seen:
+                raise ValueError(f"الكتالوج: منحة مكررة {item['name']} ({item['country']})")
+            seen.add(identity)
+            items.append(item)
+        sections.append((key, section.get('title', key), tuple(items)))
+    return sections
+
+
+def load():
+    """الكتالوج محملاً ومتحققاً منه (يُقرأ من القرص مرة واحدة)"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                with open(CATALOG_PATH, 'rb') as f:
+                    raw = f.read()
+                data = json.loads(raw)
+                _catalog = Catalog(data['version'], hashlib.sha1(raw).hexdigest(), _validate(data))
+                logger.info(f"📚 الكتالوج: {len(_catalog)} منحة (نسخة {_catalog.version})")
+    return _catalog
+
+
+def reload():
+    """إعادة قراءة الملف بعد تعديله"""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+    return load()
+
+
+def _synced_hash(conn):
+    row = conn.execute("SELECT value FROM catalog_state WHERE name = 'content_hash'").fetchone()
+    return row[0] if row else None
+
+
+def is_synced():
+    """هل حُفظ الكتالوج في القاعدة من قبل (بأي نسخة)"""
+    return db.fetchval("SELECT 1 FROM catalog_state WHERE name = 'content_hash'") is not None
+
+
+def sync(force=False):
+    """حفظ الكتالوج في القاعدة فقط إذا تغيرت بصمة الملف؛ يرجع العدادات أو None"""
+    catalog = load()
+    with db.transaction() as conn:
+        if not force and _synced_hash(conn) == catalog.content_hash:
+            logger.info("📚 الكتالوج بدون تغيير، لا حاجة للحفظ")
+            return None
+
+        counts = scholarship_store.upsert_scholarships(catalog.scholarships())
+        conn.executemany('''
+            INSERT INTO catalog_state (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = excluded.value
+        ''', [
+            ('content_hash', catalog.content_hash),
+            ('version', str(catalog.version)),
+            ('synced_at', datetime.now().isoformat(timespec='seconds')),
+        ])
+    return counts
@@ -0,0 +1,125 @@
+import logging
+from datetime import datetime
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 📝 سجل تغييرات المنح
+# ============================================
+#
+# عند الحفظ نقارن كل منحة متغيرة بنسختها المخزنة حقلاً بحقل، ونكتب صفاً مختصراً
+# في scholarship_updates لكل تغيير حقيقي (موعد، رابط، تمويل...). الإشعارات تقرأ
+# من هذا السجل ما بعد آخر صف أُرسل بدل إعادة إرسال كل المنح المتتبعة.
+
+# (عمود المنحة، نوع التحديث)
+TRACKED_FIELDS = (
+    ('deadline', 'deadline'),
+    ('link', 'link'),
+    ('funding_type', 'funding'),
+    ('degree_level', 'degree'),
+    ('major', 'major'),
+)
+
+CHANGE_LABELS = {
+    'deadline': '📅 الموعد النهائي',
+    'link': '🔗 الرابط',
+    'funding': '💰 التمويل',
+    'degree': '🎓 المرحلة',
+    'major': '🎯 التخصص',
+}
+
+_CHUNK = 500
+
+
+def create_schema(conn):
+    """مؤشر آخر تحديث تم الإشعار به (ترحيل)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scholarship_updates_state (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        ) WITHOUT ROWID
+    ''')
+    # لا نرسل السجل القديم (إن وجد) كإشعارات عند أول تشغيل
+    conn.execute('''
+        INSERT OR IGNORE INTO scholarship_updates_state (name, value)
+        SELECT 'last_notified_id', coalesce(MAX(id), 0) FROM scholarship_updates
+    ''')
+
+
+def _stored(conn, ids):
+    """{id: {عمود: قيمة}} للحقول المتتبعة فقط"""
+    columns = ', '.join(field for field, _ in TRACKED_FIELDS)
+    stored = {}
+    ids = list(ids)
+    for i in range(0, len(ids), _CHUNK):
+        chunk = ids[i:i + _CHUNK]
+        rows = conn.execute(f'''
+            SELECT id, {columns} FROM scholarships
+            WHERE id IN ({','.join('?' * len(chunk))})
+        ''', chunk).fetchall()
+        for row in rows:
+            stored[row[0]] = dict(zip((field for field, _ in TRACKED_FIELDS), row[1:]))
+    return stored
+
+
+def detect(conn, candidates):
+    """candidates = [(id, name, {عمود: قيمة جديدة})] - يرجع صفوف التحديث الجاهزة للإدراج"""
+    if not candidates:
+        return []
+
+    stored = _stored(conn, (sid for sid, _, _ in candidates))
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    updates = []
+    for sid, name, values in candidates:
+        old = stored.get(sid)
+        if old is None:
+            continue
+        for field, update_type in TRACKED_FIELDS:
+            before, after = old[field] or '', values.get(field) or ''
+            if before != after:
+                updates.append((sid, name, update_type, f"{after} (كان: {before})" if before else after, now))
+    return updates
+
+
+def record(conn, updates):
+    """إدراج صفوف التحديث دفعة واحدة"""
+    if updates:
+        conn.executemany('''
+            INSERT INTO scholarship_updates
+            (scholarship_id, scholarship_name, update_type, update_content, update_date)
+            VALUES (?, ?, ?, ?, ?)
+        ''', updates)
+        logger.info(f"📝 سجل التغييرات: {len(updates)} تغيير جديد")
+
+# ============================================
+# 🔔 قراءة السجل للإشعارات
+# ============================================
+
+def pending_notifications():
+    """(آخر id، [(user_id, scholarship_id, name, type, content, link)]) للتغييرات غير المرسلة"""
+    last_id = int(db.fetchval(
+        "SELECT value FROM scholarship_updates_state WHERE name = 'last_notified_id'", default=0
+    ))
+    upto = db.fetchval('SELECT coalesce(MAX(id), 0) FROM scholarship_updates')
+    if upto <= last_id:
+        return last_id, []
+
+    rows = db.fetchall('''
+        SELECT t.user_id, u.scholarship_id, u.scholarship_name, u.update_type, u.update_content, s.link
+        FROM scholarship_updates u
+        JOIN user_scholarship_tracking t
+            ON t.scholarship_id = u.scholarship_id AND t.notification_enabled = 1
+        LEFT JOIN scholarships s ON s.id = u.scholarship_id
+        WHERE u.id > ? AND u.id <= ?
+        ORDER BY t.user_id, u.scholarship_id, u.id
+    ''', (last_id, upto))
+    return upto, rows
+
+
+def mark_notified(last_id):
+    db.execute('''
+        UPDATE scholarship_updates_state SET value = ? WHERE name = 'last_notified_id'
+    ''', (str(last_id),))
@@ -0,0 +1,165 @@
+import search_index
+
+# ============================================
+# 🔢 أكواد التمويل والمرحلة الدراسية
+# ============================================
+#
+# المصادر تكتب التمويل والمرحلة كنص حر ('ممولة بالكامل'، 'ماجستير، دكتوراه'...)
+# فنحوّلها عند الحفظ لأكواد صحيحة مفهرسة، والنص العربي يُعرض فقط وقت العرض.
+
+FUNDING_UNKNOWN = 0
+FUNDING_FULL = 1
+FUNDING_PARTIAL = 2
+FUNDING_NONE = 3
+FUNDING_VARIOUS = 4
+
+# مفاتيح أزرار البحث المتقدم (adv_funding_*) -> الكود
+FUNDING_CODES = {
+    'full': FUNDING_FULL,
+    'partial': FUNDING_PARTIAL,
+    'none': FUNDING_NONE,
+    'various': FUNDING_VARIOUS,
+}
+
+FUNDING_LABELS = {
+    FUNDING_UNKNOWN: 'غير محدد',
+    FUNDING_FULL: 'ممولة بالكامل',
+    FUNDING_PARTIAL: 'ممولة جزئياً',
+    FUNDING_NONE: 'بدون تمويل',
+    FUNDING_VARIOUS: 'متنوع',
+}
+
+# المرحلة الدراسية: bitmask لأن المنحة الواحدة تغطي عدة مراحل
+DEGREE_BACHELOR = 1
+DEGREE_MASTER = 2
+DEGREE_PHD = 4
+DEGREE_DIPLOMA = 8
+DEGREE_RESEARCH = 16
+DEGREE_FELLOWSHIP = 32
+DEGREE_ALL = DEGREE_BACHELOR | DEGREE_MASTER | DEGREE_PHD | DEGREE_DIPLOMA
+
+# مفاتيح أزرار البحث المتقدم (adv_degree_*) -> البت
+DEGREE_CODES = {
+    'bachelor': DEGREE_BACHELOR,
+    'master': DEGREE_MASTER,
+    'phd': DEGREE_PHD,
+    'diploma': DEGREE_DIPLOMA,
+    'research': DEGREE_RESEARCH,
+    'fellowship': DEGREE_FELLOWSHIP,
+}
+
+DEGREE_LABELS = {
+    DEGREE_BACHELOR: 'بكالوريوس',
+    DEGREE_MASTER: 'ماجستير',
+    DEGREE_PHD: 'دكتوراه',
+    DEGREE_DIPLOMA: 'دبلوم',
+    DEGREE_RESEARCH: 'أبحاث',
+    DEGREE_FELLOWSHIP: 'زمالة مهنية',
+}
+
+# الكلمات بعد التوحيد عبر search_index.tokenize
+_FUNDING_KEYWORDS = [
+    (FUNDING_FULL, ('كامل', 'fully', 'full')),
+    (FUNDING_PARTIAL, ('جزيي', 'جزييا', 'partial', 'partially')),
+    (FUNDING_NONE, ('بدون', 'none', 'unfunded', 'self')),
+    (FUNDING_VARIOUS, ('متنوع', 'various', 'varies', 'مختلف')),
+]
+
+_DEGREE_KEYWORDS = [
+    (DEGREE_BACHELOR, ('بكالوريوس', 'bachelor', 'undergraduate', 'ba', 'bsc')),
+    (DEGREE_MASTER, ('ماجستير', 'master', 'masters', 'msc', 'ma', 'mba', 'postgraduate')),
+    (DEGREE_PHD, ('دكتوراه', 'phd', 'doctoral', 'doctorate')),
+    (DEGREE_DIPLOMA, ('دبلوم', 'diploma')),
+    (DEGREE_RESEARCH, ('ابحاث', 'بحثي', 'research')),
+    (DEGREE_FELLOWSHIP, ('زماله', 'fellowship')),
+]
+
+_DEGREE_ALL_WORDS = ('جميع', 'all', 'كل')
+
+
+def funding_code(text):
+    """تحويل نص التمويل لكود"""
+    tokens = set(search_index.tokenize(text))
+    for code, words in _FUNDING_KEYWORDS:
+        if tokens.intersection(words):
+            return code
+    return FUNDING_UNKNOWN
+
+
+def degree_mask(text):
+    """تحويل نص المرحلة ('ماجستير، دكتوراه') لـ bitmask"""
+    tokens = set(search_index.tokenize(text))
+    mask = 0
+    for bit, words in _DEGREE_KEYWORDS:
+        if tokens.intersection(words):
+            mask |= bit
+    if not mask and tokens.intersection(_DEGREE_ALL_WORDS):
+        mask = DEGREE_ALL
+    return mask
+
+
+def degree_bits(mask):
+    return [bit for bit in DEGREE_LABELS if mask & bit]
+
+
+def funding_label(code):
+    return FUNDING_LABELS.get(code or FUNDING_UNKNOWN, FUNDING_LABELS[FUNDING_UNKNOWN])
+
+
+def degree_label(mask):
+    if not mask:
+        return 'غير محدد'
+    if mask & DEGREE_ALL == DEGREE_ALL:
+        return 'جميع المراحل'
+    return '، '.join(DEGREE_LABELS[bit] for bit in degree_bits(mask))
+
+# ============================================
+# 🗄️ جدول المراحل (scholarship_degrees)
+# ============================================
+
+def sync_degrees(conn, id_mask_pairs):
+    """تحديث صفوف scholarship_degrees لمنح محددة"""
+    id_mask_pairs = list(id_mask_pairs)
+    conn.executemany('DELETE FROM scholarship_degrees WHERE scholarship_id = ?',
+                     [(sid,) for sid, _ in id_mask_pairs])
+    conn.executemany(
+        'INSERT OR IGNORE INTO scholarship_degrees (degree_code, scholarship_id) VALUES (?, ?)',
+        [(bit, sid) for sid, mask in id_mask_pairs for bit in degree_bits(mask or 0)]
+    )
+
+
+def create_schema(conn):
+    """أعمدة الأكواد وجدول المراحل والفهارس + تعبئة البيانات الموجودة (ترحيل)"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(scholarships)')}
+    if 'funding_code' not in columns:
+        conn.execute('ALTER TABLE scholarships ADD COLUMN funding_code INTEGER NOT NULL DEFAULT 0')
+    if 'degree_mask' not in columns:
+        conn.execute('ALTER TABLE scholarships ADD COLUMN degree_mask INTEGER NOT NULL DEFAULT 0')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scholarship_degrees (
+            degree_code INTEGER NOT NULL,
+            scholarship_id INTEGER NOT NULL,
+            PRIMARY KEY (degree_code, scholarship_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_scholarship_degrees_sch
+        ON scholarship_degrees(scholarship_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_scholarships_funding
+        ON scholarships(funding_code, last_updated)
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS scholarship_degrees_delete
+        AFTER DELETE ON scholarships BEGIN
+            DELETE FROM scholarship_degrees WHERE scholarship_id = old.id;
+        END
+    ''')
+
+    rows = conn.execute('SELECT id, funding_type, degree_level FROM scholarships').fetchall()
+    coded = [(sid, funding_code(funding), degree_mask(level)) for sid, funding, level in rows]
+    conn.executemany('UPDATE scholarships SET funding_code = ?, degree_mask = ? WHERE id = ?',
+                     [(f, d, sid) for sid, f, d in coded])
+    sync_degrees(conn, [(sid, d) for sid, _, d in coded])
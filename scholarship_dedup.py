@@ -0,0 +1,317 @@
+import re
+import logging
+import unicodedata
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🧬 دمج المنح المكررة بين المصادر
+# ============================================
+#
+# نفس البرنامج يصل من الكتالوج ومن ScholarshipPortal و Scholars4Dev بأسماء وروابط
+# مختلفة قليلاً، و UNIQUE(name, country) لا يلتقطها. قبل الحفظ نطبع الروابط
+# (المخطط، www، الشرطة الأخيرة، معاملات التتبع) ونقارن الأسماء المطبعة بـ shingles
+# (3 أحرف) مع فهرس كلمات للمرشحين فقط، ثم نربط كل منحة مجمّعة بسجل أساسي واحد
+# ونحفظ مصدرها في scholarship_sources.
+#
+# الكتالوج موثوق: منحتان من الكتالوج لا تُدمجان أبداً، والمجمّعة لا تغيّر محتوى
+# منحة موجودة باسم آخر بل تُضاف كمصدر لها فقط.
+
+SCRAPED_SOURCES = frozenset({'ScholarshipPortal', 'Scholars4Dev', 'FindAMasters'})
+
+NAME_THRESHOLD = 0.6
+# المرشحون من أندر كلمتين في الاسم فقط
+CANDIDATE_TOKENS = 2
+
+_TRACKING_PARAMS = re.compile(r'^(utm_\w+|gclid|fbclid|msclkid|mc_cid|mc_eid|ref|source|_ga)$', re.I)
+_NON_WORD = re.compile(r'[^\w]+')
+_YEAR = re.compile(r'^(19|20)\d\d$')
+_YEAR_RANGE = re.compile(r'\b(19|20)\d\d\s*[/\-–]\s*\d{2,4}\b')
+
+# حروف لا يفككها NFKD
+_FOLD = str.maketrans({'ı': 'i', 'ł': 'l', 'ø': 'o', 'đ': 'd', 'ß': 'ss'})
+
+_STOPWORDS = frozenset({
+    'scholarship', 'scholarships', 'programme', 'program', 'programs', 'the', 'of', 'for',
+    'and', 'in', 'to', 'a', 'an', 'at', 'award', 'awards', 'fully', 'funded', 'international',
+    'students', 'student', 'study',
+})
+
+
+def create_schema(conn):
+    """جدول مصادر كل منحة (ترحيل)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scholarship_sources (
+            scholarship_id INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            url_key TEXT NOT NULL,
+            link TEXT,
+            first_seen TEXT NOT NULL,
+            last_seen TEXT NOT NULL,
+            PRIMARY KEY (scholarship_id, source, url_key)
+        ) WITHOUT ROWID
+    ''')
+    # إعادة مزامنة الكتالوج مرة واحدة حتى تُسجل مصادر المنح الموجودة
+    conn.execute("DELETE FROM catalog_state WHERE name = 'content_hash'")
+
+# ============================================
+# 🔤 التطبيع والبصمات
+# ============================================
+
+def normalize_url(url):
+    """رابط بدون مخطط و www ومعاملات التتبع والشرطة الأخيرة"""
+    if not url:
+        return ''
+    parts = urlsplit(url.strip())
+    host = parts.hostname or ''
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r'/+', '/', parts.path).rstrip('/')
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.match(key)
+    ))
+    return urlunsplit(('', host, path, query, '')).lstrip('/')
+
+
+def normalize_name(name):
+    """كلمات الاسم المهمة: بدون تشكيل/علامات وبدون الكلمات العامة والسنوات"""
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower().translate(_FOLD)
+    text = _YEAR_RANGE.sub(' ', text)
+    return tuple(
+        token for token in _NON_WORD.split(text)
+        if token and token not in _STOPWORDS and not _YEAR.match(token)
+    )
+
+
+def shingles(tokens, size=3):
+    text = f" {' '.join(tokens)} "
+    if len(text) <= size:
+        return frozenset((text,))
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def similarity(a, b):
+    """Jaccard بين مجموعتي shingles"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _same_token(a, b):
+    # master/masters و scholarship/scholarships
+    return a == b or (min(len(a), len(b)) >= 4 and (a.startswith(b) or b.startswith(a)))
+
+
+def tokens_contained(a, b):
+    """كل كلمات الاسم الأقصر موجودة في الأطول (Alpha ≠ Beta Excellence Fellowship)"""
+    shorter, longer = (a, b) if len(a) <= len(b) else (b, a)
+    return all(any(_same_token(token, other) for other in longer) for token in shorter)
+
+
+def is_scraped(source):
+    return source in SCRAPED_SOURCES
+
+
+class _Node:
+    __slots__ = ('key', 'tokens', 'numbers', 'url_key', 'scraped', 'sid', 'record', 'parent', '_shingles')
+
+    def __init__(self, name, country, link, scraped, sid=None, record=None):
+        self.key = (name, country)
+        self.tokens = normalize_name(name)
+        # "Fellowship 2" و "Fellowship 3" برنامجان مختلفان
+        self.numbers = frozenset(token for token in self.tokens if token.isdigit())
+        self.url_key = normalize_url(link)
+        self.scraped = scraped
+        self.sid = sid
+        self.record = record
+        self.parent = None
+        self._shingles = None
+
+    @property
+    def shingles(self):
+        if self._shingles is None:
+            self._shingles = shingles(self.tokens)
+        return self._shingles
+
+    def root(self):
+        node = self
+        while node.parent is not None:
+            node = node.parent
+        return node
+
+
+class _Index:
+    """بحث المرشحين بالرابط المطبع أو بكلمة مشتركة من الاسم"""
+
+    def __init__(self):
+        self.by_url = {}
+        self.by_token = {}
+
+    def add(self, node):
+        if node.url_key:
+            self.by_url.setdefault(node.url_key, []).append(node)
+        for token in set(node.tokens):
+            self.by_token.setdefault(token, []).append(node)
+
+    def best_match(self, node, accept):
+        candidates = {id(c): c for c in self.by_url.get(node.url_key, ()) if node.url_key}
+        postings = sorted((self.by_token[token] for token in set(node.tokens) if token in self.by_token), key=len)
+        for nodes in postings[:CANDIDATE_TOKENS]:
+            candidates.update((id(c), c) for c in nodes)
+
+        best, best_score = None, 0.0
+        for candidate in candidates.values():
+            if candidate is node or not accept(candidate):
+                continue
+            same_url = bool(node.url_key) and candidate.url_key == node.url_key
+            if not same_url and candidate.numbers != node.numbers:
+                continue
+            score = similarity(node.shingles, candidate.shingles)
+            if not same_url and (score < NAME_THRESHOLD or not tokens_contained(node.tokens, candidate.tokens)):
+                continue
+            score += same_url
+            if score > best_score:
+                best, best_score = candidate, score
+        return best
+
+
+class Plan:
+    """نتيجة الدمج: المنح التي تُحفظ، والسجلات التي يُعاد تسميتها، ومصادر كل منحة"""
+    __slots__ = ('records', 'renames', 'sources', 'merged')
+
+    def __init__(self):
+        self.records = []
+        self.renames = []        # [(id, name, country)]
+        self.sources = []        # [((name, country), source, url_key, link)]
+        self.merged = 0
+
+
+def _link_nodes(nodes, index, exact):
+    """ربط كل منحة واردة بأفضل سجل مطابق (الكتالوج أولاً ليكون هو الأساسي)"""
+    for node in sorted(nodes, key=lambda n: n.scraped):
+        target = exact.get(node.key)
+        if target is not None and target is not node:
+            node.parent = target
+        elif node.scraped:
+            node.parent = index.best_match(node, lambda c: True)
+        else:
+            # منحة كتالوج تلتقط فقط سجلاً قديماً جاء من مصدر مجمّع
+            node.parent = index.best_match(
+                node, lambda c: c.sid is not None and c.scraped and c.parent is None
+            )
+            if node.parent is not None:
+                # السجل صار لمنحة كتالوج فلا تلتقطه منحة كتالوج أخرى
+                node.parent.scraped = False
+        index.add(node)
+        exact.setdefault(node.key, node)
+
+
+def _incoming_nodes(scholarships):
+    nodes = []
+    for sch in scholarships:
+        name, country = sch.get('name'), sch.get('country')
+        if not name:
+            continue
+        nodes.append(_Node(name, country, sch.get('link'), is_scraped(sch.get('source')), record=sch))
+    return nodes
+
+
+def _rank(node, root):
+    return node.scraped, node.key != root.key, -len(node.record.get('description') or '')
+
+
+def plan(conn, scholarships):
+    """خطة الحفظ بعد دمج المكرر داخل الدفعة ومع المنح الموجودة في القاعدة"""
+    nodes = _incoming_nodes(scholarships)
+    curated_keys = {node.key for node in nodes if not node.scraped}
+    curated_ids = {row[0] for row in conn.execute('SELECT DISTINCT scholarship_id, source FROM scholarship_sources')
+                   if not is_scraped(row[1])}
+
+    index = _Index()
+    exact = {}
+    for sid, name, country, link in conn.execute('SELECT id, name, country, link FROM scholarships'):
+        node = _Node(name, country, link, sid not in curated_ids and (name, country) not in curated_keys, sid=sid)
+        index.add(node)
+        exact[node.key] = node
+
+    _link_nodes(nodes, index, exact)
+
+    result = Plan()
+    groups = {}
+    for node in nodes:
+        groups.setdefault(id(node.root()), (node.root(), []))[1].append(node)
+
+    for root, members in groups.values():
+        # السجل الأساسي: منحة الكتالوج، ثم المطابقة للسجل الموجود، ثم الأطول وصفاً
+        canonical = min(members, key=lambda n: _rank(n, root))
+        target = root.key
+
+        if canonical.scraped and not root.scraped:
+            # المجمّعة لا تغيّر منحة الكتالوج حتى لو بنفس الاسم
+            canonical = None
+        elif root.sid is not None and root.key != canonical.key:
+            if not canonical.scraped:
+                # سجل مجمّع قديم يصبح منحة الكتالوج بنفس id
+                result.renames.append((root.sid, canonical.key[0], canonical.key[1]))
+                target = canonical.key
+                result.records.append(canonical.record)
+            else:
+                canonical = None
+        else:
+            result.records.append(canonical.record)
+
+        for node in members:
+            if node is not canonical:
+                result.merged += 1
+            result.sources.append((target, node.record.get('source') or '', node.url_key,
+                                   node.record.get('link')))
+
+    if result.merged:
+        logger.info(f"🧬 دمج المكرر: {result.merged} منحة مكررة من {len(nodes)}")
+    return result
+
+
+def collapse(scholarships):
+    """إزالة المكرر من قائمة نتائج (بدون قاعدة) مع الإبقاء على الترتيب"""
+    nodes = _incoming_nodes(scholarships)
+    _link_nodes(nodes, _Index(), {})
+
+    best = {}
+    for node in nodes:
+        root = node.root()
+        current = best.get(id(root))
+        if current is None or _rank(node, root) < _rank(current, root):
+            best[id(root)] = node
+    keep = {id(node) for node in best.values()}
+    return [node.record for node in nodes if id(node) in keep]
+
+# ============================================
+# 💾 الحفظ
+# ============================================
+
+def apply_renames(conn, renames):
+    if renames:
+        conn.executemany('UPDATE scholarships SET name = ?, country = ? WHERE id = ?',
+                         [(name, country, sid) for sid, name, country in renames])
+
+
+def record_sources(conn, sources, ids):
+    """تسجيل مصادر كل منحة؛ ids = {(name, country): id}"""
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = [(ids[key], source, url_key, link, now, now)
+            for key, source, url_key, link in sources if key in ids]
+    if rows:
+        conn.executemany('''
+            INSERT INTO scholarship_sources
+            (scholarship_id, source, url_key, link, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(scholarship_id, source, url_key) DO UPDATE SET
+                link = excluded.link, last_seen = excluded.last_seen
+        ''', rows)
+
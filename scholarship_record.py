@@ -0,0 +1,63 @@
+import scholarship_codes
+
+# ============================================
+# 📄 سجل المنحة (row factory)
+# ============================================
+#
+# بدل بناء dict جديد من row[0]..row[N] في كل handler، يبني sqlite السجل مباشرة
+# عبر row_factory، والـ handlers تختار الأعمدة التي تحتاجها فقط.
+
+# أعمدة قوائم النتائج (display_scholarships)
+LIST_COLUMNS = ('id', 'name', 'country', 'major', 'deadline', 'link', 'description',
+                'funding_code', 'degree_mask')
+
+# أعمدة رسالة التفاصيل والإشعارات
+DETAIL_COLUMNS = LIST_COLUMNS + ('requirements', 'benefits')
+
+
+def select_columns(columns=LIST_COLUMNS, alias=None):
+    """قائمة الأعمدة لجملة SELECT، مع اسم الجدول المستعار لو فيه JOIN"""
+    prefix = f'{alias}.' if alias else ''
+    return ', '.join(prefix + column for column in columns)
+
+
+class Scholarship:
+    __slots__ = DETAIL_COLUMNS
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @property
+    def funding_type(self):
+        return scholarship_codes.funding_label(self.funding_code)
+
+    @property
+    def degree_level(self):
+        return scholarship_codes.degree_label(self.degree_mask)
+
+    # نفس واجهة الـ dict حتى تعمل display_scholarships والنتائج المحفوظة في user_data
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name in self.__slots__:
+            setattr(self, name, state.get(name))
+
+    def __repr__(self):
+        return f"Scholarship(id={self.id!r}, name={self.name!r})"
+
+
+def row_factory(cursor, row):
+    """row_factory لـ sqlite: يحول الصف لـ Scholarship حسب أسماء الأعمدة المختارة"""
+    return Scholarship(**{desc[0]: value for desc, value in zip(cursor.description, row)})
@@ -0,0 +1,150 @@
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+import db
+import deadlines
+import search_index
+import scholarship_changes
+import scholarship_codes
+import scholarship_dedup
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 💾 حفظ المنح (upsert تفاضلي)
+# ============================================
+#
+# كل منحة لها بصمة (hash) لمحتواها. عند التحديث نقارن البصمة الواردة بالمخزنة
+# ونكتب الجديد والمتغير فقط عبر ON CONFLICT DO UPDATE، فيبقى id المنحة ثابتاً
+# ولا تنكسر المفضلة والتذكيرات والتتبع التي تشير إليه.
+# المنح المتغيرة تُقارن حقلاً بحقل وتُسجل تغييراتها في scholarship_updates.
+# قبل ذلك تُدمج المنح المكررة بين المصادر (scholarship_dedup).
+
+# الحقول التي تدخل في البصمة بنفس ترتيب أعمدة الإدراج
+CONTENT_FIELDS = ('name', 'country', 'major', 'deadline', 'link', 'description',
+                  'funding_type', 'degree_level')
+
+_DEFAULTS = {
+    'funding_type': 'غير محدد',
+    'degree_level': 'جميع المراحل',
+}
+
+_UPSERT_SQL = f'''
+    INSERT INTO scholarships
+    ({', '.join(CONTENT_FIELDS)}, funding_code, degree_mask, deadline_date, deadline_recurring,
+     content_hash, last_updated)
+    VALUES ({', '.join('?' * (len(CONTENT_FIELDS) + 6))})
+    ON CONFLICT(name, country) DO UPDATE SET
+        {', '.join(f'{f} = excluded.{f}' for f in CONTENT_FIELDS[2:])},
+        funding_code = excluded.funding_code,
+        degree_mask = excluded.degree_mask,
+        deadline_date = excluded.deadline_date,
+        deadline_recurring = excluded.deadline_recurring,
+        content_hash = excluded.content_hash,
+        last_updated = excluded.last_updated
+    WHERE content_hash IS NOT excluded.content_hash
+'''
+
+_CHUNK = 500
+
+
+def add_content_hash(conn):
+    """عمود البصمة (ترحيل). الصفوف القديمة بدون بصمة تُحدّث مرة واحدة عند أول حفظ"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(scholarships)')}
+    if 'content_hash' not in columns:
+        conn.execute('ALTER TABLE scholarships ADD COLUMN content_hash TEXT')
+
+
+def _values(sch):
+    return tuple(sch.get(field, _DEFAULTS.get(field, '')) for field in CONTENT_FIELDS)
+
+
+def content_hash(values):
+    payload = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _existing(conn, keys):
+    """{(name, country): (id, content_hash)} للمفاتيح المطلوبة فقط"""
+    found = {}
+    keys = list(keys)
+    for i in range(0, len(keys), _CHUNK):
+        chunk = keys[i:i + _CHUNK]
+        placeholders = ','.join('(?, ?)' for _ in chunk)
+        params = [part for key in chunk for part in key]
+        rows = conn.execute(f'''
+            SELECT name, country, id, content_hash FROM scholarships
+            WHERE (name, country) IN (VALUES {placeholders})
+        ''', params).fetchall()
+        for name, country, sid, digest in rows:
+            found[(name, country)] = (sid, digest)
+    return found
+
+
+def upsert_scholarships(scholarships_list):
+    """حفظ المنح وإرجاع {'inserted', 'updated', 'unchanged', 'changes', 'merged'}"""
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'changes': 0, 'merged': 0}
+    if not scholarships_list:
+        return counts
+
+    today = datetime.now().strftime('%Y-%m-%d')
+
+    with db.transaction() as conn:
+        plan = scholarship_dedup.plan(conn, scholarships_list)
+        counts['merged'] = plan.merged
+        scholarship_dedup.apply_renames(conn, plan.renames)
+
+        # آخر نسخة من نفس المنحة في الدفعة هي المعتمدة (مثل سلوك REPLACE السابق)
+        incoming = {}
+        for sch in plan.records:
+            try:
+                values = _values(sch)
+            except Exception as e:
+                logger.error(f"خطأ في حفظ المنحة: {e}")
+                continue
+            incoming[(values[0], values[1])] = values
+
+        existing = _existing(conn, incoming)
+
+        rows = []
+        degrees = {}
+        changed = []
+        for key, values in incoming.items():
+            digest = content_hash(values)
+            current = existing.get(key)
+            if current is not None and current[1] == digest:
+                counts['unchanged'] += 1
+                continue
+
+            counts['updated' if current is not None else 'inserted'] += 1
+            if current is not None:
+                changed.append((current[0], key[0], dict(zip(CONTENT_FIELDS, values))))
+            mask = scholarship_codes.degree_mask(values[7])
+            degrees[key] = mask
+            rows.append(values + (scholarship_codes.funding_code(values[6]), mask)
+                        + deadlines.columns(values[3]) + (digest, today))
+
+        if not rows:
+            _record_sources(conn, plan.sources)
+            return counts
+
+        updates = scholarship_changes.detect(conn, changed)
+        db.executemany(_UPSERT_SQL, rows)
+        scholarship_changes.record(conn, updates)
+        counts['changes'] = len(updates)
+
+        # الفهرس النصي وجدول المراحل للصفوف المكتوبة فقط
+        ids = _existing(conn, degrees)
+        written = [ids[key][0] for key in degrees]
+        search_index.index_scholarships(conn, written)
+        scholarship_codes.sync_degrees(conn, [(ids[key][0], mask) for key, mask in degrees.items()])
+        _record_sources(conn, plan.sources)
+
+    return counts
+
+
+def _record_sources(conn, sources):
+    ids = _existing(conn, {key for key, _, _, _ in sources})
+    scholarship_dedup.record_sources(conn, sources, {key: found[0] for key, found in ids.items()})
@@ -0,0 +1,157 @@
+import gc
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+import tracemalloc
+
+from scrapers import fetch, fixtures, health, http_cache
+from scrapers.fetch import FetchJob
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# ⏱️ قياس أداء المحللات على الـ fixtures
+# ============================================
+#
+# python -m scrapers.bench record   تسجيل صفحات المصادر الحية
+# python -m scrapers.bench replay   تشغيل مسار الجلب كاملاً على سيرفر الإعادة
+# python -m scrapers.bench run      زمن التحليل لكل صفحة، عدد المنح، التخصيصات، صفحة/ثانية
+#
+# التخصيصات من tracemalloc مع إيقاف الـ gc أثناء التحليل، فالرقم يشمل كائنات
+# الشجرة التي تُرمى بعد التحليل (تقريبي لكنه ثابت بين التشغيلات للمقارنة).
+
+DEFAULT_REPEAT = 20
+
+
+def _allocations(fixture):
+    """(عدد التخصيصات، أقصى ذاكرة بالبايت) لتحليل واحد"""
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        result = fixture.parse(fixture.body, **fixture.params)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    del result
+    return sum(stat.count for stat in snapshot.statistics('filename')), peak
+
+
+def measure(fixture, repeat=DEFAULT_REPEAT):
+    """قياس صفحة واحدة: زمن كل تكرار بالـ ms وعدد المنح والتخصيصات"""
+    items = len(fixture.parse(fixture.body, **fixture.params))   # تسخين
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fixture.parse(fixture.body, **fixture.params)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    allocations, peak = _allocations(fixture)
+    return {
+        'source': fixture.source,
+        'parser': fixture.parser,
+        'file': fixture.file,
+        'kb': len(fixture.body) / 1024,
+        'items': items,
+        'median_ms': statistics.median(timings),
+        'min_ms': min(timings),
+        'total_ms': sum(timings),
+        'allocations': allocations,
+        'peak_kb': peak / 1024,
+    }
+
+
+def summarize(pages, repeat):
+    """لكل محلل: عدد الصفحات والمنح ومتوسط الزمن وصفحة/ثانية"""
+    parsers = {}
+    for page in pages:
+        entry = parsers.setdefault(page['parser'], {'pages': 0, 'items': 0, 'total_ms': 0.0, 'allocations': 0})
+        entry['pages'] += 1
+        entry['items'] += page['items']
+        entry['total_ms'] += page['total_ms']
+        entry['allocations'] += page['allocations']
+
+    for entry in parsers.values():
+        runs = entry['pages'] * repeat
+        entry['avg_ms'] = entry['total_ms'] / runs
+        entry['pages_per_sec'] = runs / (entry['total_ms'] / 1000) if entry['total_ms'] else 0.0
+    return parsers
+
+
+def run(directory=fixtures.FIXTURES_DIR, repeat=DEFAULT_REPEAT, parser=None):
+    pages = [
+        measure(fixture, repeat) for fixture in fixtures.load(directory)
+        if parser is None or fixture.parser == parser
+    ]
+    return {'repeat': repeat, 'pages': pages, 'parsers': summarize(pages, repeat)}
+
+
+def print_report(report):
+    print(f"{'page':<38} {'KB':>7} {'items':>6} {'median ms':>10} {'min ms':>8} {'allocs':>9} {'peak KB':>8}")
+    for page in report['pages']:
+        print(f"{page['file']:<38} {page['kb']:>7.0f} {page['items']:>6} {page['median_ms']:>10.2f} "
+              f"{page['min_ms']:>8.2f} {page['allocations']:>9} {page['peak_kb']:>8.0f}")
+
+    print()
+    print(f"{'parser':<28} {'pages':>6} {'items':>6} {'avg ms':>8} {'pages/s':>9} {'allocs/page':>12}")
+    for name, entry in report['parsers'].items():
+        print(f"{name:<28} {entry['pages']:>6} {entry['items']:>6} {entry['avg_ms']:>8.2f} "
+              f"{entry['pages_per_sec']:>9.1f} {entry['allocations'] // entry['pages']:>12}")
+
+# ============================================
+# ▶️ مسار الجلب الكامل على سيرفر الإعادة
+# ============================================
+
+async def _replay_jobs(jobs):
+    start = time.perf_counter()
+    async for job, results in fetch.stream(jobs):
+        print(f"{job.source:<20} {len(results):>4} منحة  {job.url}")
+    print(f"⏱️ {len(jobs)} صفحة في {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+def replay(directory=fixtures.FIXTURES_DIR):
+    """تشغيل fetch.stream على الـ fixtures عبر السيرفر المحلي (كاش الصفحات في الذاكرة)"""
+    http_cache.CACHE_PATH = ':memory:'
+    # لا نخلط طلبات الإعادة بصحة المصادر الحقيقية
+    health.ENABLED = False
+    recorded = fixtures.load(directory)
+    jobs = [FetchJob(fixture.source, fixture.url, fixture.parse, **fixture.params) for fixture in recorded]
+    try:
+        with fixtures.ReplayServer(recorded):
+            asyncio.run(_replay_jobs(jobs))
+    finally:
+        fetch.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m scrapers.bench')
+    parser.add_argument('command', choices=('record', 'replay', 'run'))
+    parser.add_argument('--dir', default=fixtures.FIXTURES_DIR, help='مجلد الـ fixtures')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='تكرارات القياس لكل صفحة')
+    parser.add_argument('--parser', help='قياس محلل واحد فقط (مثلاً parse_scholars4dev)')
+    parser.add_argument('--json', help='حفظ نتائج run في ملف JSON للمقارنة')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        fixtures.record(directory=args.dir)
+    elif args.command == 'replay':
+        replay(args.dir)
+    else:
+        # سطر "وجدنا N منحة" لكل تكرار يغطي على التقرير
+        logging.getLogger('scrapers.parsers').setLevel(logging.WARNING)
+        report = run(args.dir, args.repeat, args.parser)
+        print_report(report)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import os
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🔌 عميل HTTP مشترك (keep-alive + retry)
+# ============================================
+#
+# Session واحدة لكل المصادر: اتصال TCP/TLS يبقى مفتوحاً ويُعاد استخدامه
+# لنفس الـ host بين الطلبات وبين تشغيلات التحديث، مع إعادة المحاولة بتأخير
+# متزايد عند 429 و 5xx فقط. انتهاء المهلة أو فشل الاتصال لا يُعاد (وإلا يحجز
+# الطلب thread الجلب أضعاف المهلة) بل يُحسب فوراً على قاطع الدائرة، وكذلك
+# Retry-After أطول من RETRY_AFTER_MAX: نرجع الرد بدل النوم داخل الـ thread.
+
+POOL_HOSTS = 20                                      # عدد الـ hosts المحتفظ باتصالاتهم
+POOL_SIZE = int(os.getenv("FETCH_CONCURRENCY", 8))   # اتصالات لكل host
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5                                  # 0.5s, 1s, 2s
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", 5))
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    # gzip/deflate دائماً، و br تلقائياً لو مكتبة brotli مثبتة
+    'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+    'Connection': 'keep-alive',
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+# وضع الإعادة (scrapers.fixtures): الطلبات تذهب لسيرفر محلي بدل المواقع
+_replay_base = None
+
+
+class _Retry(Retry):
+    """Retry لا ينتظر Retry-After طويل: الرد (429/503) يرجع كما هو ويُحسب فشلاً"""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and self.respect_retry_after_header:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > RETRY_AFTER_MAX:
+                raise MaxRetryError(_pool, url, f"Retry-After {retry_after:.0f}s")
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _build_session():
+    retry = _Retry(
+        total=RETRY_TOTAL,
+        connect=0,
+        read=False,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE,
+                          max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def replay_path(url):
+    """مسار الرابط على سيرفر الإعادة: host/path?query"""
+    parts = urlsplit(url)
+    return f"/{parts.netloc}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else '')
+
+
+def set_replay(base_url):
+    """توجيه كل الطلبات إلى base_url (None = المواقع الحقيقية)"""
+    global _replay_base
+    _replay_base = base_url.rstrip('/') if base_url else None
+
+
+def get(url, timeout=15, **kwargs):
+    """GET عبر الـ Session المشتركة"""
+    if _replay_base:
+        url = _replay_base + replay_path(url)
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def get_pool_stats():
+    """{host: {'requests', 'connections', 'reused'}} من pools الـ urllib3"""
+    if _session is None:
+        return {}
+
+    stats = {}
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            entry = stats.setdefault(pool.host, {'requests': 0, 'connections': 0, 'reused': 0})
+            entry['requests'] += pool.num_requests
+            entry['connections'] += pool.num_connections
+            entry['reused'] += max(pool.num_requests - pool.num_connections, 0)
+    return stats
+
+
+def close():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,283 @@
+import os
+import asyncio
+import logging
+import time
+import weakref
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit
+
+import requests
+
+from scrapers import client, health, http_cache, limits
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🌐 الجلب المتوازي للمصادر الحية
+# ============================================
+#
+# كل مصدر = FetchJob (رابط + دالة تحليل). الطلبات تعمل بالتوازي على threads
+# بحد أقصى عام وحد لكل host، والنتائج تخرج بترتيب انتهاء كل مصدر،
+# فزمن البحث = أبطأ مصدر واحد بدل مجموع كل المصادر.
+# التحليل (CPU) مرحلة منفصلة في process pool خارج حدود الجلب، فبينما
+# تُحلل صفحة مصدر يستمر جلب المصادر الأخرى ولا يتوقف الـ event loop.
+
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", 8))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", 2))
+# 0 = التحليل في threads الجلب بدون processes
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+# الـ pool يُنشأ بعد بدء threads الجلب والكاتب وPTB، و fork عندها ينسخ locks
+# (logging/sqlite/urllib3) قد تكون محجوزة فيعلق العامل؛ forkserver يبدأ
+# العمال من عملية نظيفة بلا threads (والمحللات دوال على مستوى الموديول تُرسل بـ pickle)
+PARSE_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix='fetch')
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+# الـ semaphores مرتبطة بالـ event loop، لذلك نحتفظ بنسخة لكل loop
+_semaphores = weakref.WeakKeyDictionary()
+
+
+class SourceError(Exception):
+    """فشل من جهة الموقع (حظر/ضغط/خطأ سيرفر) يُحسب على قاطع الدائرة"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def _is_failure(status):
+    return status in (403, 429) or status >= 500
+
+
+class Page:
+    """نتيجة طلب واحد؛ body = None لو لا تحتاج تحليل (304/نفس المحتوى/status آخر)"""
+    __slots__ = ('body', 'digest', 'headers', 'fetch_ms', 'status', 'size')
+
+    def __init__(self, body, digest, headers, fetch_ms, status=200, size=0):
+        self.body = body
+        self.digest = digest
+        self.headers = headers
+        self.fetch_ms = fetch_ms
+        self.status = status
+        self.size = size          # البايتات المستلمة فعلاً
+
+
+class FetchJob:
+    __slots__ = ('source', 'url', 'parse', 'timeout', 'params')
+
+    def __init__(self, source, url, parse, timeout=15, **params):
+        self.source = source
+        self.url = url
+        self.parse = parse
+        self.timeout = timeout
+        # تمرر لدالة التحليل (country, major...)
+        self.params = params
+
+    @property
+    def host(self):
+        return urlsplit(self.url).netloc
+
+    def __repr__(self):
+        return f"FetchJob({self.source!r}, {self.url!r})"
+
+
+def _get_semaphores():
+    loop = asyncio.get_running_loop()
+    semaphores = _semaphores.get(loop)
+    if semaphores is None:
+        semaphores = _semaphores[loop] = {'global': asyncio.Semaphore(FETCH_CONCURRENCY), 'hosts': {}}
+    return semaphores
+
+
+def _host_limit(semaphores, host):
+    semaphore = semaphores['hosts'].get(host)
+    if semaphore is None:
+        semaphore = semaphores['hosts'][host] = asyncio.Semaphore(FETCH_PER_HOST)
+    return semaphore
+
+
+def _get(url, timeout, headers=None):
+    return client.get(url, timeout=timeout, headers=headers)
+
+
+def _get_parse_pool():
+    global _parse_pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                                              mp_context=multiprocessing.get_context(PARSE_START_METHOD))
+            logger.info(f"🧩 process pool للتحليل: {PARSE_WORKERS} عامل")
+        return _parse_pool
+
+
+def _reset_parse_pool(wait=False):
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=wait, cancel_futures=True)
+            _parse_pool = None
+
+
+def _page(response, start, body=None, digest=None):
+    return Page(body, digest, dict(response.headers), (time.perf_counter() - start) * 1000,
+                response.status_code, len(response.content))
+
+
+def _fetch(job):
+    """جلب مصدر واحد (يعمل في thread): يرجع (نتائج, Page) لو الصفحة لم تتغير
+    وعندنا تحليلها، أو (None, Page) لو تحتاج تحليل"""
+    start = time.perf_counter()
+    entry = http_cache.lookup(job.url)
+    key = http_cache.params_key(job.params)
+
+    response = _get(job.url, job.timeout, http_cache.conditional_headers(entry))
+    status = response.status_code
+
+    if status == 304 and entry is not None:
+        results = entry.results_for(key)
+        if results is not None:
+            http_cache.record('not_modified')
+            logger.info(f"🗂️ {job.source}: لم تتغير (304)، {len(results)} نتيجة من الكاش")
+            return results, _page(response, start)
+        body = entry.body
+    elif status == 200:
+        body = response.content
+    elif _is_failure(status):
+        raise SourceError(f"HTTP {status}", status)
+    else:
+        logger.warning(f"⚠️ {job.source}: HTTP {status}")
+        return [], _page(response, start)
+
+    digest = http_cache.body_hash(body)
+    if entry is not None and entry.body_hash == digest:
+        results = entry.results_for(key)
+        if results is not None:
+            http_cache.record('same_body')
+            logger.info(f"🗂️ {job.source}: نفس المحتوى، {len(results)} نتيجة من الكاش")
+            return results, _page(response, start)
+
+    http_cache.record('misses')
+    return None, _page(response, start, body, digest)
+
+
+async def _parse(job, page):
+    """تحليل الصفحة في process pool (أو thread لو PARSE_WORKERS=0) ثم حفظها في الكاش"""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    parse = functools.partial(job.parse, page.body, **job.params)
+
+    pool = _get_parse_pool()
+    try:
+        results = await loop.run_in_executor(pool or _executor, parse)
+    except BrokenProcessPool:
+        # عامل مات (ذاكرة/signal): نعيد إنشاء الـ pool للطلبات القادمة
+        _reset_parse_pool()
+        raise
+
+    parse_ms = (time.perf_counter() - start) * 1000
+    health.record(job.source, page.status, page.size, page.fetch_ms, parse_ms, len(results))
+    await loop.run_in_executor(_executor, http_cache.store, job.url, page.headers, page.body,
+                               page.digest, job.params, results)
+    logger.info(f"🌐 {job.source}: {len(results)} نتيجة (جلب {page.fetch_ms:.0f}ms، تحليل {parse_ms:.0f}ms)")
+    return results
+
+
+def _cached(job):
+    """آخر نتائج محفوظة للمصدر بدون شبكة (عند فتح القاطع أو الفشل)"""
+    entry = http_cache.lookup(job.url)
+    results = entry.results_for(http_cache.params_key(job.params)) if entry is not None else None
+    return results or []
+
+
+async def run_job(job):
+    """تنفيذ مصدر واحد ضمن الحدود العامة وحد الـ host، وحد المعدل وقاطع الدائرة"""
+    loop = asyncio.get_running_loop()
+    breaker = limits.get_breaker(job.host)
+
+    if not breaker.allow():
+        results = await loop.run_in_executor(_executor, _cached, job)
+        health.record(job.source, items=len(results), error='CircuitOpen')
+        logger.info(f"🔴 {job.source}: القاطع مفتوح، {len(results)} نتيجة من الكاش")
+        return results
+
+    # الإلغاء (stream توقف مبكراً أو انتهت مهلة المهمة) يتخطى record_success/record_failure،
+    # فنحرر الطلب التجريبي وإلا يبقى القاطع half-open للأبد
+    try:
+        semaphores = _get_semaphores()
+        async with semaphores['global'], _host_limit(semaphores, job.host):
+            wait = limits.get_bucket(job.host).reserve()
+            if wait:
+                await asyncio.sleep(wait)
+
+            start = time.perf_counter()
+            try:
+                results, page = await loop.run_in_executor(_executor, _fetch, job)
+            except (SourceError, requests.RequestException) as e:
+                breaker.record_failure(e)
+                health.record(job.source, getattr(e, 'status', None), fetch_ms=(time.perf_counter() - start) * 1000,
+                              error=health.error_class(e))
+                logger.error(f"❌ خطأ في {job.source}: {e}")
+                return await loop.run_in_executor(_executor, _cached, job)
+            except Exception as e:
+                # خطأ محلي (كاش/برمجي) وليس من الموقع: لا نحسبه فشلاً ولا نجاحاً،
+                # فقط نحرر الطلب التجريبي لو كان القاطع half-open
+                breaker.release_probe()
+                health.record(job.source, error=health.error_class(e))
+                logger.error(f"❌ خطأ في {job.source}: {e}")
+                return []
+
+            breaker.record_success()
+    except BaseException:
+        breaker.release_probe()
+        raise
+
+    if results is not None:
+        health.record(job.source, page.status, page.size, page.fetch_ms, items=len(results),
+                      error=None if page.status in (200, 304) else f"HTTP{page.status}")
+        return results
+
+    # التحليل خارج حدود الجلب حتى يبدأ الطلب التالي لنفس الـ host فوراً
+    try:
+        return await _parse(job, page)
+    except Exception as e:
+        health.record(job.source, page.status, page.size, page.fetch_ms, error=health.error_class(e))
+        logger.error(f"❌ خطأ في تحليل {job.source}: {e}")
+        return []
+
+
+async def _tagged(job):
+    return job, await run_job(job)
+
+
+async def stream(jobs):
+    """تشغيل كل المصادر معاً وإرجاع (job, نتائج) بترتيب الانتهاء"""
+    tasks = [asyncio.ensure_future(_tagged(job)) for job in jobs]
+    try:
+        for done in asyncio.as_completed(tasks):
+            yield await done
+    finally:
+        # لو توقف المستهلك مبكراً لا نترك طلبات معلقة
+        for task in tasks:
+            task.cancel()
+
+
+async def gather(jobs):
+    """كل النتائج مجمعة (بعد انتهاء أبطأ مصدر)"""
+    results = []
+    async for _, batch in stream(jobs):
+        results.extend(batch)
+    return results
+
+
+def shutdown():
+    """إيقاف الـ pools عند إغلاق البوت"""
+    _reset_parse_pool(wait=True)
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,180 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scrapers import client, live, parsers
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 📼 تسجيل وإعادة صفحات المصادر (fixtures)
+# ============================================
+#
+# record: يجلب صفحات المصادر الحية كما هي ويحفظها في مجلد مع index.json
+# (الرابط، المصدر، دالة التحليل، معاملاتها). replay: سيرفر HTTP محلي يقدم نفس
+# الصفحات، و client.set_replay يوجه له كل الطلبات، فيعمل مسار الجلب والتحليل
+# والكاش كاملاً بدون إنترنت وبنتائج ثابتة. scrapers.bench يقيس المحللات عليها.
+
+FIXTURES_DIR = os.getenv(
+    "SCRAPER_FIXTURES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'fixtures'),
+)
+INDEX_FILE = 'index.json'
+
+# البحثات المسجلة افتراضياً: (country, major, keyword)
+RECORD_SEARCHES = [
+    (None, None, None),
+    ('germany', 'engineering', None),
+    ('uk', 'cs', None),
+    ('usa', 'business', 'masters'),
+]
+
+
+class Fixture:
+    __slots__ = ('url', 'source', 'parser', 'params', 'file', 'status', 'content_type', 'body')
+
+    def __init__(self, url, source, parser, params, file, status=200, content_type='text/html', body=None):
+        self.url = url
+        self.source = source
+        self.parser = parser          # اسم الدالة في scrapers.parsers
+        self.params = params
+        self.file = file
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+
+    @property
+    def parse(self):
+        return getattr(parsers, self.parser)
+
+    @property
+    def etag(self):
+        return '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+
+    def to_dict(self):
+        return {'url': self.url, 'source': self.source, 'parser': self.parser, 'params': self.params,
+                'file': self.file, 'status': self.status, 'content_type': self.content_type}
+
+    def __repr__(self):
+        return f"Fixture({self.source!r}, {self.url!r})"
+
+
+def _file_name(job):
+    digest = hashlib.sha1(job.url.encode()).hexdigest()[:12]
+    return f"{job.source}/{digest}.html"
+
+
+def load(directory=FIXTURES_DIR):
+    """قائمة Fixture بمحتواها من index.json"""
+    with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+        index = json.load(f)
+
+    fixtures = []
+    for entry in index['fixtures']:
+        fixture = Fixture(**entry)
+        with open(os.path.join(directory, fixture.file), 'rb') as f:
+            fixture.body = f.read()
+        fixtures.append(fixture)
+    return fixtures
+
+# ============================================
+# ⏺️ التسجيل
+# ============================================
+
+def record(searches=None, directory=FIXTURES_DIR):
+    """جلب صفحات كل البحثات وحفظها؛ الرابط المكرر يُسجل مرة واحدة (بمعاملات أول بحث)"""
+    fixtures = {}
+    for country, major, keyword in searches or RECORD_SEARCHES:
+        for job in live.live_jobs(country, major, keyword):
+            if job.url in fixtures:
+                continue
+            try:
+                response = client.get(job.url, timeout=job.timeout)
+            except Exception as e:
+                logger.error(f"❌ {job.source}: تعذر تسجيل {job.url}: {e}")
+                continue
+
+            fixture = Fixture(job.url, job.source, job.parse.__name__, job.params, _file_name(job),
+                              response.status_code, response.headers.get('Content-Type', 'text/html'),
+                              response.content)
+            path = os.path.join(directory, fixture.file)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(fixture.body)
+            fixtures[job.url] = fixture
+            logger.info(f"⏺️ {job.source}: HTTP {fixture.status}، {len(fixture.body) / 1024:.0f}KB")
+
+    with open(os.path.join(directory, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'recorded': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'fixtures': [fixture.to_dict() for fixture in fixtures.values()],
+        }, f, ensure_ascii=False, indent=2)
+    logger.info(f"📼 تم تسجيل {len(fixtures)} صفحة في {directory}")
+    return list(fixtures.values())
+
+# ============================================
+# ▶️ الإعادة (سيرفر محلي)
+# ============================================
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'FixtureReplay'
+
+    def do_GET(self):
+        fixture = self.server.fixtures.get(self.path)
+        if fixture is None:
+            self.send_error(404)
+            return
+
+        # ETag ثابت حتى يعمل مسار 304 في http_cache كما مع المواقع الحقيقية
+        if self.headers.get('If-None-Match') == fixture.etag:
+            self.send_response(304)
+            self.send_header('ETag', fixture.etag)
+            self.end_headers()
+            return
+
+        self.send_response(fixture.status)
+        self.send_header('Content-Type', fixture.content_type)
+        self.send_header('Content-Length', str(len(fixture.body)))
+        self.send_header('ETag', fixture.etag)
+        self.end_headers()
+        self.wfile.write(fixture.body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"▶️ {self.address_string()} {format % args}")
+
+
+class ReplayServer:
+    """سيرفر HTTP محلي للـ fixtures؛ كـ context manager يوجه client إليه"""
+
+    def __init__(self, fixtures, host='127.0.0.1', port=0):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fixtures = {client.replay_path(fixture.url): fixture for fixture in fixtures}
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-replay', daemon=True)
+        self._thread.start()
+        client.set_replay(self.base_url)
+        logger.info(f"▶️ سيرفر الإعادة على {self.base_url} ({len(self._server.fixtures)} صفحة)")
+        return self
+
+    def stop(self):
+        client.set_replay(None)
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
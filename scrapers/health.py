@@ -0,0 +1,113 @@
+import os
+import math
+import time
+import logging
+
+import db
+import write_buffer
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🩺 صحة المصادر (ring buffer لكل طلب)
+# ============================================
+#
+# كل جلب/تحليل يُسجل صفاً: المصدر، HTTP status، الحجم، زمن الجلب والتحليل،
+# عدد المنح ونوع الخطأ. الجدول حلقة بعدد صفوف ثابت (slot = seq % RING_SIZE)
+# فلا يكبر ولا يحتاج تنظيف، والكتابة عبر write_buffer فلا تنتظر threads الجلب
+# القاعدة. لوحة الأدمن تعرض p50/p95 ونسبة النجاح لكل مصدر آخر 24 ساعة.
+
+RING_SIZE = int(os.getenv("SCRAPER_HEALTH_ROWS", 5000))
+ENABLED = os.getenv("SCRAPER_HEALTH", "1") != "0"
+
+_INSERT_SQL = '''
+    INSERT OR REPLACE INTO scraper_health
+    (slot, seq, recorded_at, source, status, bytes, fetch_ms, parse_ms, items, error)
+    SELECT next % ?, next, ?, ?, ?, ?, ?, ?, ?, ?
+    FROM (SELECT coalesce(MAX(seq), 0) + 1 AS next FROM scraper_health)
+'''
+
+
+def create_schema(conn):
+    """جدول الحلقة (ترحيل)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scraper_health (
+            slot INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            recorded_at INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            status INTEGER,
+            bytes INTEGER,
+            fetch_ms INTEGER,
+            parse_ms INTEGER,
+            items INTEGER,
+            error TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_scraper_health_seq ON scraper_health(seq)')
+
+
+def record(source, status=None, size=None, fetch_ms=None, parse_ms=None, items=None, error=None):
+    """تسجيل طلب واحد؛ error = اسم نوع الخطأ (None = نجاح)"""
+    if not ENABLED:
+        return
+    write_buffer.enqueue(_INSERT_SQL, (
+        RING_SIZE, int(time.time()), source, status, size,
+        None if fetch_ms is None else int(fetch_ms),
+        None if parse_ms is None else int(parse_ms),
+        items, error,
+    ))
+
+
+def error_class(error):
+    return type(error).__name__
+
+# ============================================
+# 📊 الملخص
+# ============================================
+
+def _percentile(values, p):
+    """nearest-rank على قائمة مرتبة"""
+    if not values:
+        return None
+    return values[max(math.ceil(p * len(values)) - 1, 0)]
+
+
+def summary(hours=24):
+    """{source: {'requests', 'success_rate', 'fetch_p50', 'fetch_p95', 'parse_p50', 'parse_p95',
+    'avg_items', 'empty', 'errors': {نوع: عدد}}} لآخر hours ساعة"""
+    rows = db.fetchall('''
+        SELECT source, fetch_ms, parse_ms, items, error FROM scraper_health
+        WHERE recorded_at >= ?
+    ''', (int(time.time()) - hours * 3600,))
+
+    grouped = {}
+    for source, fetch_ms, parse_ms, items, error in rows:
+        entry = grouped.setdefault(source, {'fetch': [], 'parse': [], 'items': [], 'errors': {}, 'requests': 0})
+        entry['requests'] += 1
+        if fetch_ms is not None:
+            entry['fetch'].append(fetch_ms)
+        if parse_ms is not None:
+            entry['parse'].append(parse_ms)
+        if error:
+            entry['errors'][error] = entry['errors'].get(error, 0) + 1
+        else:
+            entry['items'].append(items or 0)
+
+    result = {}
+    for source, entry in sorted(grouped.items()):
+        fetch, parse = sorted(entry['fetch']), sorted(entry['parse'])
+        ok = len(entry['items'])
+        result[source] = {
+            'requests': entry['requests'],
+            'success_rate': ok / entry['requests'],
+            'fetch_p50': _percentile(fetch, 0.5),
+            'fetch_p95': _percentile(fetch, 0.95),
+            'parse_p50': _percentile(parse, 0.5),
+            'parse_p95': _percentile(parse, 0.95),
+            'avg_items': sum(entry['items']) / ok if ok else 0,
+            # نجح الطلب لكن بدون منح: غالباً تغير تصميم الصفحة
+            'empty': sum(1 for items in entry['items'] if not items),
+            'errors': entry['errors'],
+        }
+    return result
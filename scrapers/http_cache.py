@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🗂️ كاش الصفحات على القرص (conditional GET)
+# ============================================
+#
+# لكل رابط نحفظ ETag و Last-Modified وبصمة المحتوى والمحتوى نفسه ونتائج التحليل.
+# الطلب التالي يرسل If-None-Match / If-Modified-Since، وعند 304 أو محتوى مطابق
+# نرجع النتائج المحفوظة بدون أي تحليل. الحجم محدود ويُحذف الأقدم استخداماً (LRU).
+# ملف منفصل عن قاعدة البوت حتى لا تتزاحم threads الجلب مع الكاتب.
+
+CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "http_cache.db")
+CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", 50)) * 1024 * 1024
+
+_conn = None
+_lock = threading.Lock()
+
+_stats = {
+    'not_modified': 0,   # 304 من السيرفر
+    'same_body': 0,      # 200 لكن نفس المحتوى
+    'misses': 0,         # محتوى جديد/متغير (تم التحليل)
+    'stored': 0,
+    'evicted': 0,
+}
+
+
+class CacheEntry:
+    __slots__ = ('url', 'etag', 'last_modified', 'body_hash', 'body', 'params_key', 'results')
+
+    def __init__(self, url, etag, last_modified, body_hash, body, params_key, results):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_hash = body_hash
+        self.body = body
+        self.params_key = params_key
+        self.results = results
+
+    def results_for(self, params_key):
+        """النتائج المحفوظة لو كانت لنفس معايير التحليل"""
+        if self.results is None or self.params_key != params_key:
+            return None
+        return json.loads(self.results)
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_PATH, isolation_level=None, check_same_thread=False)
+        _conn.execute('PRAGMA journal_mode=WAL')
+        _conn.execute('PRAGMA synchronous=NORMAL')
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                body BLOB,
+                size INTEGER NOT NULL,
+                params_key TEXT,
+                results TEXT,
+                last_access REAL NOT NULL
+            )
+        ''')
+        _conn.execute('CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache(last_access)')
+    return _conn
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+
+def body_hash(body):
+    return hashlib.sha1(body).hexdigest()
+
+
+def lookup(url):
+    """المدخل المحفوظ للرابط (ويحدّث وقت آخر استخدام) أو None"""
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute('''
+            SELECT url, etag, last_modified, body_hash, body, params_key, results
+            FROM http_cache WHERE url = ?
+        ''', (url,)).fetchone()
+        if row is None:
+            return None
+        conn.execute('UPDATE http_cache SET last_access = ? WHERE url = ?', (time.time(), url))
+    return CacheEntry(*row)
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+    return headers
+
+
+def store(url, response_headers, body, digest, params, results):
+    """حفظ/تحديث المدخل ثم تطبيق حد الحجم"""
+    with _lock:
+        conn = _get_conn()
+        conn.execute('''
+            INSERT INTO http_cache
+            (url, etag, last_modified, body_hash, body, size, params_key, results, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag, last_modified = excluded.last_modified,
+                body_hash = excluded.body_hash, body = excluded.body, size = excluded.size,
+                params_key = excluded.params_key, results = excluded.results,
+                last_access = excluded.last_access
+        ''', (url, response_headers.get('ETag'), response_headers.get('Last-Modified'), digest,
+              body, len(body), params_key(params), json.dumps(results, ensure_ascii=False),
+              time.time()))
+        _stats['stored'] += 1
+        _evict(conn)
+
+
+def _evict(conn):
+    total = conn.execute('SELECT coalesce(SUM(size), 0) FROM http_cache').fetchone()[0]
+    if total <= CACHE_MAX_BYTES:
+        return
+
+    evicted = 0
+    for url, size in conn.execute('SELECT url, size FROM http_cache ORDER BY last_access').fetchall():
+        if total <= CACHE_MAX_BYTES:
+            break
+        conn.execute('DELETE FROM http_cache WHERE url = ?', (url,))
+        total -= size
+        evicted += 1
+
+    _stats['evicted'] += evicted
+    logger.info(f"🗂️ كاش الصفحات: حذف {evicted} صفحة (LRU)")
+
+
+def record(kind):
+    """تسجيل hit/miss: 'not_modified' أو 'same_body' أو 'misses'"""
+    with _lock:
+        _stats[kind] += 1
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+        if _conn is not None:
+            stats['entries'], stats['bytes'] = _conn.execute(
+                'SELECT COUNT(*), coalesce(SUM(size), 0) FROM http_cache'
+            ).fetchone()
+        else:
+            stats['entries'], stats['bytes'] = 0, 0
+    stats['hits'] = stats['not_modified'] + stats['same_body']
+    return stats
+
+
+def close():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
@@ -0,0 +1,159 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🚦 حد المعدل وقاطع الدائرة لكل domain
+# ============================================
+#
+# TokenBucket: لا نرسل لنفس الموقع أكثر من RATE_PER_HOST طلب/ثانية (مع دفعة BURST)
+# حتى لا يحظر الموقع عنوان البوت.
+# CircuitBreaker: بعد BREAKER_FAILURES فشل متتالي يُفتح القاطع ونرجع فوراً
+# (من الكاش أو فارغ) بدل انتظار timeout كامل، ثم بعد فترة التهدئة نسمح بطلب
+# تجريبي واحد (half-open): نجاحه يغلق القاطع وفشله يعيد فتحه بفترة أطول.
+
+RATE_PER_HOST = float(os.getenv("FETCH_RATE_PER_HOST", 1.0))
+BURST = int(os.getenv("FETCH_BURST", 3))
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 3))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", 300))
+BREAKER_MAX_COOLDOWN = 3600
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_LABELS = {
+    CLOSED: '🟢 يعمل',
+    OPEN: '🔴 متوقف مؤقتاً',
+    HALF_OPEN: '🟡 تحت التجربة',
+}
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'lock')
+
+    def __init__(self, rate=RATE_PER_HOST, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """حجز token وإرجاع ثواني الانتظار المطلوبة قبل الإرسال (0 = فوراً)"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class CircuitBreaker:
+    __slots__ = ('host', 'state', 'failures', 'opened_at', 'cooldown', 'probing',
+                 'last_error', 'trips', 'lock')
+
+    def __init__(self, host):
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self.probing = False
+        self.last_error = None
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """هل نرسل الطلب؟ في half-open نسمح بطلب تجريبي واحد فقط"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self.probing = False
+                logger.info(f"🟡 قاطع {self.host}: طلب تجريبي")
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                logger.info(f"🟢 قاطع {self.host}: عاد للعمل")
+            self.state = CLOSED
+            self.failures = 0
+            self.probing = False
+            self.cooldown = BREAKER_COOLDOWN
+
+    def release_probe(self):
+        """الطلب التجريبي انتهى بدون نتيجة (إلغاء/timeout): نسمح بتجربة جديدة"""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+
+    def record_failure(self, error):
+        with self.lock:
+            self.failures += 1
+            self.last_error = str(error)[:200]
+            if self.state == HALF_OPEN:
+                # فشل التجربة: فترة تهدئة أطول
+                self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN)
+                self._open()
+            elif self.state == CLOSED and self.failures >= BREAKER_FAILURES:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probing = False
+        self.trips += 1
+        logger.warning(f"🔴 قاطع {self.host}: مفتوح لمدة {self.cooldown:.0f}s بعد {self.failures} فشل ({self.last_error})")
+
+    def snapshot(self):
+        with self.lock:
+            retry_in = 0
+            if self.state == OPEN:
+                retry_in = max(0, self.cooldown - (time.monotonic() - self.opened_at))
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'trips': self.trips,
+                'retry_in': retry_in,
+                'last_error': self.last_error,
+            }
+
+
+_buckets = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_bucket(host):
+    with _registry_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket()
+        return bucket
+
+
+def get_breaker(host):
+    with _registry_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+def get_breaker_states():
+    """{host: snapshot} لعرضها للأدمن"""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.host: breaker.snapshot() for breaker in breakers}
@@ -0,0 +1,62 @@
+from urllib.parse import urlencode
+
+from scrapers import parsers
+from scrapers.fetch import FetchJob
+
+# ============================================
+# 🔗 المصادر الحية (بناء الطلبات)
+# ============================================
+
+# FindAMasters يغطي الدراسات العليا في هذه التخصصات فقط
+FINDAMASTERS_MAJORS = ('engineering', 'cs', 'science', 'business')
+
+
+def scholarship_portal_jobs(country=None, major=None, keyword=None):
+    params = {key: value for key, value in (('c', country), ('d', major), ('q', keyword)) if value}
+    url = f"{parsers.SCHOLARSHIP_PORTAL_URL}/scholarships"
+    if params:
+        url += "?" + urlencode(params)
+    return [FetchJob('ScholarshipPortal', url, parsers.parse_scholarship_portal,
+                     timeout=15, country=country, major=major)]
+
+
+def scholars4dev_jobs(country=None, major=None, keyword=None):
+    """أول استعلامين فقط"""
+    queries = []
+    if country:
+        queries.append(f"{country} scholarships")
+    if major:
+        queries.append(f"{major} scholarships")
+    if keyword:
+        queries.append(keyword)
+    if not queries:
+        queries = ["fully funded scholarships", "international scholarships"]
+
+    return [
+        FetchJob('Scholars4Dev', f"https://www.scholars4dev.com/?{urlencode({'s': query})}",
+                 parsers.parse_scholars4dev, timeout=15, country=country, major=major)
+        for query in queries[:2]
+    ]
+
+
+def findamasters_jobs(country=None, major=None, keyword=None):
+    url = f"{parsers.FINDAMASTERS_URL}/funding/phd-funding.aspx"
+    return [FetchJob('FindAMasters', url, parsers.parse_findamasters,
+                     timeout=10, country=country, major=major)]
+
+
+def live_jobs(country=None, major=None, keyword=None):
+    """قائمة FetchJob لكل المصادر الحية حسب معايير البحث"""
+    jobs = []
+
+    # 1. ScholarshipPortal
+    jobs.extend(scholarship_portal_jobs(country, major, keyword))
+
+    # 2. Scholars4Dev
+    jobs.extend(scholars4dev_jobs(country, major, keyword))
+
+    # 3. FindAMasters للدراسات العليا
+    if major in FINDAMASTERS_MAJORS:
+        jobs.extend(findamasters_jobs(country, major, keyword))
+
+    return jobs
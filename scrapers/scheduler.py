@@ -0,0 +1,125 @@
+import os
+import logging
+from datetime import datetime
+
+import background_jobs
+import db
+import scholarship_catalog
+import scholarship_store
+import source_runs
+from scrapers import fetch, live
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# ⏱️ جدولة التحديث لكل مصدر
+# ============================================
+#
+# كل مصدر يحدد فترة تحديثه ومهلته وأولويته، ويعمل كـ job مستقل في JobQueue
+# مع jitter عشوائي حتى لا تتزامن المصادر. التشغيل عبر background_jobs: المصدر
+# الذي ما زال يعمل (هنا أو في عملية أخرى) لا يبدأ مرة ثانية، والجلب في threads
+# والتحليل في process pool والحفظ على الـ thread الكاتب، فلا يتوقف الـ event loop.
+# نتيجة كل تشغيل تُسجل في source_runs، ومنها يُحسب أول تشغيل بعد إعادة تشغيل
+# البوت: المصدر الذي نجح قبل قليل ينتظر باقي فترته بدل إعادة الجلب فوراً.
+
+STARTUP_DELAY = 10      # ثواني قبل أول تشغيل
+STAGGER = 30            # فرق البداية بين المصادر حسب الأولوية
+JITTER_RATIO = 0.1      # jitter = 10% من الفترة
+MAX_JITTER = 300
+
+HOUR = 3600
+
+
+class Source:
+    __slots__ = ('name', 'interval', 'timeout', 'priority', 'run', 'on_start')
+
+    def __init__(self, name, run, interval, timeout, priority=10, on_start=False):
+        self.name = name
+        self.run = run            # async () -> عدد المنح
+        self.interval = int(os.getenv(f"SOURCE_INTERVAL_{name.upper()}", interval))
+        self.timeout = timeout
+        # الأقل يبدأ أولاً
+        self.priority = priority
+        # يعمل بعد كل بدء تشغيل مهما كان آخر نجاح (الكتالوج قد يتغير مع النشر)
+        self.on_start = on_start
+
+    def __repr__(self):
+        return f"Source({self.name!r}, every {self.interval}s)"
+
+
+async def _sync_catalog():
+    await db.run_write(scholarship_catalog.sync)
+    return len(scholarship_catalog.load())
+
+
+def _live(build_jobs):
+    async def run():
+        jobs = build_jobs()
+        results = []
+        background_jobs.progress('جلب الصفحات', 0, len(jobs))
+        done = 0
+        async for _, batch in fetch.stream(jobs):
+            results.extend(batch)
+            done += 1
+            background_jobs.progress('جلب الصفحات', done, len(jobs))
+        background_jobs.progress(f'حفظ {len(results)} منحة')
+        await db.run_write(scholarship_store.upsert_scholarships, results)
+        return len(results)
+    return run
+
+
+SOURCES = [
+    Source('catalog', _sync_catalog, interval=HOUR, timeout=60, priority=0, on_start=True),
+    Source('ScholarshipPortal', _live(live.scholarship_portal_jobs), interval=6 * HOUR, timeout=120, priority=1),
+    Source('Scholars4Dev', _live(live.scholars4dev_jobs), interval=6 * HOUR, timeout=120, priority=2),
+    Source('FindAMasters', _live(live.findamasters_jobs), interval=24 * HOUR, timeout=60, priority=3),
+]
+
+
+async def run_source(source):
+    """تشغيل مصدر واحد بمهلته وتسجيل النتيجة؛ يرجع عدد المنح أو None لو تم تخطيه"""
+    run = await background_jobs.run(f"source:{source.name}", source.run,
+                                    timeout=source.timeout, ttl=source.timeout * 2)
+    if run is None:
+        return None
+
+    try:
+        await db.run_write(source_runs.record_run, source.name, run.started, run.finished,
+                           run.duration_ms, run.items or 0, run.error)
+    except Exception as e:
+        logger.error(f"خطأ في تسجيل تشغيل {source.name}: {e}")
+    return run.items or 0
+
+
+async def _run_job(context):
+    await run_source(context.job.data)
+
+
+def _first_run(source, slot, last_success):
+    """ثواني حتى أول تشغيل: دوره في البداية، أو باقي الفترة منذ آخر نجاح"""
+    first = STARTUP_DELAY + slot * STAGGER
+    if source.on_start or last_success is None:
+        return first
+    age = (datetime.now() - last_success).total_seconds()
+    return max(first, int(source.interval - age))
+
+
+def schedule(job_queue):
+    """إضافة job مستقل لكل مصدر حسب أولويته"""
+    try:
+        last_successes = source_runs.last_successes()
+    except Exception as e:
+        logger.error(f"خطأ في قراءة source_runs: {e}")
+        last_successes = {}
+
+    for i, source in enumerate(sorted(SOURCES, key=lambda s: s.priority)):
+        first = _first_run(source, i, last_successes.get(source.name))
+        job_queue.run_repeating(
+            _run_job,
+            interval=source.interval,
+            first=first,
+            data=source,
+            name=f"source:{source.name}",
+            job_kwargs={'jitter': min(int(source.interval * JITTER_RATIO), MAX_JITTER)},
+        )
+        logger.info(f"⏱️ جدولة {source.name}: كل {source.interval}s، أول تشغيل بعد {first}s (مهلة {source.timeout}s)")
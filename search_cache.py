@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🧊 كاش نتائج البحث الموسع (TTL + stale-while-revalidate)
+# ============================================
+#
+# نفس (الدولة، التخصص، الكلمة) يتكرر من مستخدمين كثيرين خلال دقائق، وكل بحث
+# يجلب كل المصادر الحية. نحفظ النتائج في الذاكرة بمفتاح مطبّع:
+# - طازجة (أقل من CACHE_TTL): تُرجع مباشرة.
+# - قديمة (حتى CACHE_STALE بعدها): تُرجع فوراً ويُعاد جلبها في الخلفية.
+# - الطلبات المتطابقة أثناء الجلب تنتظر نفس الجلب (single-flight) بدل تكراره.
+# الحجم محدود بعدد المفاتيح وبالذاكرة التقريبية، ويُحذف الأقدم استخداماً (LRU).
+
+CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 600))
+CACHE_STALE = int(os.getenv("SEARCH_CACHE_STALE", 3600))
+CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 200))
+CACHE_MAX_BYTES = int(float(os.getenv("SEARCH_CACHE_MAX_MB", 20)) * 1024 * 1024)
+
+_entries = OrderedDict()    # {key: _Entry}
+_inflight = {}              # {key: asyncio.Future} للجلب الجاري
+_refresh_tasks = set()      # مرجع قوي لمهام الخلفية حتى لا يجمعها الـ gc
+_bytes = 0
+
+_stats = {
+    'hits': 0,
+    'stale_hits': 0,
+    'misses': 0,            # جلب فعلي من المصادر
+    'coalesced': 0,         # انتظر جلباً جارياً لنفس المفتاح
+    'refreshes': 0,         # إعادة جلب في الخلفية
+    'evicted': 0,
+}
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at', 'size')
+
+    def __init__(self, value, stored_at, size):
+        self.value = value
+        self.stored_at = stored_at
+        self.size = size
+
+
+def make_key(country=None, major=None, keyword=None):
+    """مفتاح مطبّع: بدون فراغات زائدة وبدون حالة الأحرف، والفارغ = None"""
+    def normalize(value):
+        if not value:
+            return None
+        return ' '.join(str(value).split()).casefold() or None
+    return normalize(country), normalize(major), normalize(keyword)
+
+
+def _sizeof(value):
+    """حجم تقريبي لقائمة (source, [dict]) بالبايت"""
+    size = sys.getsizeof(value)
+    for source, results in value:
+        size += sys.getsizeof(source) + sys.getsizeof(results)
+        for record in results:
+            size += sys.getsizeof(record)
+            size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in record.items())
+    return size
+
+
+def _drop(key):
+    global _bytes
+    entry = _entries.pop(key, None)
+    if entry is not None:
+        _bytes -= entry.size
+
+
+def store(key, value):
+    global _bytes
+    _drop(key)
+    entry = _Entry(value, time.monotonic(), _sizeof(value))
+    _entries[key] = entry
+    _bytes += entry.size
+
+    while _entries and (len(_entries) > CACHE_MAX_ENTRIES or _bytes > CACHE_MAX_BYTES):
+        oldest = next(iter(_entries))
+        _drop(oldest)
+        _stats['evicted'] += 1
+
+
+def lookup(key, refresh=None):
+    """القيمة لو موجودة (طازجة أو قديمة) أو None؛ القديمة تُجلب في الخلفية بـ refresh()"""
+    entry = _entries.get(key)
+    if entry is None:
+        return None
+
+    age = time.monotonic() - entry.stored_at
+    if age > CACHE_TTL + CACHE_STALE:
+        _drop(key)
+        return None
+
+    _entries.move_to_end(key)
+    if age <= CACHE_TTL:
+        _stats['hits'] += 1
+    else:
+        _stats['stale_hits'] += 1
+        if refresh is not None and key not in _inflight:
+            _stats['refreshes'] += 1
+            task = asyncio.ensure_future(_revalidate(key, refresh))
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+    return entry.value
+
+
+async def wait_pending(key):
+    """نتيجة الجلب الجاري لنفس المفتاح، أو None لو لا يوجد (أو فشل)"""
+    future = _inflight.get(key)
+    if future is None:
+        return None
+    _stats['coalesced'] += 1
+    return await asyncio.shield(future)
+
+
+@contextmanager
+def filling(key, background=False):
+    """الجلب الوحيد لهذا المفتاح: يُجمع في القائمة المرجعة ويُحفظ عند الانتهاء بنجاح
+
+    لو فشل أو توقف المستهلك مبكراً لا يُحفظ شيء، والمنتظرون يأخذون None فيجلبون بأنفسهم.
+    """
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    if not background:
+        _stats['misses'] += 1
+    collected = []
+    try:
+        yield collected
+    except BaseException:
+        future.set_result(None)
+        raise
+    else:
+        store(key, collected)
+        future.set_result(collected)
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+
+async def _revalidate(key, load):
+    try:
+        with filling(key, background=True) as collected:
+            collected.extend(await load())
+        logger.info(f"🧊 تحديث نتائج البحث في الخلفية: {key}")
+    except Exception as e:
+        logger.error(f"❌ خطأ في تحديث كاش البحث {key}: {e}")
+
+
+def clear():
+    global _bytes
+    _entries.clear()
+    _bytes = 0
+
+
+def get_stats():
+    served = _stats['hits'] + _stats['stale_hits'] + _stats['coalesced']
+    total = served + _stats['misses']
+    stats = dict(_stats)
+    stats.update(
+        entries=len(_entries),
+        bytes=_bytes,
+        inflight=len(_inflight),
+        hit_ratio=served / total if total else 0.0,
+    )
+    return stats
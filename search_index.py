@@ -0,0 +1,152 @@
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🔎 فهرس البحث النصي الكامل (FTS5)
+# ============================================
+#
+# النص يتم توحيده في بايثون قبل الفهرسة وقبل البحث (نفس الدالة للطرفين)
+# لأن unicode61 لا يزيل التشكيل العربي ولا يوحد أشكال الألف والتاء المربوطة.
+
+FTS_TABLE = "scholarships_fts"
+FTS_COLUMNS = ('name', 'description', 'country', 'major', 'requirements', 'benefits')
+
+# أوزان bm25 بنفس ترتيب الأعمدة: الاسم أهم من الوصف
+BM25_WEIGHTS = (10.0, 2.0, 4.0, 4.0, 1.0, 1.0)
+RANK_EXPR = f"bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)})"
+
+_TASHKEEL = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_CHAR_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه',
+})
+_WORD = re.compile(r'[^\W_]+')
+_ARTICLES = ('وال', 'بال', 'فال', 'كال', 'لل', 'ال')
+
+
+def _strip_article(word):
+    for prefix in _ARTICLES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+            return word[len(prefix):]
+    return word
+
+
+def tokenize(text):
+    """كلمات النص بعد التوحيد (عربي + إنجليزي)"""
+    # "ال" تُحذف من الكلمة الأصلية قبل توحيد الهمزات، وإلا تصبح "ألمانية"
+    # "المانيه" فتفقد أول حرفين بينما "الألمانية" تبقى "المانيه"
+    text = _TASHKEEL.sub('', text or '').lower()
+    return [_strip_article(w).translate(_CHAR_MAP) for w in _WORD.findall(text)]
+
+
+def normalize_text(text):
+    return ' '.join(tokenize(text))
+
+
+def create_index(conn):
+    """إنشاء جدول FTS5 وtrigger الحذف (يُستدعى من الترحيلات)"""
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {', '.join(FTS_COLUMNS)},
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    # الإدراج يتم من save_scholarships_to_db لأن التوحيد يتم في بايثون،
+    # أما الحذف (ومنه حذف INSERT OR REPLACE) فيكفيه trigger
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS scholarships_fts_delete
+        AFTER DELETE ON scholarships BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+    ''')
+    rebuild_index(conn)
+
+
+def index_scholarships(conn, ids):
+    """تحديث صفوف الفهرس لمنح محددة (داخل نفس معاملة الحفظ)"""
+    ids = list(ids)
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'''
+            SELECT id, {', '.join(FTS_COLUMNS)} FROM scholarships WHERE id IN ({placeholders})
+        ''', chunk).fetchall()
+        conn.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+        conn.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(row[0], *(normalize_text(v) for v in row[1:])) for row in rows]
+        )
+
+
+def rebuild_index(conn):
+    """إعادة بناء الفهرس بالكامل"""
+    conn.execute(f'DELETE FROM {FTS_TABLE}')
+    ids = [row[0] for row in conn.execute('SELECT id FROM scholarships')]
+    index_scholarships(conn, ids)
+    logger.info(f"🔎 تم بناء فهرس البحث لـ {len(ids)} منحة")
+
+# ============================================
+# 🧮 بناء تعبير MATCH
+# ============================================
+
+def _quote(token):
+    return '"' + token.replace('"', '""') + '"'
+
+
+def _phrase(text, prefix_last=True):
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    phrase = _quote(' '.join(tokens))
+    return phrase + '*' if prefix_last else phrase
+
+
+def build_match(keyword=None, country=None, major=None):
+    """تعبير MATCH من كلمة البحث وفلاتر الدولة والتخصص، أو None لو لا يوجد شيء للبحث"""
+    parts = []
+
+    if keyword:
+        # كل كلمة يجب أن تظهر في أي عمود، مع مطابقة البادئة
+        parts.extend(_quote(t) + '*' for t in tokenize(keyword))
+
+    if country:
+        phrase = _phrase(country)
+        if phrase:
+            parts.append(f'country : {phrase}')
+
+    if major:
+        phrase = _phrase(major)
+        if phrase:
+            parts.append(f'major : {phrase}')
+
+    return ' AND '.join(parts) if parts else None
+
+# ============================================
+# ✅ فحص التوحيد (python search_index.py)
+# ============================================
+
+# كل زوج يجب أن يعطي نفس الكلمات: بدون "ال" ومعها، وبأشكال الألف المختلفة
+TOKENIZE_PAIRS = [
+    ('ألمانية', 'الألمانية'),
+    ('إلكترونية', 'الإلكترونية'),
+    ('إلكترونية', 'بالإلكترونية'),
+    ('منحة', 'المنحة'),
+    ('جامعة', 'للجامعة'),
+    ('أستراليا', 'آستراليا'),
+]
+
+
+def check_tokenize():
+    """قائمة الأزواج التي لا تتطابق (فارغة = التوحيد سليم)"""
+    return [(a, b, tokenize(a), tokenize(b)) for a, b in TOKENIZE_PAIRS if tokenize(a) != tokenize(b)]
+
+
+if __name__ == '__main__':
+    failures = check_tokenize()
+    for a, b, left, right in failures:
+        print(f"❌ {a} → {left} ≠ {b} → {right}")
+    print(f"✅ {len(TOKENIZE_PAIRS)} زوج" if not failures else f"❌ {len(failures)} زوج لا يتطابق")
+    raise SystemExit(1 if failures else 0)
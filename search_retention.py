@@ -0,0 +1,228 @@
+import os
+import logging
+from datetime import datetime, timedelta
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🗃️ تجميع سجل البحث وتنظيفه
+# ============================================
+#
+# كل يوم مكتمل في search_history يُجمع في جداول يومية صغيرة:
+#   search_daily        عدد عمليات البحث لكل نوع لكل يوم
+#   search_daily_users  المستخدمين المميزين لكل يوم (لحساب النشطين عبر عدة أيام)
+#   search_top_queries  أكثر الكلمات بحثاً لكل يوم
+# ثم تُحذف الصفوف الخام الأقدم من RETENTION_DAYS على دفعات صغيرة ويُستعاد
+# المكان بـ incremental_vacuum. الإحصائيات تقرأ من الجداول اليومية + اليوم الحالي فقط.
+
+RETENTION_DAYS = int(os.getenv("SEARCH_HISTORY_RETENTION_DAYS", 30))
+DELETE_BATCH = 500
+TOP_QUERIES_PER_DAY = 20
+VACUUM_PAGES = 1000
+
+_DAY = 'substr(search_date, 1, 10)'
+
+
+def create_schema(conn):
+    """جداول التجميع اليومي (ترحيل)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS search_daily (
+            day TEXT NOT NULL,
+            search_type TEXT NOT NULL,
+            searches INTEGER NOT NULL,
+            users INTEGER NOT NULL,
+            PRIMARY KEY (day, search_type)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS search_daily_users (
+            day TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            searches INTEGER NOT NULL,
+            PRIMARY KEY (day, user_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS search_top_queries (
+            day TEXT NOT NULL,
+            search_query TEXT NOT NULL,
+            searches INTEGER NOT NULL,
+            PRIMARY KEY (day, search_query)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS search_rollup_state (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        ) WITHOUT ROWID
+    ''')
+
+# ============================================
+# 📊 التجميع اليومي
+# ============================================
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def _last_rolled_day(conn):
+    row = conn.execute("SELECT value FROM search_rollup_state WHERE name = 'last_day'").fetchone()
+    return row[0] if row else None
+
+
+def _rollup_day(conn, day):
+    start, end = f'{day} 00:00:00', f'{day} 23:59:59'
+    for table in ('search_daily', 'search_daily_users', 'search_top_queries'):
+        conn.execute(f'DELETE FROM {table} WHERE day = ?', (day,))
+
+    conn.execute('''
+        INSERT INTO search_daily (day, search_type, searches, users)
+        SELECT ?, coalesce(search_type, 'general'), COUNT(*), COUNT(DISTINCT user_id)
+        FROM search_history WHERE search_date BETWEEN ? AND ?
+        GROUP BY coalesce(search_type, 'general')
+    ''', (day, start, end))
+    conn.execute('''
+        INSERT INTO search_daily_users (day, user_id, searches)
+        SELECT ?, user_id, COUNT(*)
+        FROM search_history WHERE search_date BETWEEN ? AND ? AND user_id IS NOT NULL
+        GROUP BY user_id
+    ''', (day, start, end))
+    conn.execute('''
+        INSERT INTO search_top_queries (day, search_query, searches)
+        SELECT ?, search_query, COUNT(*) AS n
+        FROM search_history WHERE search_date BETWEEN ? AND ? AND search_query IS NOT NULL
+        GROUP BY search_query ORDER BY n DESC LIMIT ?
+    ''', (day, start, end, TOP_QUERIES_PER_DAY))
+
+
+def rollup():
+    """تجميع كل الأيام المكتملة التي لم تُجمع بعد، وإرجاع عدد الأيام"""
+    with db.transaction() as conn:
+        last = _last_rolled_day(conn)
+        if last is None:
+            last = conn.execute(f'SELECT min({_DAY}) FROM search_history').fetchone()[0]
+            if last is None:
+                return 0
+            last = (datetime.strptime(last, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+
+        day = datetime.strptime(last, '%Y-%m-%d') + timedelta(days=1)
+        today = datetime.strptime(_today(), '%Y-%m-%d')
+        days = 0
+        while day < today:
+            _rollup_day(conn, day.strftime('%Y-%m-%d'))
+            last = day.strftime('%Y-%m-%d')
+            day += timedelta(days=1)
+            days += 1
+
+        conn.execute('''
+            INSERT INTO search_rollup_state (name, value) VALUES ('last_day', ?)
+            ON CONFLICT(name) DO UPDATE SET value = excluded.value
+        ''', (last,))
+    return days
+
+# ============================================
+# 🧹 الحذف على دفعات والضغط
+# ============================================
+
+def prune_cutoff():
+    """أقدم تاريخ يبقى خاماً: لا نحذف إلا ما تجاوز المدة وتم تجميعه"""
+    cutoff = (datetime.now() - timedelta(days=RETENTION_DAYS)).strftime('%Y-%m-%d')
+    last = db.fetchval("SELECT value FROM search_rollup_state WHERE name = 'last_day'")
+    if last is None:
+        return None
+    rolled = (datetime.strptime(last, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    return min(cutoff, rolled)
+
+
+def delete_batch(cutoff, limit=DELETE_BATCH):
+    """حذف دفعة صغيرة من الصفوف الأقدم من cutoff (معاملة قصيرة)، وإرجاع عدد المحذوف"""
+    cursor = db.execute('''
+        DELETE FROM search_history WHERE id IN (
+            SELECT id FROM search_history WHERE search_date < ? ORDER BY search_date LIMIT ?
+        )
+    ''', (cutoff, limit))
+    return cursor.rowcount
+
+
+def compact(pages=VACUUM_PAGES):
+    """استعادة الصفحات الفارغة تدريجياً (الملف يجب أن يكون auto_vacuum=INCREMENTAL)"""
+    conn = db.get_connection()
+    mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    if mode != 2:
+        # التحويل يحتاج VACUUM كامل يحجز الـ thread الكاتب طوال إعادة كتابة الملف،
+        # فلا يتم هنا بل مرة واحدة يدوياً والبوت متوقف
+        logger.warning("🗜️ تخطي ضغط قاعدة البيانات: auto_vacuum غير مفعل، "
+                       "شغّل python migrations.py --vacuum مرة واحدة")
+        return 0
+
+    free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    if free:
+        # execute() ينفذ خطوة واحدة فقط (= صفحة واحدة)، أما executescript فيكمل حتى النهاية
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+    return min(free, pages)
+
+
+def enable_incremental_vacuum():
+    """تحويل ملف قديم لـ auto_vacuum=INCREMENTAL (VACUUM كامل لمرة واحدة)، وإرجاع هل تم التحويل"""
+    conn = db.get_connection()
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        return False
+    # الوضع يُطبق على ملف موجود فقط بعد VACUUM كامل
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    conn.execute('VACUUM')
+    return True
+
+# ============================================
+# 📈 القراءة من التجميعات
+# ============================================
+
+def _since(days):
+    return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def _raw_start():
+    """أول يوم لم يُجمع بعد: ما قبله يُقرأ من الجداول اليومية وما بعده من الخام"""
+    last = db.fetchval("SELECT value FROM search_rollup_state WHERE name = 'last_day'")
+    if last is None:
+        return '0000-00-00'
+    return (datetime.strptime(last, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def active_users(days=7):
+    """عدد المستخدمين المميزين الذين بحثوا خلال آخر N يوم"""
+    since, raw = _since(days), _raw_start()
+    return db.fetchval('''
+        SELECT COUNT(*) FROM (
+            SELECT user_id FROM search_daily_users WHERE day >= ? AND day < ?
+            UNION
+            SELECT user_id FROM search_history WHERE search_date >= ? AND user_id IS NOT NULL
+        )
+    ''', (since, raw, max(since, raw)), 0)
+
+
+def searches_by_type(days=7):
+    """{نوع البحث: العدد} خلال آخر N يوم"""
+    since, raw = _since(days), _raw_start()
+    rows = db.fetchall('''
+        SELECT search_type, SUM(searches) FROM (
+            SELECT search_type, searches FROM search_daily WHERE day >= ? AND day < ?
+            UNION ALL
+            SELECT coalesce(search_type, 'general'), 1 FROM search_history WHERE search_date >= ?
+        ) GROUP BY search_type ORDER BY 2 DESC
+    ''', (since, raw, max(since, raw)))
+    return dict(rows)
+
+
+def top_queries(days=7, limit=5):
+    """أكثر الكلمات بحثاً خلال آخر N يوم"""
+    since, raw = _since(days), _raw_start()
+    return db.fetchall('''
+        SELECT search_query, SUM(searches) AS n FROM (
+            SELECT search_query, searches FROM search_top_queries WHERE day >= ? AND day < ?
+            UNION ALL
+            SELECT search_query, 1 FROM search_history
+            WHERE search_date >= ? AND search_query IS NOT NULL
+        ) GROUP BY search_query ORDER BY n DESC LIMIT ?
+    ''', (since, raw, max(since, raw), limit))
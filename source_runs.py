@@ -0,0 +1,66 @@
+import logging
+from datetime import datetime
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🗓️ سجل تشغيل المصادر المجدولة
+# ============================================
+#
+# صف واحد لكل مصدر: آخر تشغيل وآخر نجاح والمدة وعدد المنح وآخر خطأ،
+# مع عدادات التشغيل والفشل. يُكتب بعد انتهاء كل تشغيل من الجدولة.
+
+def create_schema(conn):
+    """جدول حالة المصادر (ترحيل)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS source_runs (
+            source TEXT PRIMARY KEY,
+            last_started TEXT,
+            last_finished TEXT,
+            last_success TEXT,
+            duration_ms INTEGER,
+            items INTEGER,
+            last_error TEXT,
+            runs INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+
+def record_run(source, started, finished, duration_ms, items, error=None):
+    """تسجيل نتيجة تشغيل واحد (يعمل على الـ thread الكاتب)"""
+    db.execute('''
+        INSERT INTO source_runs
+        (source, last_started, last_finished, last_success, duration_ms, items, last_error, runs, failures)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
+        ON CONFLICT(source) DO UPDATE SET
+            last_started = excluded.last_started,
+            last_finished = excluded.last_finished,
+            last_success = coalesce(excluded.last_success, last_success),
+            duration_ms = excluded.duration_ms,
+            items = excluded.items,
+            last_error = excluded.last_error,
+            runs = runs + 1,
+            failures = failures + excluded.failures
+    ''', (source, started, finished, None if error else finished, duration_ms, items, error,
+          1 if error else 0))
+
+
+def get_runs():
+    """[(source, last_success, duration_ms, items, last_error, runs, failures)]"""
+    return db.fetchall('''
+        SELECT source, last_success, duration_ms, items, last_error, runs, failures
+        FROM source_runs ORDER BY source
+    ''')
+
+
+def last_successes():
+    """{source: datetime} لآخر تشغيل ناجح لكل مصدر"""
+    return {
+        source: datetime.strptime(last_success, '%Y-%m-%d %H:%M:%S')
+        for source, last_success in db.fetchall(
+            'SELECT source, last_success FROM source_runs WHERE last_success IS NOT NULL'
+        )
+    }
@@ -0,0 +1,71 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+import background_jobs
+import db
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🚀 بدء التشغيل (warm start) وتوقيت مراحله
+# ============================================
+#
+# warm (الافتراضي): البوت يرد فوراً من القاعدة المحفوظة، ومزامنة الكتالوج
+# وتحديث المصادر تعمل في الخلفية عبر scrapers.scheduler. المزامنة المتزامنة
+# تحدث فقط لو القاعدة لم تُزامن أبداً (أول تشغيل). cold = السلوك القديم:
+# مزامنة الكتالوج قبل بدء البوت.
+# زمن كل مرحلة يُسجل في اللوج، والإجمالي في job_metrics باسم "startup".
+
+STARTUP_MODE = os.getenv("STARTUP_MODE", "warm").lower()
+
+_started = None
+_phases = []            # [(المرحلة، ms)]
+_ready_ms = None
+
+
+def is_warm():
+    return STARTUP_MODE != 'cold'
+
+
+def begin():
+    global _started
+    _started = time.perf_counter()
+    _phases.clear()
+
+
+@contextmanager
+def phase(name):
+    """قياس مرحلة واحدة من بدء التشغيل"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, (time.perf_counter() - start) * 1000))
+
+
+def ready(last_phase='الاتصال بتيليجرام'):
+    """البوت متصل وجاهز للتحديثات: تسجيل الزمن الكلي والتفصيل
+
+    ما بعد آخر مرحلة مقاسة (initialize و getMe في PTB) يُحسب كـ last_phase.
+    """
+    global _ready_ms
+    if _started is None or _ready_ms is not None:
+        return
+    _ready_ms = (time.perf_counter() - _started) * 1000
+    _phases.append((last_phase, max(_ready_ms - sum(ms for _, ms in _phases), 0.0)))
+
+    breakdown = '، '.join(f"{name} {ms:.0f}ms" for name, ms in _phases)
+    logger.info(f"🚀 البوت جاهز بعد {_ready_ms:.0f}ms ({STARTUP_MODE}): {breakdown}")
+
+    # الإجمالي فقط في السجل الدائم؛ التفصيل في اللوج ولوحة الأدمن
+    db.submit_write(background_jobs.record, background_jobs.JobRun(
+        'startup', datetime.now().strftime('%Y-%m-%d %H:%M:%S'), None, int(_ready_ms), 'ok',
+    ))
+
+
+def get_phases():
+    """(الوضع، زمن الجاهزية ms أو None، [(المرحلة، ms)])"""
+    return STARTUP_MODE, _ready_ms, list(_phases)
@@ -0,0 +1,150 @@
+import logging
+from datetime import datetime, timedelta
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 🧮 عدادات الإحصائيات (تحدّث بالـ triggers)
+# ============================================
+#
+# لوحة الأدمن تقرأ الأرقام من stats_counters (صف لكل عداد) ومن
+# stats_daily_joins (صف لكل يوم) بدل COUNT(*) على الجداول في كل ضغطة.
+# الـ triggers تحدّثها مع كل كتابة، ووظيفة reconcile تصحح أي انحراف.
+
+# اسم العداد -> الاستعلام الأصلي (يستخدم في التعبئة والتصحيح فقط)
+COUNTERS = {
+    'total_users': 'SELECT COUNT(*) FROM users',
+    'digest_subscribers': 'SELECT COUNT(*) FROM users WHERE weekly_digest = 1',
+    'total_scholarships': 'SELECT COUNT(*) FROM scholarships',
+    'total_favorites': 'SELECT COUNT(*) FROM favorites',
+    'unread_messages': 'SELECT COUNT(*) FROM admin_messages WHERE is_read = 0',
+    'blocked_users': 'SELECT COUNT(*) FROM blocked_users',
+}
+
+# (اسم الـ trigger، الحدث، الجدول، جسم الـ trigger)
+_TRIGGERS = [
+    ('stats_users_insert', 'AFTER INSERT', 'users', '''
+        UPDATE stats_counters SET value = value + 1 WHERE name = 'total_users';
+        UPDATE stats_counters SET value = value + 1
+            WHERE name = 'digest_subscribers' AND new.weekly_digest = 1;
+        INSERT INTO stats_daily_joins (join_date, count)
+            SELECT new.join_date, 1 WHERE new.join_date IS NOT NULL
+            ON CONFLICT(join_date) DO UPDATE SET count = count + 1;
+    '''),
+    ('stats_users_delete', 'AFTER DELETE', 'users', '''
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'total_users';
+        UPDATE stats_counters SET value = value - 1
+            WHERE name = 'digest_subscribers' AND old.weekly_digest = 1;
+        UPDATE stats_daily_joins SET count = count - 1 WHERE join_date IS old.join_date;
+    '''),
+    ('stats_users_digest', 'AFTER UPDATE OF weekly_digest', 'users', '''
+        UPDATE stats_counters
+            SET value = value + (new.weekly_digest = 1) - (old.weekly_digest = 1)
+            WHERE name = 'digest_subscribers';
+    '''),
+    ('stats_users_join_date', 'AFTER UPDATE OF join_date', 'users', '''
+        UPDATE stats_daily_joins SET count = count - 1 WHERE join_date IS old.join_date;
+        INSERT INTO stats_daily_joins (join_date, count)
+            SELECT new.join_date, 1 WHERE new.join_date IS NOT NULL
+            ON CONFLICT(join_date) DO UPDATE SET count = count + 1;
+    '''),
+    ('stats_scholarships_insert', 'AFTER INSERT', 'scholarships', '''
+        UPDATE stats_counters SET value = value + 1 WHERE name = 'total_scholarships';
+    '''),
+    ('stats_scholarships_delete', 'AFTER DELETE', 'scholarships', '''
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'total_scholarships';
+    '''),
+    ('stats_favorites_insert', 'AFTER INSERT', 'favorites', '''
+        UPDATE stats_counters SET value = value + 1 WHERE name = 'total_favorites';
+    '''),
+    ('stats_favorites_delete', 'AFTER DELETE', 'favorites', '''
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'total_favorites';
+    '''),
+    ('stats_messages_insert', 'AFTER INSERT', 'admin_messages', '''
+        UPDATE stats_counters SET value = value + 1
+            WHERE name = 'unread_messages' AND coalesce(new.is_read, 0) = 0;
+    '''),
+    ('stats_messages_delete', 'AFTER DELETE', 'admin_messages', '''
+        UPDATE stats_counters SET value = value - 1
+            WHERE name = 'unread_messages' AND coalesce(old.is_read, 0) = 0;
+    '''),
+    ('stats_messages_read', 'AFTER UPDATE OF is_read', 'admin_messages', '''
+        UPDATE stats_counters
+            SET value = value + (coalesce(new.is_read, 0) = 0) - (coalesce(old.is_read, 0) = 0)
+            WHERE name = 'unread_messages';
+    '''),
+    ('stats_blocked_insert', 'AFTER INSERT', 'blocked_users', '''
+        UPDATE stats_counters SET value = value + 1 WHERE name = 'blocked_users';
+    '''),
+    ('stats_blocked_delete', 'AFTER DELETE', 'blocked_users', '''
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'blocked_users';
+    '''),
+]
+
+
+def create_schema(conn):
+    """جداول العدادات والـ triggers + التعبئة الأولى (ترحيل)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stats_daily_joins (
+            join_date TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    for name, event, table, body in _TRIGGERS:
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {event} ON {table} BEGIN {body} END')
+    _reconcile(conn)
+
+
+def reconcile():
+    """إعادة حساب العدادات من الجداول الأصلية، وإرجاع {اسم: الفرق} لما كان منحرفاً"""
+    with db.transaction() as conn:
+        drift = _reconcile(conn)
+    if drift:
+        logger.warning(f"🧮 تم تصحيح انحراف العدادات: {drift}")
+    return drift
+
+
+def _reconcile(conn):
+    current = dict(conn.execute('SELECT name, value FROM stats_counters').fetchall())
+    drift = {}
+    for name, sql in COUNTERS.items():
+        actual = conn.execute(sql).fetchone()[0]
+        if name in current and current[name] != actual:
+            drift[name] = actual - current[name]
+        conn.execute('''
+            INSERT INTO stats_counters (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = excluded.value
+        ''', (name, actual))
+
+    joins = dict(conn.execute('''
+        SELECT join_date, COUNT(*) FROM users WHERE join_date IS NOT NULL GROUP BY join_date
+    ''').fetchall())
+    stored = dict(conn.execute('SELECT join_date, count FROM stats_daily_joins').fetchall())
+    if joins != {d: c for d, c in stored.items() if c}:
+        drift['daily_joins'] = sum(joins.values()) - sum(stored.values())
+        conn.execute('DELETE FROM stats_daily_joins')
+        conn.executemany('INSERT INTO stats_daily_joins (join_date, count) VALUES (?, ?)',
+                         joins.items())
+    return drift
+
+
+def get_counters():
+    """كل العدادات كـ dict (قراءة صف لكل عداد)"""
+    counters = dict.fromkeys(COUNTERS, 0)
+    counters.update(db.fetchall('SELECT name, value FROM stats_counters'))
+    return counters
+
+
+def get_joins_since(days=0):
+    """عدد المنضمين منذ N يوم (0 = اليوم فقط)"""
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    return db.fetchval('SELECT coalesce(SUM(count), 0) FROM stats_daily_joins WHERE join_date >= ?',
+                       (since,), 0)
@@ -0,0 +1,139 @@
+import os
+import threading
+import logging
+from collections import deque
+from itertools import groupby
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 📥 طابور الكتابة المؤجلة (write-behind)
+# ============================================
+#
+# كتابات الصف الواحد كثيرة التكرار (سجل البحث، رسائل الأدمن، التتبع، النقاط...)
+# تتجمع في الذاكرة وتُكتب دفعة واحدة في معاملة واحدة على الـ thread الكاتب،
+# كل FLUSH_INTERVAL_MS أو عند وصول الطابور لـ FLUSH_MAX_ROWS، وعند إيقاف البوت.
+
+FLUSH_INTERVAL_MS = int(os.getenv("WRITE_BUFFER_FLUSH_MS", 500))
+FLUSH_MAX_ROWS = int(os.getenv("WRITE_BUFFER_MAX_ROWS", 200))
+
+_pending = deque()
+_lock = threading.Lock()
+_wake = threading.Event()
+_stopped = threading.Event()
+_thread = None
+
+_stats = {
+    'queued': 0,
+    'flushed': 0,
+    'flushes': 0,
+    'errors': 0,
+}
+
+
+def enqueue(sql, params=()):
+    """إضافة أمر كتابة للطابور (يرجع فوراً دون انتظار القاعدة)"""
+    if _stopped.is_set():
+        # بعد الإيقاف نكتب مباشرة حتى لا يضيع شيء
+        db.execute(sql, params)
+        return
+
+    with _lock:
+        _pending.append((sql, tuple(params)))
+        _stats['queued'] += 1
+        depth = len(_pending)
+
+    _ensure_started()
+    if depth >= FLUSH_MAX_ROWS:
+        _wake.set()
+
+
+def get_queue_depth():
+    """عدد الكتابات المنتظرة في الطابور"""
+    return len(_pending)
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats['depth'] = len(_pending)
+    return stats
+
+
+def _drain():
+    with _lock:
+        batch = list(_pending)
+        _pending.clear()
+    return batch
+
+
+def _write(batch):
+    """كتابة الدفعة في معاملة واحدة، والأوامر المتتالية المتطابقة عبر executemany"""
+    try:
+        with db.transaction():
+            for sql, group in groupby(batch, key=lambda item: item[0]):
+                db.executemany(sql, [params for _, params in group])
+    except Exception as e:
+        # فشل أمر واحد لا يضيّع الدفعة كلها: نعيد المحاولة أمراً أمراً
+        logger.error(f"❌ فشل كتابة دفعة من {len(batch)} أمر، إعادة المحاولة فردياً: {e}")
+        for sql, params in batch:
+            try:
+                db.execute(sql, params)
+            except Exception as e:
+                with _lock:
+                    _stats['errors'] += 1
+                logger.error(f"❌ فشل أمر مؤجل: {e}")
+
+
+def flush():
+    """كتابة كل ما في الطابور الآن (على الـ thread الكاتب)، وإرجاع عدد الأوامر"""
+    batch = _drain()
+    if not batch:
+        return 0
+
+    if _stopped.is_set():
+        _write(batch)
+    else:
+        db.submit_write(_write, batch).result()
+
+    with _lock:
+        _stats['flushed'] += len(batch)
+        _stats['flushes'] += 1
+    logger.debug(f"📥 تم كتابة {len(batch)} أمر مؤجل")
+    return len(batch)
+
+
+def _run():
+    while not _stopped.is_set():
+        _wake.wait(FLUSH_INTERVAL_MS / 1000)
+        _wake.clear()
+        if _stopped.is_set():
+            break
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"❌ خطأ في طابور الكتابة المؤجلة: {e}")
+
+
+def _ensure_started():
+    global _thread
+    if _thread is not None:
+        return
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name='write-buffer', daemon=True)
+            _thread.start()
+
+
+def shutdown():
+    """إيقاف الـ thread وكتابة المتبقي (قبل db.shutdown)"""
+    _stopped.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join()
+    # flush نهائي على الـ thread الحالي لأن pool الكتابة قد يكون متوقفاً
+    count = flush()
+    if count:
+        logger.info(f"📥 تم كتابة {count} أمر مؤجل قبل الإيقاف")